@@ -0,0 +1,394 @@
+import re
+import click
+from flask import Blueprint, render_template, request, jsonify, abort, current_app
+from sqlalchemy import event, inspect, select, insert, delete, func, case, bindparam, text
+from sqlalchemy.exc import OperationalError
+from db import db
+from cache import cache
+from decorators import login_required
+from models import (Student, Company, JobPosition, Application, Placement,
+                    AnalyticsJob, AnalyticsDepartment, AnalyticsDirty)
+from scheduler import task
+import stats
+
+analytics_bp = Blueprint("analytics", __name__, url_prefix="/admin/analytics")
+
+# Placement analytics. Per-job funnel counts and per-department placement
+# figures live in small summary tables. Whenever the dashboard counters
+# move for a job (any status change, however it was written) the job is
+# marked dirty, and the next refresh recomputes only the dirty rows; so
+# are the department figures when a student joins, moves department or is
+# (de)activated. Viewing the dashboard only writes when something is dirty.
+# Salaries are parsed from their free-text form once, when a job is saved.
+
+FUNNEL_STATUSES = ["Applied", "Shortlisted", "Interview", "Selected", "Placed", "Rejected"]
+
+SALARY_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(k|lpa|lakhs?|lacs?|l|crores?|cr|m|million)?\b")
+UNITS = {
+    "k": 1e3,
+    "l": 1e5, "lpa": 1e5, "lakh": 1e5, "lakhs": 1e5, "lac": 1e5, "lacs": 1e5,
+    "cr": 1e7, "crore": 1e7, "crores": 1e7,
+    "m": 1e6, "million": 1e6,
+}
+MONTHLY_RE = re.compile(r"per\s*month|/\s*month|/\s*mo\b|\bpm\b|monthly")
+REFRESH_CHUNK = 500
+
+
+def parse_salary(text):
+    # "12 LPA", "6-8 LPA", "Rs 12,00,000", "50k per month" -> rupees per year.
+    if not text:
+        return None
+
+    text = text.lower()
+    text = re.sub(r"(?<=\d),(?=\d)", "", text)
+
+    matches = SALARY_RE.findall(text)
+    if not matches:
+        return None
+
+    # In a range only the last figure usually carries the unit.
+    unit = next((u for _, u in reversed(matches) if u), None)
+    values = [float(number) for number, _ in matches[:2]]
+    value = sum(values) / len(values)
+
+    if unit:
+        value *= UNITS[unit]
+    elif value < 100:
+        # A bare small number is a package in lakhs.
+        value *= 1e5
+
+    if MONTHLY_RE.search(text):
+        value *= 12
+
+    return value
+
+
+def _set_salary_value(mapper, connection, target):
+    target.salary_value = parse_salary(target.salary)
+
+
+def _new_job(mapper, connection, target):
+    # So jobs without applications still get a (zero) funnel row.
+    connection.execute(AnalyticsDirty.__table__.insert().values(kind="job", ref=target.id))
+
+
+# ---------------- DIRTY TRACKING ----------------
+
+def _mark(connection, wanted):
+    if not wanted:
+        return
+
+    table = AnalyticsDirty.__table__
+    existing = set(connection.execute(
+        select(table.c.kind, table.c.ref).where(
+            table.c.ref.in_({ref for _, ref in wanted})
+        )
+    ).all())
+
+    rows = [{"kind": kind, "ref": ref} for kind, ref in wanted if (kind, ref) not in existing]
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+def _mark_dirty(connection, deltas):
+    jobs = set()
+    departments = False
+
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        if key.startswith("job:"):
+            jobs.add(int(key.split(":")[1]))
+        elif key == "students" or key == "applications:Placed":
+            departments = True
+
+    wanted = [("job", job_id) for job_id in jobs]
+    if departments:
+        wanted.append(("departments", 0))
+    _mark(connection, wanted)
+
+
+def _student_changed(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in ("department", "is_active")):
+        _mark(connection, [("departments", 0)])
+
+
+# ---------------- REFRESH ----------------
+
+def _refresh_jobs(connection, job_ids):
+    days = func.julianday(Placement.placed_on) - func.julianday(Application.applied_on)
+
+    for start in range(0, len(job_ids), REFRESH_CHUNK):
+        chunk = job_ids[start:start + REFRESH_CHUNK]
+
+        connection.execute(
+            delete(AnalyticsJob).where(AnalyticsJob.job_position_id.in_(chunk))
+        )
+
+        summary = select(
+            JobPosition.id,
+            JobPosition.company_id,
+            *(
+                func.coalesce(func.sum(case((Application.status == status, 1), else_=0)), 0)
+                for status in FUNNEL_STATUSES
+            ),
+            func.count(Application.id),
+            func.coalesce(func.sum(days), 0),
+            func.count(Placement.id),
+        ).select_from(JobPosition).outerjoin(
+            Application, Application.job_position_id == JobPosition.id
+        ).outerjoin(
+            Placement, Placement.application_id == Application.id
+        ).where(
+            JobPosition.id.in_(chunk)
+        ).group_by(JobPosition.id, JobPosition.company_id)
+
+        connection.execute(insert(AnalyticsJob).from_select([
+            "job_position_id", "company_id",
+            "applied", "shortlisted", "interview", "selected", "placed", "rejected",
+            "total", "placement_days", "placements",
+        ], summary))
+
+
+def _refresh_departments(connection):
+    department = func.coalesce(Student.department, "Unknown")
+
+    students = dict(connection.execute(
+        select(department, func.count()).group_by(department)
+    ).all())
+
+    placed = dict(connection.execute(
+        select(department, func.count(func.distinct(Application.student_id))).join(
+            Student, Student.id == Application.student_id
+        ).where(
+            Application.status == "Placed"
+        ).group_by(department)
+    ).all())
+
+    connection.execute(delete(AnalyticsDepartment))
+    rows = [
+        {"department": name, "students": count, "placed_students": placed.get(name, 0)}
+        for name, count in students.items()
+    ]
+    if rows:
+        connection.execute(insert(AnalyticsDepartment), rows)
+
+
+def refresh(connection):
+    table = AnalyticsDirty.__table__
+    dirty = connection.execute(select(table.c.kind, table.c.ref)).all()
+    if not dirty:
+        return 0
+
+    job_ids = sorted(ref for kind, ref in dirty if kind == "job")
+    if job_ids:
+        _refresh_jobs(connection, job_ids)
+    if any(kind == "departments" for kind, _ in dirty):
+        _refresh_departments(connection)
+
+    # Only what was read; anything marked meanwhile waits for next time.
+    connection.execute(
+        table.delete().where(
+            table.c.kind == bindparam("b_kind"), table.c.ref == bindparam("b_ref")
+        ),
+        [{"b_kind": kind, "b_ref": ref} for kind, ref in dirty]
+    )
+    return len(dirty)
+
+
+def rebuild(connection):
+    jobs = connection.execute(select(JobPosition.id, JobPosition.salary)).all()
+    if jobs:
+        # Plain SQL: this runs as a migration step, before later steps add
+        # columns (updated_on) that the model would set on every UPDATE.
+        connection.execute(
+            text("UPDATE job_position SET salary_value = :value WHERE id = :id"),
+            [{"id": job_id, "value": parse_salary(salary)} for job_id, salary in jobs]
+        )
+
+    connection.execute(delete(AnalyticsJob))
+    connection.execute(delete(AnalyticsDirty))
+    _refresh_jobs(connection, [job_id for job_id, _ in jobs])
+    _refresh_departments(connection)
+
+
+def refresh_now():
+    # Look before taking the write lock; usually there is nothing to do.
+    table = AnalyticsDirty.__table__
+    with db.engine.connect() as connection:
+        if connection.execute(select(table.c.kind).limit(1)).first() is None:
+            return 0
+
+    try:
+        with db.engine.begin() as connection:
+            refreshed = refresh(connection)
+    except OperationalError:
+        # Busy writers win; serve the last summary and catch up later.
+        current_app.logger.warning("Analytics refresh skipped, database busy")
+        return 0
+
+    if refreshed:
+        cache.invalidate("analytics")
+    return refreshed
+
+
+@task("refresh-analytics")
+def refresh_analytics(now):
+    return refresh_now()
+
+
+# ---------------- SUMMARY ----------------
+
+def _weighted_median(pairs):
+    # pairs of (value, weight)
+    pairs = sorted(pair for pair in pairs if pair[1] > 0)
+    total = sum(weight for _, weight in pairs)
+    if not total:
+        return None
+
+    seen = 0
+    for value, weight in pairs:
+        seen += weight
+        if seen * 2 >= total:
+            return value
+
+
+def _build_summary():
+    jobs = db.session.execute(
+        select(
+            AnalyticsJob, JobPosition.title, JobPosition.salary_value, Company.name
+        ).join(
+            JobPosition, JobPosition.id == AnalyticsJob.job_position_id
+        ).join(
+            Company, Company.id == AnalyticsJob.company_id
+        ).order_by(AnalyticsJob.total.desc())
+    ).all()
+
+    funnels = []
+    companies = {}
+    for row, title, salary_value, company_name in jobs:
+        funnels.append({
+            "job_id": row.job_position_id,
+            "title": title,
+            "company": company_name,
+            "salary": salary_value,
+            "total": row.total,
+            # Everyone past a stage reached it; rejections may come from any stage.
+            "shortlisted": row.shortlisted + row.interview + row.selected + row.placed,
+            "interview": row.interview + row.selected + row.placed,
+            "selected": row.selected + row.placed,
+            "placed": row.placed,
+            "rejected": row.rejected,
+            "avg_days_to_place": row.placement_days / row.placements if row.placements else None,
+        })
+
+        company = companies.setdefault(row.company_id, {
+            "company_id": row.company_id, "name": company_name,
+            "jobs": 0, "applications": 0, "placements": 0,
+            "placement_days": 0.0, "salaries": [],
+        })
+        company["jobs"] += 1
+        company["applications"] += row.total
+        company["placements"] += row.placements
+        company["placement_days"] += row.placement_days
+        if salary_value is not None:
+            company["salaries"].append((salary_value, row.placed))
+
+    company_rows = []
+    for company in companies.values():
+        salaries = company.pop("salaries")
+        placed_salaries = [value for value, placed in salaries if placed]
+        days = company.pop("placement_days")
+
+        # Weighted by how many students each job placed.
+        company["median_salary"] = _weighted_median(salaries)
+        company["top_salary"] = max(placed_salaries) if placed_salaries else None
+        company["avg_days_to_place"] = days / company["placements"] if company["placements"] else None
+        company_rows.append(company)
+
+    departments = [
+        {
+            "department": row.department,
+            "students": row.students,
+            "placed_students": row.placed_students,
+            "placement_rate": row.placed_students / row.students if row.students else 0.0,
+        }
+        for row in AnalyticsDepartment.query.order_by(AnalyticsDepartment.department)
+    ]
+
+    total_placements = sum(row.placements for row, _, _, _ in jobs)
+    total_days = sum(row.placement_days for row, _, _, _ in jobs)
+    students = sum(row["students"] for row in departments)
+    placed_students = sum(row["placed_students"] for row in departments)
+
+    return {
+        "overview": {
+            "students": students,
+            "placed_students": placed_students,
+            "placement_rate": placed_students / students if students else 0.0,
+            "placements": total_placements,
+            "avg_days_to_place": total_days / total_placements if total_placements else None,
+        },
+        "departments": departments,
+        "companies": sorted(company_rows, key=lambda c: (-c["placements"], c["name"])),
+        "funnels": funnels,
+    }
+
+
+def summary():
+    refresh_now()
+    return cache.get_or_set(
+        "analytics:summary", _build_summary, tags=("analytics",),
+        timeout=current_app.config.get("ANALYTICS_CACHE_TIMEOUT", 300)
+    )
+
+
+# ---------------- VIEWS ----------------
+
+@analytics_bp.route("/")
+@login_required("admin")
+def analytics_dashboard():
+    return render_template("admin/analytics.html", summary=summary())
+
+
+@analytics_bp.route("/api")
+@analytics_bp.route("/api/<section>")
+@login_required("admin")
+def analytics_api(section=None):
+    data = summary()
+
+    if section is not None:
+        if section not in data:
+            abort(404)
+        data = {section: data[section]}
+
+    limit = request.args.get("limit", type=int)
+    if limit:
+        data = {key: value[:limit] if isinstance(value, list) else value for key, value in data.items()}
+
+    return jsonify(data)
+
+
+def init_app(app):
+    app.register_blueprint(analytics_bp)
+
+    if _mark_dirty not in stats.DELTA_LISTENERS:
+        stats.DELTA_LISTENERS.append(_mark_dirty)
+
+    for identifier in ("before_insert", "before_update"):
+        if not event.contains(JobPosition, identifier, _set_salary_value):
+            event.listen(JobPosition, identifier, _set_salary_value)
+
+    if not event.contains(JobPosition, "after_insert", _new_job):
+        event.listen(JobPosition, "after_insert", _new_job)
+
+    if not event.contains(Student, "after_update", _student_changed):
+        event.listen(Student, "after_update", _student_changed)
+
+    @app.cli.command("rebuild-analytics")
+    def rebuild_analytics_command():
+        with db.engine.begin() as connection:
+            rebuild(connection)
+        cache.invalidate("analytics")
+        click.echo("Analytics tables rebuilt.")
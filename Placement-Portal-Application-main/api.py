@@ -0,0 +1,315 @@
+import hashlib
+from datetime import date, datetime
+from flask import Blueprint, Response, request, session, jsonify, current_app, abort
+from werkzeug.exceptions import HTTPException
+from sqlalchemy import func
+from db import db
+from decorators import api_login_required
+from models import Company, Student, JobPosition, Application
+from pagination import paginate
+from applications import submit_application
+
+api_bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+# Read-only JSON API. Each resource selects only the requested columns
+# (?fields=id,title), pages with the same keyset cursors as the HTML
+# views, and carries an ETag worked out from a single COUNT/MAX(updated_on)
+# over the rows in scope. A client sending it back gets 304 Not Modified
+# before any row is fetched or serialised. There is no Last-Modified: a
+# delete or archive leaves every remaining updated_on as it was, so only
+# the ETag, which includes the count, notices it.
+
+JOB_FIELDS = {
+    "id": JobPosition.id,
+    "title": JobPosition.title,
+    "company_id": JobPosition.company_id,
+    "company_name": Company.name,
+    "description": JobPosition.description,
+    "eligibility": JobPosition.eligibility,
+    "skills": JobPosition.skills,
+    "experience": JobPosition.experience,
+    "salary": JobPosition.salary,
+    "salary_value": JobPosition.salary_value,
+    "deadline": JobPosition.deadline,
+    "posted_date": JobPosition.posted_date,
+    "status": JobPosition.status,
+    "updated_on": JobPosition.updated_on,
+}
+
+APPLICATION_FIELDS = {
+    "id": Application.id,
+    "status": Application.status,
+    "applied_on": Application.applied_on,
+    "updated_on": Application.updated_on,
+    "student_id": Application.student_id,
+    "student_name": Student.name,
+    "job_id": Application.job_position_id,
+    "job_title": JobPosition.title,
+    "company_id": JobPosition.company_id,
+    "company_name": Company.name,
+}
+
+STUDENT_FIELDS = {
+    "id": Student.id,
+    "name": Student.name,
+    "email": Student.email,
+    "department": Student.department,
+    "cgpa": Student.cgpa,
+    "is_active": Student.is_active,
+    "updated_on": Student.updated_on,
+}
+
+COMPANY_FIELDS = {
+    "id": Company.id,
+    "name": Company.name,
+    "email": Company.email,
+    "website": Company.website,
+    "hr_contact": Company.hr_contact,
+    "is_approved": Company.is_approved,
+    "is_blacklisted": Company.is_blacklisted,
+    "created_at": Company.created_at,
+    "updated_on": Company.updated_on,
+}
+
+
+@api_bp.errorhandler(HTTPException)
+def api_error(error):
+    return jsonify(error=error.description), error.code
+
+
+def _value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _selected_fields(available):
+    requested = request.args.get("fields")
+    if not requested:
+        return list(available)
+
+    fields = [name.strip() for name in requested.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        abort(400, f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def _entities(available, fields, keys):
+    # Sort key columns ride along (under their own names) for the cursor.
+    names = list(dict.fromkeys(fields + [column.key for column in keys]))
+    return [available[name].label(name) for name in names]
+
+
+# ---------------- CONDITIONAL REQUESTS ----------------
+
+def _validator(query, *versioned):
+    # One aggregate over the rows in scope: any insert, delete or update
+    # among them (or their joined rows) changes the count or a max.
+    row = query.with_entities(
+        func.count(), *(func.max(model.updated_on) for model in versioned)
+    ).order_by(None).one()
+
+    count = row[0]
+    parts = [
+        request.endpoint, session.get("role"), session.get("user_id"),
+        sorted(request.args.items(multi=True)), count,
+        [v.isoformat() if v else None for v in row[1:]],
+    ]
+    etag = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return count, etag
+
+
+def _conditional(query, versioned, build, not_found=False):
+    count, etag = _validator(query, *versioned)
+
+    if not_found and count == 0:
+        return jsonify(error="Not found"), 404
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = current_app.json.response(build())
+
+    response.set_etag(etag)
+    # Clients may keep a copy but must revalidate before using it.
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def _list(query, available, versioned, keys, descending=False):
+    fields = _selected_fields(available)
+
+    def build():
+        page = paginate(
+            query.with_entities(*_entities(available, fields, keys)),
+            *keys, descending=descending
+        )
+        return {
+            "items": [{name: _value(getattr(row, name)) for name in fields} for row in page],
+            "next": page.next_url,
+            "prev": page.prev_url,
+        }
+
+    return _conditional(query, versioned, build)
+
+
+def _detail(query, available, versioned):
+    fields = _selected_fields(available)
+
+    def build():
+        row = query.with_entities(*_entities(available, fields, [])).first()
+        return {name: _value(getattr(row, name)) for name in fields}
+
+    return _conditional(query, versioned, build, not_found=True)
+
+
+# ---------------- JOBS ----------------
+
+def _jobs_query():
+    query = db.session.query(JobPosition).join(Company, Company.id == JobPosition.company_id)
+    role = session.get("role")
+
+    if role == "student":
+        query = query.filter(JobPosition.status == "Approved")
+    elif role == "company":
+        query = query.filter(JobPosition.company_id == session.get("user_id"))
+    else:
+        company_id = request.args.get("company_id", type=int)
+        if company_id:
+            query = query.filter(JobPosition.company_id == company_id)
+
+    status = request.args.get("status")
+    if status:
+        query = query.filter(JobPosition.status == status)
+    return query
+
+
+@api_bp.route("/jobs")
+@api_login_required("admin", "company", "student")
+def list_jobs():
+    return _list(
+        _jobs_query(), JOB_FIELDS, (JobPosition, Company),
+        (JobPosition.posted_date, JobPosition.id), descending=True
+    )
+
+
+@api_bp.route("/jobs/<int:job_id>")
+@api_login_required("admin", "company", "student")
+def get_job(job_id):
+    return _detail(
+        _jobs_query().filter(JobPosition.id == job_id), JOB_FIELDS, (JobPosition, Company)
+    )
+
+
+# ---------------- APPLICATIONS ----------------
+
+def _applications_query():
+    query = db.session.query(Application).join(
+        Student, Student.id == Application.student_id
+    ).join(
+        JobPosition, JobPosition.id == Application.job_position_id
+    ).join(
+        Company, Company.id == JobPosition.company_id
+    )
+    role = session.get("role")
+
+    if role == "student":
+        query = query.filter(Application.student_id == session.get("user_id"))
+    elif role == "company":
+        query = query.filter(JobPosition.company_id == session.get("user_id"))
+
+    status = request.args.get("status")
+    job_id = request.args.get("job_id", type=int)
+    if status:
+        query = query.filter(Application.status == status)
+    if job_id:
+        query = query.filter(Application.job_position_id == job_id)
+    return query
+
+
+@api_bp.route("/applications")
+@api_login_required("admin", "company", "student")
+def list_applications():
+    return _list(
+        _applications_query(), APPLICATION_FIELDS,
+        (Application, Student, JobPosition, Company), (Application.id,)
+    )
+
+
+@api_bp.route("/applications", methods=["POST"])
+@api_login_required("student")
+def create_application():
+    data = request.get_json(silent=True) or {}
+    job_id = data.get("job_id")
+    if not isinstance(job_id, int):
+        abort(400, "job_id is required")
+
+    # Retrying with the same Idempotency-Key returns the first outcome.
+    outcome = submit_application(
+        session.get("user_id"), job_id, key=request.headers.get("Idempotency-Key")
+    )
+    status = {"applied": 201, "duplicate": 200, "missing": 404, "key_reused": 422}.get(outcome, 409)
+    return jsonify(outcome=outcome, job_id=job_id), status
+
+
+@api_bp.route("/applications/<int:application_id>")
+@api_login_required("admin", "company", "student")
+def get_application(application_id):
+    return _detail(
+        _applications_query().filter(Application.id == application_id),
+        APPLICATION_FIELDS, (Application, Student, JobPosition, Company)
+    )
+
+
+# ---------------- STUDENTS ----------------
+
+def _students_query():
+    query = db.session.query(Student)
+
+    if session.get("role") == "student":
+        query = query.filter(Student.id == session.get("user_id"))
+
+    department = request.args.get("department")
+    if department:
+        query = query.filter(Student.department == department)
+    return query
+
+
+@api_bp.route("/students")
+@api_login_required("admin")
+def list_students():
+    return _list(_students_query(), STUDENT_FIELDS, (Student,), (Student.id,))
+
+
+@api_bp.route("/students/<int:student_id>")
+@api_login_required("admin", "company", "student")
+def get_student(student_id):
+    return _detail(
+        _students_query().filter(Student.id == student_id), STUDENT_FIELDS, (Student,)
+    )
+
+
+# ---------------- COMPANIES ----------------
+
+def _companies_query():
+    query = db.session.query(Company)
+
+    if session.get("role") != "admin":
+        query = query.filter(Company.is_approved.is_(True), Company.is_blacklisted.is_(False))
+    return query
+
+
+@api_bp.route("/companies")
+@api_login_required("admin", "company", "student")
+def list_companies():
+    return _list(_companies_query(), COMPANY_FIELDS, (Company,), (Company.id,))
+
+
+@api_bp.route("/companies/<int:company_id>")
+@api_login_required("admin", "company", "student")
+def get_company(company_id):
+    return _detail(
+        _companies_query().filter(Company.id == company_id), COMPANY_FIELDS, (Company,)
+    )
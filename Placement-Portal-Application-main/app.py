@@ -1,27 +1,109 @@
 from flask import Flask, render_template, request, redirect, url_for, flash, session
-from config import Config
+from config import get_config
 from db import db
-from models import Company, Student, JobPosition, Application, Placement
+from models import Company, Student, JobPosition, Application, Placement, ResumeFile
 from decorators import login_required
+from identity import current_identity, invalidate_identity
+import queries
+from pagination import paginate
+from search import search_jobs, search_companies, search_students
+from cache import cache
+from engine import retry_on_lock
+from resumes import store_resume, resume_upload, move_legacy_resumes, ResumeError
+import matching
+from applications import submit_application, MESSAGES as APPLY_MESSAGES
+from transitions import transition_applications, TransitionError, TRANSITION_STATUSES
+from outbox import queue_job_change, queue_company_change
+from interviews import student_interviews
 import os
 from datetime import datetime, date
 
+APPLICATION_STATUSES = ["Applied", "Shortlisted", "Interview", "Selected", "Placed", "Rejected"]
 
-def create_app():
+
+def create_app(config_name=None):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(get_config(config_name))
 
-    app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static/uploads/resumes')
+    # Outside static/, so resumes are only served through serve_resume.
+    app.config.setdefault('UPLOAD_FOLDER', os.path.join(app.instance_path, 'resumes'))
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    move_legacy_resumes(app)
 
     db.init_app(app)
+    cache.init_app(app)
+
+    import rendering
+    rendering.init_app(app)
+
+    import assets
+    app.register_blueprint(assets.assets_bp)
+    assets.init_app(app)
+
+    import identity
+    identity.init_app(app)
+
+    import security
+    security.init_app(app)
+
+    import engine
+    engine.init_app(app)
+
+    import applications
+    applications.init_app(app)
 
     from auth import auth_bp
     app.register_blueprint(auth_bp)
 
+    from export import export_bp
+    app.register_blueprint(export_bp)
+
+    import importer
+    app.register_blueprint(importer.import_bp)
+    importer.init_app(app)
+
+    from resumes import resumes_bp
+    app.register_blueprint(resumes_bp)
+
+    import scheduler
+    scheduler.init_app(app)
+
+    import profiling
+    profiling.init_app(app)
+
+    import analytics
+    analytics.init_app(app)
+
+    from api import api_bp
+    app.register_blueprint(api_bp)
+
+    import archive
+    app.register_blueprint(archive.history_bp)
+    archive.init_app(app)
+
+    import interviews
+    app.register_blueprint(interviews.interviews_bp)
+    interviews.init_app(app)
+
+    import seed
+    seed.init_app(app)
+
+    import bench
+    bench.init_app(app)
+
+    import migrations
+    migrations.init_app(app)
+
+    import stats
+    stats.init_app(app)
+
+    import tenants
+    tenants.init_app(app)
+
     # ---------------- HOME ----------------
 
     @app.route("/")
+    @cache.cached_page(timeout=300)
     def index():
         return render_template("index.html")
 
@@ -31,20 +113,24 @@ def create_app():
     @login_required("admin")
     def admin_dashboard():
 
-        stats = {
-            "companies": Company.query.count(),
-            "students": Student.query.count(),
-            "jobs": JobPosition.query.count(),
-            "applications": Application.query.count()
+        counters = stats.get_counters(
+            "companies", "students", "jobs", "applications",
+            *(f"applications:{status}" for status in APPLICATION_STATUSES)
+        )
+
+        status_counts = {
+            status: counters[f"applications:{status}"]
+            for status in APPLICATION_STATUSES
         }
 
         pending_companies = Company.query.filter_by(is_approved=False).all()
-        jobs = JobPosition.query.order_by(JobPosition.posted_date.desc()).limit(5).all()
+        jobs = queries.jobs_with_company().order_by(JobPosition.posted_date.desc()).limit(5).all()
 
         return render_template(
             "dashboards/admin.html",
             companies=pending_companies,
-            stats=stats,
+            stats=counters,
+            status_counts=status_counts,
             jobs=jobs
         )
 
@@ -57,11 +143,9 @@ def create_app():
         search = request.args.get("search", "")
 
         if search:
-            companies = Company.query.filter(
-                Company.name.ilike(f"%{search}%")
-            ).all()
+            companies = search_companies(Company.query, search)
         else:
-            companies = Company.query.all()
+            companies = paginate(Company.query, Company.id)
 
         return render_template(
             "admin/manage_companies.html",
@@ -73,6 +157,7 @@ def create_app():
     def approve_company_action(company_id, action):
 
         company = Company.query.get_or_404(company_id)
+        queue_company_change(company, action)
 
         if action == "approve":
             company.is_approved = True
@@ -87,6 +172,8 @@ def create_app():
             company.is_blacklisted = False
 
         db.session.commit()
+        cache.invalidate("jobs")
+        invalidate_identity("company", company_id)
 
         return redirect(request.referrer or url_for("manage_companies"))
 
@@ -104,12 +191,9 @@ def create_app():
         search = request.args.get("search", "")
 
         if search:
-            students = Student.query.filter(
-                (Student.name.ilike(f"%{search}%")) |
-                (Student.email.ilike(f"%{search}%"))
-            ).all()
+            students = search_students(Student.query, search)
         else:
-            students = Student.query.all()
+            students = paginate(Student.query, Student.id)
 
         return render_template(
             "admin/manage_students.html",
@@ -129,6 +213,8 @@ def create_app():
             student.is_active = True
 
         db.session.commit()
+        cache.invalidate("students")
+        invalidate_identity("student", student_id)
 
         return redirect(url_for("manage_students"))
 
@@ -138,7 +224,11 @@ def create_app():
     @login_required("admin")
     def manage_jobs():
 
-        jobs = JobPosition.query.all()
+        jobs = paginate(
+            queries.jobs_with_company(),
+            JobPosition.posted_date, JobPosition.id,
+            descending=True
+        )
 
         return render_template(
             "admin/manage_jobs.html",
@@ -157,7 +247,9 @@ def create_app():
         elif action == "reject":
             job.status = "Rejected"
 
+        queue_job_change(job_id, action)
         db.session.commit()
+        cache.invalidate("jobs")
 
         return redirect(url_for("manage_jobs"))
 
@@ -167,7 +259,10 @@ def create_app():
     @login_required("admin")
     def view_applications():
 
-        applications = Application.query.all()
+        applications = paginate(
+            queries.applications_with_details(),
+            Application.id
+        )
 
         return render_template(
             "admin/view_applications.html",
@@ -178,8 +273,8 @@ def create_app():
     @login_required("admin")
     def view_job_details(job_id):
 
-        job = JobPosition.query.get_or_404(job_id)
-        applications = Application.query.filter_by(job_position_id=job_id).all()
+        job = queries.job_with_company(job_id)
+        applications = queries.job_applicants(job_id).all()
 
         return render_template(
             "admin/job_details.html",
@@ -193,10 +288,27 @@ def create_app():
     @login_required("student")
     def student_dashboard():
 
-        active_drives = JobPosition.query.filter(
-            JobPosition.status == "Approved",
-            JobPosition.deadline >= date.today()
-        ).order_by(JobPosition.posted_date.desc()).limit(5).all()
+        today = date.today()
+
+        def load_active_drives():
+            drives = queries.jobs_with_company().filter(
+                JobPosition.status == "Approved",
+                JobPosition.deadline >= today
+            ).order_by(JobPosition.posted_date.desc()).limit(5).all()
+
+            return [
+                {
+                    "id": drive.id,
+                    "title": drive.title,
+                    "deadline": drive.deadline,
+                    "company": {"name": drive.company.name}
+                }
+                for drive in drives
+            ]
+
+        active_drives = cache.get_or_set(
+            f"drives:active:{today}", load_active_drives, tags=("jobs",)
+        )
 
         return render_template(
             "dashboards/student.html",
@@ -205,49 +317,68 @@ def create_app():
 
     @app.route("/student/jobs")
     @login_required("student")
+    @cache.cached_page("jobs")
     def student_jobs():
 
         search = request.args.get("search", "")
 
-        query = JobPosition.query.filter_by(status="Approved")
+        query = queries.approved_jobs_with_company()
 
         if search:
-            query = query.join(Company).filter(
-                (JobPosition.title.ilike(f"%{search}%")) |
-                (Company.name.ilike(f"%{search}%")) |
-                (JobPosition.skills.ilike(f"%{search}%"))
+            jobs = search_jobs(query, search)
+        else:
+            jobs = paginate(
+                query,
+                JobPosition.posted_date, JobPosition.id,
+                descending=True
             )
 
-        jobs = query.all()
-
         return render_template(
             "student/jobs.html",
             jobs=jobs
         )
 
-    @app.route("/student/apply/<int:job_id>")
+    @app.route("/student/jobs/eligible")
     @login_required("student")
-    def apply_job(job_id):
+    def student_eligible_jobs():
 
-        student_id = session.get("user_id")
+        student = current_identity()
 
-        existing = Application.query.filter_by(
-            student_id=student_id,
-            job_position_id=job_id
-        ).first()
+        resume_text = None
+        if student.resume:
+            resume = ResumeFile.query.filter_by(filename=student.resume).first()
+            resume_text = resume.text if resume else None
 
-        if existing:
-            flash("Already applied.")
-            return redirect(url_for("student_jobs"))
+        limit = app.config.get("MATCH_LIMIT", 200)
+        matches = matching.eligible_job_ids(student, resume_text)[:limit]
+
+        jobs_by_id = {
+            job.id: job
+            for job in queries.jobs_with_company().filter(
+                JobPosition.id.in_([job_id for job_id, _ in matches])
+            )
+        }
+
+        return render_template(
+            "student/eligible_jobs.html",
+            matches=[
+                (jobs_by_id[job_id], score)
+                for job_id, score in matches if job_id in jobs_by_id
+            ]
+        )
+
+    @app.route("/student/apply/<int:job_id>")
+    @login_required("student")
+    @retry_on_lock
+    def apply_job(job_id):
 
-        new_app = Application(
-            student_id=student_id,
-            job_position_id=job_id,
-            status="Applied"
+        outcome = submit_application(
+            session.get("user_id"), job_id, key=request.args.get("key")
         )
 
-        db.session.add(new_app)
-        db.session.commit()
+        if outcome != "applied":
+            flash(APPLY_MESSAGES[outcome])
+            return redirect(url_for("student_jobs"))
 
         return redirect(url_for("student_my_applications"))
 
@@ -257,16 +388,16 @@ def create_app():
 
         student_id = session.get("user_id")
 
-        applications = Application.query.filter_by(
-            student_id=student_id
-        ).all()
+        applications = queries.student_applications(student_id).all()
 
         return render_template(
             "student/my_applications.html",
-            applications=applications
+            applications=applications,
+            interviews=student_interviews(student_id)
         )
     @app.route("/student/profile", methods=["GET", "POST"])
     @login_required("student")
+    @resume_upload
 
     def student_profile():
 
@@ -291,13 +422,14 @@ def create_app():
                 file = request.files["resume"]
 
                 if file.filename != "":
-                    from werkzeug.utils import secure_filename
-                    filename = secure_filename(file.filename)
-
-                    file.save(os.path.join(app.config["UPLOAD_FOLDER"], filename))
-                    student.resume = filename
+                    try:
+                        student.resume = store_resume(file)
+                    except ResumeError as error:
+                        flash(str(error))
 
             db.session.commit()
+            cache.invalidate("students")
+            invalidate_identity("student", student_id)
 
             flash("Profile updated successfully")
             return redirect(url_for("student_profile"))
@@ -315,19 +447,26 @@ def create_app():
 
         company_id = session.get("user_id")
 
-        company = Company.query.get_or_404(company_id)
+        company = current_identity()
 
         jobs = JobPosition.query.filter_by(
             company_id=company_id
         ).all()
 
-        total_applications = sum(len(job.applications) for job in jobs)
+        total_applications = stats.get_counters(
+            f"company:{company_id}:applications"
+        )[f"company:{company_id}:applications"]
+
+        application_counts = stats.job_application_counts(
+            [job.id for job in jobs]
+        )
 
         return render_template(
             "dashboards/company.html",
             company=company,
             jobs=jobs,
-            total_applications=total_applications
+            total_applications=total_applications,
+            application_counts=application_counts
         )
 
     @app.route("/company/post_job", methods=["GET", "POST"])
@@ -357,6 +496,7 @@ def create_app():
 
             db.session.add(job)
             db.session.commit()
+            cache.invalidate("jobs")
 
             return redirect(url_for("company_dashboard"))
 
@@ -370,9 +510,7 @@ def create_app():
 
         company_id = session.get("user_id")
 
-        jobs = JobPosition.query.filter_by(
-            company_id=company_id
-        ).all()
+        jobs = queries.company_jobs_with_applicants(company_id).all()
 
         return render_template(
             "company/view_applications.html",
@@ -380,8 +518,32 @@ def create_app():
     )
 
 
+    @app.route("/company/job/<int:job_id>/candidates")
+    @login_required("company")
+    def job_candidates(job_id):
+
+        job = JobPosition.query.get_or_404(job_id)
+
+        if job.company_id != session.get("user_id"):
+            flash("Unauthorized action")
+            return redirect(url_for("company_dashboard"))
+
+        applied = {
+            student_id for (student_id,) in db.session.query(
+                Application.student_id
+            ).filter_by(job_position_id=job.id)
+        }
+
+        return render_template(
+            "company/candidates.html",
+            job=job,
+            candidates=matching.candidates_for_job(job),
+            applied=applied
+        )
+
     @app.route("/application/<int:app_id>/update_status/<status>")
     @login_required("company")
+    @retry_on_lock
     def update_application_status(app_id, status):
 
         application = Application.query.get_or_404(app_id)
@@ -390,11 +552,40 @@ def create_app():
             flash("Unauthorized action")
             return redirect(url_for("company_dashboard"))
 
-        if status in ["Shortlisted", "Interview", "Selected", "Placed", "Rejected"]:
-            application.status = status
-            db.session.commit()
+        if status in TRANSITION_STATUSES:
+            transition_applications(application.job_position.company_id, status, application_ids=[app_id])
 
         return redirect(request.referrer or url_for("company_applications"))
+
+
+    @app.route("/company/applications/bulk_status", methods=["POST"])
+    @login_required("company")
+    @retry_on_lock
+    def bulk_update_application_status():
+
+        status = request.form.get("status")
+        job_id = request.form.get("job_id", type=int)
+
+        try:
+            if request.form.get("scope") == "filter":
+                min_cgpa = request.form.get("min_cgpa", type=float)
+                changed = transition_applications(
+                    session.get("user_id"), status,
+                    job_id=job_id,
+                    min_cgpa=min_cgpa,
+                    current_status=request.form.get("current_status") or None
+                )
+            else:
+                changed = transition_applications(
+                    session.get("user_id"), status,
+                    application_ids=request.form.getlist("application_ids", type=int)
+                )
+        except TransitionError as error:
+            flash(str(error))
+            return redirect(url_for("company_applications"))
+
+        flash(f"{changed} applications moved to {status}")
+        return redirect(url_for("company_applications"))
     
     @app.route("/student/profile/<int:student_id>")
     @login_required("company")
@@ -402,9 +593,14 @@ def create_app():
 
         student = Student.query.get_or_404(student_id)
 
+        resume = None
+        if student.resume:
+            resume = ResumeFile.query.filter_by(filename=student.resume).first()
+
         return render_template(
             "company/student_profile.html",
-            student=student
+            student=student,
+            resume=resume
         )
     
     
@@ -422,6 +618,7 @@ def create_app():
         if status in ["Closed", "Active"]:
             job.status = status
             db.session.commit()
+            cache.invalidate("jobs")
             flash(f"Job status updated to {status}")
 
         return redirect(url_for("company_dashboard"))
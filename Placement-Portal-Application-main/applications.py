@@ -0,0 +1,292 @@
+import queue
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta
+from flask import current_app, url_for
+from sqlalchemy import DateTime, select, literal, func, or_, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from db import db
+from cache import cache
+from engine import is_lock_error
+from matching import parse_eligibility
+from models import Student, JobPosition, Application, IdempotencyKey
+from scheduler import task
+from stats import apply_deltas
+from tenants import current_tenant, tenant_context
+
+# Applying for a job. The status, deadline and eligibility checks and the
+# insert are a single INSERT ... SELECT ... ON CONFLICT DO NOTHING, so two
+# racing requests (or a double click) can never both insert or trip the
+# unique constraint. Only when nothing was inserted is a second query run
+# to explain why.
+#
+# Clients may send an idempotency key; a retry with the same key gets the
+# outcome of the first attempt. Every apply link a page renders carries a
+# fresh key (apply_url), so a double click or a retried GET is a replay.
+# Timestamps are UTC like the rest of the tables, but deadlines are
+# calendar days in local time, as on the job pages and in the scheduler. With APPLY_BATCHING on, applies from all
+# request threads are funnelled to one writer thread that commits them in
+# groups, so a drive opening costs one SQLite write lock per group rather
+# than per student.
+
+MESSAGES = {
+    "applied": "Application submitted.",
+    "duplicate": "Already applied.",
+    "missing": "Job not found.",
+    "closed": "This job is no longer accepting applications.",
+    "expired": "The deadline for this job has passed.",
+    "inactive": "Your account is not active.",
+    "ineligible": "You do not meet the eligibility criteria for this job.",
+    "key_reused": "That request key was already used for another job.",
+}
+
+
+class JobRules:
+
+    def __init__(self, company_id, min_cgpa, departments):
+        self.company_id = company_id
+        self.min_cgpa = min_cgpa
+        self.departments = departments
+
+
+def _known_departments():
+    return cache.get_or_set(
+        "apply:departments",
+        lambda: {
+            (department or "").strip().upper()
+            for (department,) in db.session.execute(select(Student.department).distinct())
+        },
+        tags=("students",)
+    )
+
+
+def job_rules(connection, job_id):
+    def load():
+        row = connection.execute(
+            select(JobPosition.company_id, JobPosition.eligibility).where(JobPosition.id == job_id)
+        ).first()
+        if row is None:
+            return None
+        criteria = parse_eligibility(row.eligibility, _known_departments())
+        return JobRules(row.company_id, criteria.min_cgpa, sorted(criteria.departments))
+
+    return cache.get_or_set(f"apply:rules:{job_id}", load, tags=("jobs",))
+
+
+def _insert_statement(student_id, job_id, rules, now, today):
+    conditions = [
+        JobPosition.id == job_id,
+        JobPosition.status == "Approved",
+        or_(JobPosition.deadline.is_(None), JobPosition.deadline >= today),
+        Student.is_active.is_(True),
+    ]
+    if rules.min_cgpa is not None:
+        conditions.append(Student.cgpa >= rules.min_cgpa)
+    if rules.departments:
+        conditions.append(func.upper(func.trim(Student.department)).in_(rules.departments))
+
+    rows = select(
+        literal(student_id), JobPosition.id, literal("Applied"),
+        literal(now, DateTime), literal(now, DateTime)
+    ).select_from(JobPosition).join(
+        Student, Student.id == student_id
+    ).where(*conditions)
+
+    return sqlite_insert(Application).from_select(
+        ["student_id", "job_position_id", "status", "applied_on", "updated_on"], rows
+    ).on_conflict_do_nothing(index_elements=["student_id", "job_position_id"])
+
+
+def _diagnose(connection, student_id, job_id, today):
+    applied = connection.execute(
+        select(Application.id).where(
+            Application.student_id == student_id, Application.job_position_id == job_id
+        )
+    ).first()
+    if applied:
+        return "duplicate"
+
+    job = connection.execute(
+        select(JobPosition.status, JobPosition.deadline).where(JobPosition.id == job_id)
+    ).first()
+    if job is None:
+        return "missing"
+    if job.status != "Approved":
+        return "closed"
+    if job.deadline is not None and job.deadline < today:
+        return "expired"
+
+    active = connection.execute(
+        select(Student.is_active).where(Student.id == student_id)
+    ).scalar()
+    return "ineligible" if active else "inactive"
+
+
+def _apply(connection, student_id, job_id, key, now, today, deltas):
+    scoped_key = f"{student_id}:{key}" if key else None
+
+    if scoped_key:
+        claimed = connection.execute(
+            sqlite_insert(IdempotencyKey).values(
+                key=scoped_key, student_id=student_id, job_position_id=job_id, created_on=now
+            ).on_conflict_do_nothing(index_elements=["key"])
+        ).rowcount
+        if not claimed:
+            earlier = connection.execute(
+                select(IdempotencyKey.job_position_id, IdempotencyKey.outcome).where(
+                    IdempotencyKey.key == scoped_key
+                )
+            ).first()
+            if earlier.job_position_id != job_id:
+                return "key_reused"
+            return earlier.outcome
+
+    rules = job_rules(connection, job_id)
+    if rules is None:
+        outcome = "missing"
+    elif connection.execute(_insert_statement(student_id, job_id, rules, now, today)).rowcount:
+        outcome = "applied"
+        # Core inserts skip the flush hook that keeps the counters.
+        for counter in ("applications", "applications:Applied", f"job:{job_id}:applications",
+                        f"job:{job_id}:Applied", f"company:{rules.company_id}:applications"):
+            deltas[counter] += 1
+    else:
+        outcome = _diagnose(connection, student_id, job_id, today)
+
+    if scoped_key:
+        connection.execute(
+            IdempotencyKey.__table__.update().where(
+                IdempotencyKey.__table__.c.key == scoped_key
+            ).values(outcome=outcome)
+        )
+    return outcome
+
+
+def apply_url(job_id):
+    # Keys are scoped to the student, so a page cached for every student
+    # can share its links.
+    return url_for("apply_job", job_id=job_id, key=secrets.token_urlsafe(12))
+
+
+def apply_now(student_id, job_id, key=None):
+    deltas = Counter()
+    connection = db.session.connection()
+    outcome = _apply(connection, student_id, job_id, key, datetime.utcnow(), date.today(), deltas)
+    if deltas:
+        apply_deltas(connection, deltas)
+    db.session.commit()
+    return outcome
+
+
+# ---------------- GROUP COMMIT ----------------
+
+class ApplyBatcher:
+
+    def __init__(self, app, tenant=None):
+        self.app = app
+        self.tenant = tenant
+        self.max_batch = app.config.get("APPLY_BATCH_SIZE", 100)
+        self.max_wait = app.config.get("APPLY_BATCH_WAIT", 0.005)
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="apply-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, student_id, job_id, key=None, timeout=None):
+        future = Future()
+        self.requests.put(((student_id, job_id, key), future))
+        return future.result(timeout or self.app.config.get("APPLY_TIMEOUT", 10))
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit(self, batch):
+        retries = self.app.config.get("DB_LOCK_RETRIES", 5)
+        delay = self.app.config.get("DB_LOCK_RETRY_DELAY", 0.05)
+
+        for attempt in range(retries + 1):
+            try:
+                deltas = Counter()
+                now, today = datetime.utcnow(), date.today()
+                with db.engine.begin() as connection:
+                    outcomes = [_apply(connection, *args, now, today, deltas) for args, _ in batch]
+                    if deltas:
+                        apply_deltas(connection, deltas)
+                return outcomes
+            except OperationalError as error:
+                if attempt == retries or not is_lock_error(error):
+                    raise
+                time.sleep(delay * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    def _resolve(self, batch):
+        try:
+            outcomes = self._commit(batch)
+        except Exception as error:
+            if len(batch) == 1:
+                self.app.logger.exception("Apply failed")
+                batch[0][1].set_exception(error)
+                return
+            # Don't let one bad request sink the group; go one by one.
+            for item in batch:
+                self._resolve([item])
+            return
+
+        for (_, future), outcome in zip(batch, outcomes):
+            future.set_result(outcome)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            with tenant_context(self.app, self.tenant):
+                try:
+                    self._resolve(batch)
+                finally:
+                    db.session.remove()
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def submit_application(student_id, job_id, key=None):
+    app = current_app._get_current_object()
+    if not app.config.get("APPLY_BATCHING"):
+        return apply_now(student_id, job_id, key)
+
+    # One writer per tenant database.
+    tenant = current_tenant()
+    with _batchers_lock:
+        batcher = _batchers.get((app, tenant))
+        if batcher is None:
+            batcher = _batchers[(app, tenant)] = ApplyBatcher(app, tenant)
+    return batcher.submit(student_id, job_id, key)
+
+
+@task("purge-idempotency-keys")
+def purge_idempotency_keys(now):
+    ttl = current_app.config.get("IDEMPOTENCY_KEY_TTL", 24 * 3600)
+    result = db.session.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.created_on < datetime.utcnow() - timedelta(seconds=ttl)
+        )
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def init_app(app):
+    app.jinja_env.globals["apply_url"] = apply_url
@@ -0,0 +1,261 @@
+import click
+from collections import Counter
+from datetime import date, datetime, timedelta
+from flask import Blueprint, render_template, session, current_app, abort
+from sqlalchemy import DateTime, select, insert, delete, func, literal, or_
+from db import db
+from cache import cache
+from decorators import login_required
+from models import (Company, Student, JobPosition, Application, Placement, StatCounter, AnalyticsJob,
+                    ArchivedJobPosition, ArchivedApplication, ArchivedPlacement,
+                    InterviewPanel, InterviewSlot, InterviewBooking)
+from pagination import paginate
+from scheduler import task
+from stats import apply_deltas
+
+history_bp = Blueprint("history", __name__, url_prefix="/history")
+
+# Season archival. Postings that are closed, rejected or past their
+# deadline, and whose deadline (or posting date) is before the cutoff,
+# move with their applications and placements into the archived_* tables,
+# so the live tables and every scan over them only hold the current
+# season. Each batch of jobs is copied and deleted in one transaction and
+# the dashboard counters follow along. Archived rows stay readable through
+# the read-only /history pages.
+
+FINISHED_STATUSES = ("Closed", "Rejected")
+
+ARCHIVES = [
+    (JobPosition, ArchivedJobPosition),
+    (Application, ArchivedApplication),
+    (Placement, ArchivedPlacement),
+]
+
+
+def default_cutoff():
+    days = current_app.config.get("ARCHIVE_AFTER_DAYS", 365)
+    return date.today() - timedelta(days=days)
+
+
+def _archivable(cutoff, batch_size):
+    # The newest row of each table always stays, so SQLite (which hands
+    # out max(id) + 1) never reuses an id that is already in the archive.
+    newest_job = select(func.max(JobPosition.id)).scalar_subquery()
+    newest_application = select(Application.job_position_id).where(
+        Application.id == select(func.max(Application.id)).scalar_subquery()
+    ).scalar_subquery()
+    newest_placement = select(Application.job_position_id).join(
+        Placement, Placement.application_id == Application.id
+    ).where(
+        Placement.id == select(func.max(Placement.id)).scalar_subquery()
+    ).scalar_subquery()
+
+    return select(JobPosition.id).where(
+        or_(JobPosition.status.in_(FINISHED_STATUSES), JobPosition.deadline < date.today()),
+        func.coalesce(JobPosition.deadline, func.date(JobPosition.posted_date)) < cutoff,
+        JobPosition.id != newest_job,
+        JobPosition.id.is_distinct_from(newest_application),
+        JobPosition.id.is_distinct_from(newest_placement),
+    ).order_by(JobPosition.id).limit(batch_size)
+
+
+def _counter_deltas(connection, job_ids):
+    rows = connection.execute(
+        select(
+            JobPosition.id, JobPosition.company_id, Application.status, func.count(Application.id)
+        ).outerjoin(
+            Application, Application.job_position_id == JobPosition.id
+        ).where(
+            JobPosition.id.in_(job_ids)
+        ).group_by(JobPosition.id, JobPosition.company_id, Application.status)
+    ).all()
+
+    deltas = Counter()
+    for job_id, company_id in {(job_id, company_id) for job_id, company_id, _, _ in rows}:
+        deltas["jobs"] -= 1
+        deltas[f"company:{company_id}:jobs"] -= 1
+
+    for job_id, company_id, status, count in rows:
+        if not count:
+            continue
+        deltas["applications"] -= count
+        deltas[f"applications:{status}"] -= count
+        deltas[f"company:{company_id}:applications"] -= count
+        deltas[f"job:{job_id}:applications"] -= count
+        deltas[f"job:{job_id}:{status}"] -= count
+
+    return deltas
+
+
+def _copy(connection, live, archived, where, now):
+    columns = [column.name for column in live.__table__.columns]
+    connection.execute(
+        insert(archived).from_select(
+            columns + ["archived_on"],
+            select(*live.__table__.columns, literal(now, DateTime)).where(where)
+        )
+    )
+
+
+def archive_batch(connection, cutoff, batch_size):
+    job_ids = list(connection.execute(_archivable(cutoff, batch_size)).scalars())
+    if not job_ids:
+        return 0
+
+    now = datetime.utcnow()
+    applications = select(Application.id).where(
+        Application.job_position_id.in_(job_ids)
+    ).scalar_subquery()
+
+    scopes = {
+        JobPosition: JobPosition.id.in_(job_ids),
+        Application: Application.job_position_id.in_(job_ids),
+        Placement: Placement.application_id.in_(applications),
+    }
+
+    deltas = _counter_deltas(connection, job_ids)
+
+    for live, archived in ARCHIVES:
+        _copy(connection, live, archived, scopes[live], now)
+
+    # Interview schedules are not kept past the season.
+    panels = select(InterviewPanel.id).where(
+        InterviewPanel.job_position_id.in_(job_ids)
+    ).scalar_subquery()
+    connection.execute(delete(InterviewBooking).where(InterviewBooking.application_id.in_(applications)))
+    connection.execute(delete(InterviewSlot).where(InterviewSlot.panel_id.in_(panels)))
+    connection.execute(delete(InterviewPanel).where(InterviewPanel.job_position_id.in_(job_ids)))
+
+    for live, _ in reversed(ARCHIVES):
+        connection.execute(delete(live).where(scopes[live]))
+
+    apply_deltas(connection, deltas)
+    # Jobs without applications have no counter deltas to clear them.
+    connection.execute(delete(AnalyticsJob).where(AnalyticsJob.job_position_id.in_(job_ids)))
+    connection.execute(
+        delete(StatCounter).where(
+            StatCounter.key.in_([key for key in deltas if key.startswith("job:")]),
+            StatCounter.value == 0
+        )
+    )
+    return len(job_ids)
+
+
+def archive_seasons(cutoff=None, batch_size=None, progress=None):
+    cutoff = cutoff or default_cutoff()
+    batch_size = batch_size or current_app.config.get("ARCHIVE_BATCH_SIZE", 100)
+
+    archived = 0
+    while True:
+        # One short write transaction per batch.
+        with db.engine.begin() as connection:
+            count = archive_batch(connection, cutoff, batch_size)
+        archived += count
+        if progress and count:
+            progress(archived)
+        if count < batch_size:
+            break
+
+    if archived:
+        cache.invalidate("jobs", "analytics")
+    return archived
+
+
+@task("archive-seasons")
+def archive_seasons_task(now):
+    return archive_seasons()
+
+
+# ---------------- HISTORY ----------------
+
+@history_bp.route("/jobs")
+@login_required("admin")
+def archived_jobs():
+
+    applicants = select(func.count()).where(
+        ArchivedApplication.job_position_id == ArchivedJobPosition.id
+    ).correlate(ArchivedJobPosition).scalar_subquery()
+
+    jobs = paginate(
+        db.session.query(
+            ArchivedJobPosition.id,
+            ArchivedJobPosition.title,
+            ArchivedJobPosition.deadline,
+            ArchivedJobPosition.status,
+            ArchivedJobPosition.archived_on,
+            Company.name.label("company_name"),
+            applicants.label("applicants"),
+        ).outerjoin(Company, Company.id == ArchivedJobPosition.company_id),
+        ArchivedJobPosition.id,
+        descending=True
+    )
+
+    return render_template("admin/archived_jobs.html", jobs=jobs)
+
+
+@history_bp.route("/jobs/<int:job_id>")
+@login_required("admin")
+def archived_job(job_id):
+
+    job = db.session.get(ArchivedJobPosition, job_id)
+    if job is None:
+        abort(404)
+
+    company = db.session.get(Company, job.company_id)
+
+    applications = db.session.query(
+        ArchivedApplication.id,
+        ArchivedApplication.student_id,
+        ArchivedApplication.status,
+        ArchivedApplication.applied_on,
+        Student.name.label("student_name"),
+        Student.email.label("student_email"),
+        ArchivedPlacement.placed_on,
+    ).outerjoin(
+        Student, Student.id == ArchivedApplication.student_id
+    ).outerjoin(
+        ArchivedPlacement, ArchivedPlacement.application_id == ArchivedApplication.id
+    ).filter(
+        ArchivedApplication.job_position_id == job_id
+    ).order_by(ArchivedApplication.id).all()
+
+    return render_template(
+        "admin/archived_job.html",
+        job=job,
+        company=company,
+        applications=applications
+    )
+
+
+@history_bp.route("/applications")
+@login_required("student")
+def my_archived_applications():
+
+    applications = db.session.query(
+        ArchivedApplication.status,
+        ArchivedApplication.applied_on,
+        ArchivedJobPosition.title,
+        Company.name.label("company_name"),
+    ).join(
+        ArchivedJobPosition, ArchivedJobPosition.id == ArchivedApplication.job_position_id
+    ).outerjoin(
+        Company, Company.id == ArchivedJobPosition.company_id
+    ).filter(
+        ArchivedApplication.student_id == session.get("user_id")
+    ).order_by(ArchivedApplication.applied_on.desc()).all()
+
+    return render_template("student/archived_applications.html", applications=applications)
+
+
+def init_app(app):
+
+    @app.cli.command("archive-seasons")
+    @click.option("--before", type=click.DateTime(formats=["%Y-%m-%d"]),
+                  help="Archive finished jobs whose deadline is before this date.")
+    @click.option("--batch-size", default=None, type=int, help="Jobs per transaction.")
+    def archive_seasons_command(before, batch_size):
+        cutoff = before.date() if before else default_cutoff()
+        archived = archive_seasons(
+            cutoff, batch_size, progress=lambda count: click.echo(f"{count} jobs archived")
+        )
+        click.echo(f"Done: {archived} jobs before {cutoff} archived.")
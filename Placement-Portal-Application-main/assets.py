@@ -0,0 +1,159 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import click
+from flask import Blueprint, current_app, request, url_for, abort, send_from_directory
+
+assets_bp = Blueprint("assets", __name__)
+
+# Static assets. `flask collect-static` copies the files under static/ to
+# the build directory (instance/assets) under content-hashed names, such
+# as css/style.3f2a9c1e0b7d.css, writes .gz and, when the brotli package is
+# installed, .br variants of text files beside them, and records the
+# mapping in manifest.json. static_url("css/style.css") in a template gives
+# the hashed URL, which is served with a year-long immutable Cache-Control
+# and the smallest variant the browser accepts, already compressed on
+# disk. A changed file gets a new name, so browsers never revalidate.
+# Until collect-static has run, static_url falls back to Flask's static
+# route. Uploads are left out: resumes.py serves them with access checks.
+
+MANIFEST = "manifest.json"
+
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map", ".xml"}
+
+# Tried in this order; smallest first.
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def build_dir(app):
+    return app.config.get("STATIC_BUILD_DIR") or os.path.join(app.instance_path, "assets")
+
+
+def _fingerprint(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+def _compress(target, data):
+    written = []
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    brotli = _brotli()
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+
+    for suffix, compressed in variants:
+        # Not worth a variant unless it saves something.
+        if len(compressed) < len(data):
+            _write(target + suffix, compressed)
+            written.append(suffix)
+    return written
+
+
+def collect(app):
+    source = app.static_folder
+    target = build_dir(app)
+    exclude = set(app.config.get("STATIC_COLLECT_EXCLUDE", ("uploads",)))
+
+    manifest = {}
+    for root, directories, files in os.walk(source):
+        relative_root = os.path.relpath(root, source)
+        if relative_root == ".":
+            directories[:] = [name for name in directories if name not in exclude]
+        directories.sort()
+
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            logical = os.path.normpath(os.path.join(relative_root, name)).replace(os.sep, "/")
+            stem, extension = os.path.splitext(logical)
+            hashed = f"{stem}.{_fingerprint(path)}{extension}"
+
+            destination = os.path.join(target, hashed)
+            if not os.path.exists(destination):
+                # Older hashed files stay, for pages still cached with old links.
+                with open(path, "rb") as f:
+                    data = f.read()
+                _write(destination, data)
+                if extension.lower() in COMPRESSIBLE:
+                    _compress(destination, data)
+
+            manifest[logical] = hashed
+
+    _write(os.path.join(target, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    app.extensions["assets"] = _load(app)
+    return manifest
+
+
+def _load(app):
+    try:
+        with open(os.path.join(build_dir(app), MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+    return {"manifest": manifest, "files": set(manifest.values())}
+
+
+def static_url(filename):
+    hashed = current_app.extensions["assets"]["manifest"].get(filename)
+    if hashed is None:
+        return url_for("static", filename=filename)
+    return url_for("assets.asset", filename=hashed)
+
+
+@assets_bp.route("/assets/<path:filename>")
+def asset(filename):
+
+    if filename not in current_app.extensions["assets"]["files"]:
+        abort(404)
+
+    directory = build_dir(current_app)
+    accepted = request.accept_encodings
+
+    encoding, suffix = None, ""
+    for name, variant in ENCODINGS:
+        if accepted[name] and os.path.exists(os.path.join(directory, filename + variant)):
+            encoding, suffix = name, variant
+            break
+
+    response = send_from_directory(
+        directory, filename + suffix, conditional=True,
+        mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    )
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = (
+        f"public, max-age={current_app.config.get('ASSET_MAX_AGE', 31536000)}, immutable"
+    )
+    return response
+
+
+def init_app(app):
+    app.extensions["assets"] = _load(app)
+    app.jinja_env.globals["static_url"] = static_url
+
+    @app.cli.command("collect-static")
+    def collect_static_command():
+        manifest = collect(app)
+        encodings = "gzip and brotli" if _brotli() else "gzip (install brotli for .br)"
+        click.echo(f"{len(manifest)} assets written to {build_dir(app)} with {encodings} variants.")
@@ -1,11 +1,16 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, Response, render_template, request, redirect, url_for, flash, session, current_app
 from db import db
 from models import Student, Company, Admin
+from validators import validate_student
+from resumes import store_resume, resume_upload, ResumeError
+from cache import cache
+from security import hash_password, verify_password, needs_rehash
+from tenants import current_tenant
 
 auth_bp = Blueprint("auth", __name__)
 
 @auth_bp.route("/register/student", methods=["GET", "POST"])
+@resume_upload
 def student_register():
     if request.method == "POST":
         email = request.form["email"]
@@ -14,28 +19,14 @@ def student_register():
         cgpa_str = request.form.get("cgpa")
 
         # Validation
-        import re
-        if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
-            flash("Invalid email format.")
-            return redirect(url_for("auth.student_register"))
-        
-        if len(password) < 6:
-            flash("Password must be at least 6 characters.")
-            return redirect(url_for("auth.student_register"))
-
-        if not department:
-            flash("Department is required.")
+        cleaned, error = validate_student(
+            request.form["name"], email, password, department, cgpa_str
+        )
+        if error:
+            flash(error)
             return redirect(url_for("auth.student_register"))
 
-        cgpa = None
-        if cgpa_str:
-            try:
-                cgpa = float(cgpa_str)
-                if not (0 <= cgpa <= 10):
-                     raise ValueError
-            except:
-                flash("Invalid CGPA. Must be between 0 and 10.")
-                return redirect(url_for("auth.student_register"))
+        cgpa = cleaned["cgpa"]
 
         existing = Student.query.filter_by(email=email).first()
         if existing:
@@ -46,18 +37,16 @@ def student_register():
         if 'resume' in request.files:
             file = request.files['resume']
             if file.filename != '':
-                import os
-                from flask import current_app
-                from werkzeug.utils import secure_filename
-                
-                filename = secure_filename(file.filename)
-                file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
-                resume_filename = filename
+                try:
+                    resume_filename = store_resume(file)
+                except ResumeError as error:
+                    flash(str(error))
+                    return redirect(url_for("auth.student_register"))
 
         student = Student(
             name=request.form["name"],
             email=email,
-            password=generate_password_hash(password),
+            password=hash_password(password),
             department=department,
             cgpa=cgpa,
             resume=resume_filename
@@ -65,6 +54,7 @@ def student_register():
 
         db.session.add(student)
         db.session.commit()
+        cache.invalidate("students")
 
         flash("Registration successful. Please login.")
         return redirect(url_for("auth.login", role="student"))
@@ -72,6 +62,30 @@ def student_register():
     return render_template("student_register.html")
 
 
+def _check_password(account, password):
+    if not verify_password(account.password, password):
+        return False
+
+    if needs_rehash(account.password):
+        # Hashed with an older cost; store it at the current one.
+        account.password = hash_password(password)
+        db.session.commit()
+    return True
+
+
+def _too_many_attempts(wait):
+    return Response(
+        "Too many login attempts, please try again later.\n",
+        status=429, mimetype="text/plain",
+        headers={"Retry-After": str(int(wait) + 1)}
+    )
+
+
+def _failed(throttle, address, account_key):
+    throttle["account"].hit(account_key)
+    throttle["address"].hit(address)
+
+
 @auth_bp.route("/login", methods=["GET", "POST"])
 def login():
     selected_role = request.args.get("role", "student")
@@ -81,21 +95,35 @@ def login():
         password = request.form["password"]
         selected_role = role
 
+        throttle = current_app.extensions["login_throttle"]
+        address = request.remote_addr or "-"
+        account_key = f"{current_tenant()}:{role}:{request.form['identifier'].strip().lower()}"
+
+        # Only failures count: a campus behind one NAT address logging in
+        # at once when a drive opens must not be turned away.
+        wait = throttle["account"].retry_after(account_key) or throttle["address"].retry_after(address)
+        if wait:
+            return _too_many_attempts(wait)
+
         if role == "student":
             student = Student.query.filter_by(email=request.form["identifier"]).first()
-            if student and check_password_hash(student.password, password):
+            if student and _check_password(student, password):
                 if not student.is_active:
                     flash("Account deactivated by admin.")
                     return redirect(url_for("auth.login", role="student"))
 
+                throttle["account"].reset(account_key)
                 session["user_id"] = student.id
                 session["role"] = "student"
+                session["tenant"] = current_tenant()
                 return redirect(url_for("student_dashboard"))
+            _failed(throttle, address, account_key)
             flash("Invalid credentials")
 
         elif role == "company":
             company = Company.query.filter_by(email=request.form["identifier"]).first()
             if not company:
+                _failed(throttle, address, account_key)
                 flash("Invalid credentials")
                 return redirect(url_for("auth.login", role="company"))
 
@@ -103,19 +131,25 @@ def login():
                 flash("Company not approved by admin yet")
                 return redirect(url_for("auth.login", role="company"))
 
-            if check_password_hash(company.password, password):
+            if _check_password(company, password):
+                throttle["account"].reset(account_key)
                 session["user_id"] = company.id
                 session["role"] = "company"
+                session["tenant"] = current_tenant()
                 return redirect(url_for("company_dashboard"))
 
+            _failed(throttle, address, account_key)
             flash("Invalid credentials")
 
         elif role == "admin":
             admin = Admin.query.filter_by(username=request.form["identifier"]).first()
-            if admin and check_password_hash(admin.password, password):
+            if admin and _check_password(admin, password):
+                throttle["account"].reset(account_key)
                 session["user_id"] = admin.id
                 session["role"] = "admin"
+                session["tenant"] = current_tenant()
                 return redirect(url_for("admin_dashboard"))
+            _failed(throttle, address, account_key)
             flash("Invalid admin credentials")
 
         else:
@@ -162,7 +196,7 @@ def company_register():
         company = Company(
             name=request.form["name"],
             email=email,
-            password=generate_password_hash(password),
+            password=hash_password(password),
             website=website,
             hr_contact=hr_contact,
             is_approved=False
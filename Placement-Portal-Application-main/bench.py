@@ -0,0 +1,328 @@
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import time
+import click
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+from flask import current_app, render_template
+from cache import MemoryBackend
+from sqlalchemy import select
+from db import db
+from models import Admin, Company, Student, JobPosition
+from seed import SEED_PASSWORD, SKILLS
+
+# Benchmark harness. Each scenario drives one route through the Flask test
+# client; requests are spread over threads (one client each) or over
+# processes (each with its own app), and the run reports throughput and
+# p50/p95/p99 latency. Results can be saved as a baseline JSON file and
+# later runs compared against it. Seed data first with `flask seed-data`.
+
+
+class BenchData:
+
+    def __init__(self, admin_id, company_ids, students, job_ids):
+        self.admin_id = admin_id
+        self.company_ids = company_ids
+        self.students = students
+        self.job_ids = job_ids
+
+
+def load_data():
+    return BenchData(
+        admin_id=db.session.execute(select(Admin.id)).scalar(),
+        company_ids=list(db.session.execute(
+            select(Company.id).where(Company.is_approved.is_(True))
+        ).scalars()),
+        students=db.session.execute(select(Student.id, Student.email)).all(),
+        job_ids=list(db.session.execute(
+            select(JobPosition.id).where(JobPosition.status == "Approved")
+        ).scalars()),
+    )
+
+
+def _login(client, role, user_id):
+    with client.session_transaction() as session:
+        session.clear()
+        session["role"] = role
+        session["user_id"] = user_id
+
+
+# ---------------- SCENARIOS ----------------
+#
+# Each returns (response, expected status codes).
+
+def scenario_login(client, data, rng):
+    _, email = rng.choice(data.students)
+    response = client.post("/login", data={
+        "role": "student", "identifier": email, "password": SEED_PASSWORD
+    })
+    return response, (302,)
+
+
+def scenario_student_jobs_search(client, data, rng):
+    _login(client, "student", rng.choice(data.students)[0])
+    return client.get(f"/student/jobs?search={rng.choice(SKILLS).split()[0]}"), (200,)
+
+
+def scenario_company_applications(client, data, rng):
+    _login(client, "company", rng.choice(data.company_ids))
+    return client.get("/company/applications"), (200,)
+
+
+def scenario_admin_dashboard(client, data, rng):
+    _login(client, "admin", data.admin_id)
+    return client.get("/admin/dashboard"), (200,)
+
+
+def scenario_apply_job(client, data, rng):
+    _login(client, "student", rng.choice(data.students)[0])
+    return client.get(f"/student/apply/{rng.choice(data.job_ids)}"), (302,)
+
+
+SCENARIOS = {
+    "login": scenario_login,
+    "student_jobs_search": scenario_student_jobs_search,
+    "company_applications": scenario_company_applications,
+    "admin_dashboard": scenario_admin_dashboard,
+    "apply_job": scenario_apply_job,
+}
+
+
+# ---------------- RUNNER ----------------
+
+def _drive(app, data, name, count, seed):
+    scenario = SCENARIOS[name]
+    client = app.test_client()
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+
+    for _ in range(count):
+        start = time.perf_counter()
+        response, expected = scenario(client, data, rng)
+        response.get_data()
+        latencies.append(time.perf_counter() - start)
+        if response.status_code not in expected:
+            errors += 1
+        response.close()
+
+    return latencies, errors
+
+
+_process_state = {}
+
+
+def _process_drive(args):
+    # Runs in a worker process, which builds its own app once.
+    config_name, name, count, seed = args
+    if not _process_state:
+        from app import create_app
+        app = create_app(config_name)
+        with app.app_context():
+            _process_state.update(app=app, data=load_data())
+    return _drive(_process_state["app"], _process_state["data"], name, count, seed)
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+    }
+
+
+def run_scenario(app, name, requests=200, concurrency=4, processes=False, config_name=None):
+    shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    shares = [share for share in shares if share]
+    start = time.perf_counter()
+
+    if processes:
+        with ProcessPoolExecutor(max_workers=len(shares)) as executor:
+            parts = list(executor.map(
+                _process_drive,
+                [(config_name, name, share, seed) for seed, share in enumerate(shares)]
+            ))
+    else:
+        with app.app_context():
+            data = load_data()
+        with ThreadPoolExecutor(max_workers=len(shares)) as executor:
+            parts = list(executor.map(
+                lambda job: _drive(app, data, name, *job),
+                [(share, seed) for seed, share in enumerate(shares)]
+            ))
+
+    elapsed = time.perf_counter() - start
+    latencies = [latency for part, _ in parts for latency in part]
+    errors = sum(part_errors for _, part_errors in parts)
+    return summarize(latencies, errors, elapsed)
+
+
+# ---------------- RENDERING ----------------
+#
+# Renders the company applications page for one job with `rows` in-memory
+# applicants, so only template work is measured.
+
+RENDER_TEMPLATE = "company/view_applications.html"
+
+
+def _render_fixture(rows):
+    now = datetime.utcnow()
+    applications = [
+        SimpleNamespace(
+            id=i, status="Applied", applied_on=now, updated_on=now,
+            student=SimpleNamespace(
+                id=i, name=f"Student {i}", email=f"student{i}@example.com",
+                cgpa=round(6 + (i % 40) / 10, 1), updated_on=now
+            )
+        )
+        for i in range(1, rows + 1)
+    ]
+    return [SimpleNamespace(id=1, title="Benchmark Role", deadline=now.date(), applications=applications)]
+
+
+def _median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 2)
+
+
+def render_benchmark(app, rows=5000, repeat=5):
+    env = app.jinja_env
+    jobs = _render_fixture(rows)
+    results = {}
+
+    def load(bytecode_cache):
+        # As a new worker would: nothing compiled in memory yet.
+        return lambda: env.overlay(cache_size=0, bytecode_cache=bytecode_cache).get_template(RENDER_TEMPLATE)
+
+    results["load_compile"] = _median_ms(load(None), repeat)
+    if env.bytecode_cache is not None:
+        results["load_bytecode"] = _median_ms(load(env.bytecode_cache), repeat)
+
+    def render():
+        render_template(RENDER_TEMPLATE, jobs=jobs)
+
+    def render_cold():
+        env.fragment_cache = MemoryBackend(rows * 2, 0)
+        render()
+
+    saved = getattr(env, "fragment_cache", None)
+    with app.test_request_context("/company/applications"):
+        try:
+            env.fragment_cache = None
+            results["render_uncached"] = _median_ms(render, repeat)
+            results["render_cold"] = _median_ms(render_cold, repeat)
+            results["render_warm"] = _median_ms(render, repeat)
+        finally:
+            env.fragment_cache = saved
+
+    return results
+
+
+# ---------------- BASELINES ----------------
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_baseline(path, results, settings):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, "w") as f:
+        json.dump({
+            "commit": _commit(),
+            "created": datetime.utcnow().isoformat(timespec="seconds"),
+            "settings": settings,
+            "results": results,
+        }, f, indent=2)
+
+
+def compare(results, baseline, tolerance):
+    # A scenario regresses when its p95 grows, or its throughput drops,
+    # by more than the tolerance.
+    regressions = []
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        if before["p95_ms"] and result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms")
+        if before["throughput"] and result["throughput"] < before["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput']}/s -> {result['throughput']}/s")
+    return regressions
+
+
+def init_app(app):
+
+    @app.cli.command("bench")
+    @click.option("--scenario", "scenarios", multiple=True, type=click.Choice(sorted(SCENARIOS)),
+                  help="Scenario to run (repeatable); all by default.")
+    @click.option("--requests", default=200, help="Requests per scenario.")
+    @click.option("--concurrency", default=4, help="Threads (or processes) per scenario.")
+    @click.option("--processes", is_flag=True, help="Use worker processes instead of threads.")
+    @click.option("--save", type=click.Path(dir_okay=False), help="Write results as a baseline JSON file.")
+    @click.option("--compare", "baseline_path", type=click.Path(exists=True, dir_okay=False),
+                  help="Baseline JSON file to compare against.")
+    @click.option("--tolerance", default=0.2, help="Allowed slowdown before a regression is reported.")
+    def bench_command(scenarios, requests, concurrency, processes, save, baseline_path, tolerance):
+        app = current_app._get_current_object()
+        results = {}
+        config_name = os.environ.get("PLACEMENT_ENV")
+
+        for name in scenarios or sorted(SCENARIOS):
+            result = results[name] = run_scenario(
+                app, name, requests, concurrency, processes, config_name
+            )
+            click.echo(
+                f"{name:22} {result['throughput']:8.1f} req/s  "
+                f"p50 {result['p50_ms']:7.1f}ms  p95 {result['p95_ms']:7.1f}ms  "
+                f"p99 {result['p99_ms']:7.1f}ms  errors {result['errors']}"
+            )
+
+        if save:
+            save_baseline(save, results, {
+                "requests": requests, "concurrency": concurrency, "processes": processes
+            })
+            click.echo(f"Baseline written to {save}")
+
+        if baseline_path:
+            with open(baseline_path) as f:
+                regressions = compare(results, json.load(f), tolerance)
+            for regression in regressions:
+                click.echo(f"REGRESSION {regression}")
+            if regressions:
+                raise SystemExit(1)
+
+    @app.cli.command("bench-render")
+    @click.option("--rows", default=5000, help="Applicants on the rendered page.")
+    @click.option("--repeat", default=5, help="Renders per measurement; the median is reported.")
+    def bench_render_command(rows, repeat):
+        results = render_benchmark(current_app._get_current_object(), rows, repeat)
+        for name, value in results.items():
+            click.echo(f"{name:16} {value:9.2f}ms")
@@ -0,0 +1,203 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from flask import request, session, make_response
+
+# Query-result and page cache. Entries are stored under a key together
+# with the versions of the tags they depend on; invalidating a tag gives
+# it a fresh version, so every entry built from the old one is simply
+# never matched again.
+
+
+class NullBackend:
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, timeout=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+
+class MemoryBackend:
+
+    def __init__(self, threshold=500, default_timeout=60):
+        self.threshold = threshold
+        self.default_timeout = default_timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires, value = entry
+            if expires is not None and expires < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        expires = time.monotonic() + timeout if timeout else None
+
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.threshold:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class FileSystemBackend:
+    # Shared between worker processes on the same host.
+
+    def __init__(self, directory, default_timeout=60):
+        self.directory = directory
+        self.default_timeout = default_timeout
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(
+            self.directory, hashlib.sha1(key.encode()).hexdigest()
+        )
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                expires, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+        if expires is not None and expires < time.time():
+            self.delete(key)
+            return None
+
+        return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.default_timeout if timeout is None else timeout
+        expires = time.time() + timeout if timeout else None
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((expires, value), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+class Cache:
+
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        # Optional callable giving a prefix for every key (the tenant).
+        self.namespace = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        cache_type = app.config.get("CACHE_TYPE", "memory")
+        timeout = app.config.get("CACHE_DEFAULT_TIMEOUT", 60)
+
+        if cache_type == "memory":
+            self.backend = MemoryBackend(
+                app.config.get("CACHE_THRESHOLD", 500), timeout
+            )
+        elif cache_type == "filesystem":
+            self.backend = FileSystemBackend(
+                app.config.get("CACHE_DIR") or os.path.join(app.instance_path, "cache"),
+                timeout
+            )
+        else:
+            self.backend = NullBackend()
+
+    def _key(self, key):
+        prefix = self.namespace() if self.namespace else None
+        return f"{prefix}:{key}" if prefix else key
+
+    def _tag_versions(self, tags):
+        versions = []
+        for tag in tags:
+            version = self.backend.get(self._key(f"tag:{tag}"))
+            if version is None:
+                # A lost tag version must never match old entries.
+                version = uuid.uuid4().hex
+                self.backend.set(self._key(f"tag:{tag}"), version, 0)
+            versions.append(version)
+        return versions
+
+    def get(self, key, tags=()):
+        entry = self.backend.get(self._key(key))
+        if entry is None:
+            return None
+
+        versions, value = entry
+        if versions != self._tag_versions(tags):
+            return None
+
+        return value
+
+    def set(self, key, value, tags=(), timeout=None):
+        self.backend.set(self._key(key), (self._tag_versions(tags), value), timeout)
+
+    def get_or_set(self, key, producer, tags=(), timeout=None):
+        value = self.get(key, tags)
+        if value is None:
+            value = producer()
+            self.set(key, value, tags, timeout)
+        return value
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.set(self._key(f"tag:{tag}"), uuid.uuid4().hex, 0)
+
+    def cached_page(self, *tags, timeout=None):
+        # Caches the rendered page per role. Pages carrying flashed
+        # messages are user specific and are always rendered fresh.
+        def decorator(fn):
+            @wraps(fn)
+            def view(*args, **kwargs):
+                if request.method != "GET" or session.get("_flashes"):
+                    return fn(*args, **kwargs)
+
+                role = session.get("role", "anonymous")
+                key = f"page:{role}:{request.full_path}"
+
+                cached = self.get(key, tags)
+                if cached is not None:
+                    body, mimetype = cached
+                    return make_response(body, 200, {"Content-Type": mimetype})
+
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code == 200 and not session.get("_flashes"):
+                    self.set(
+                        key,
+                        (response.get_data(), response.content_type),
+                        tags, timeout
+                    )
+                return response
+            return view
+        return decorator
+
+
+cache = Cache()
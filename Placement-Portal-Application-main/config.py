@@ -6,3 +6,187 @@ class Config:
     SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(BASE_DIR, "instance", "placement.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = "dev-secret-key"
+
+    PAGE_SIZE = 25
+    MAX_PAGE_SIZE = 100
+
+    # "memory" (per process), "filesystem" (shared by workers) or "null"
+    CACHE_TYPE = "memory"
+    CACHE_DIR = None
+    CACHE_DEFAULT_TIMEOUT = 60
+    CACHE_THRESHOLD = 500
+
+    # `flask collect-static` output (default instance/assets), served
+    # under /assets with this max-age and immutable.
+    STATIC_BUILD_DIR = None
+    STATIC_COLLECT_EXCLUDE = ("uploads",)
+    ASSET_MAX_AGE = 365 * 24 * 3600
+
+    # Compiled templates are kept in instance/jinja unless a directory is given.
+    TEMPLATE_BYTECODE_CACHE = True
+    TEMPLATE_CACHE_DIR = None
+    FRAGMENT_CACHE_SIZE = 20000  # rendered rows kept per process; 0 disables
+    FRAGMENT_CACHE_TIMEOUT = 600
+
+    # One database per institution, e.g.
+    #   TENANTS = {"iitm": "sqlite:////srv/placement/iitm.db"}
+    #   TENANT_HOSTS = {"placements.iitm.ac.in": "iitm"}
+    # With TENANT_PATHS, /iitm/... also routes to "iitm". Requests for no
+    # tenant use SQLALCHEMY_DATABASE_URI.
+    TENANTS = {}
+    TENANT_HOSTS = {}
+    TENANT_PATHS = False
+
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        # seconds a connection waits on a locked database before failing
+        "connect_args": {"timeout": 30}
+    }
+
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 30000,
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+    }
+
+    DB_LOCK_RETRIES = 5
+    DB_LOCK_RETRY_DELAY = 0.05
+
+    EXPORT_BATCH_SIZE = 1000
+
+    IMPORT_BATCH_SIZE = 500
+    IMPORT_HASH_WORKERS = None  # defaults to the CPU count
+
+    # werkzeug method string; existing hashes are upgraded on next login
+    PASSWORD_HASH_METHOD = "scrypt:32768:8:1"
+    IDENTITY_CACHE_TIMEOUT = 30  # seconds an account stays cached per process
+    IDENTITY_CACHE_SIZE = 5000
+    # Per process. Behind a proxy, wrap the app in ProxyFix so the
+    # client address is the real one.
+    LOGIN_ADDRESS_LIMIT = 200  # failed attempts per address per window
+    LOGIN_ADDRESS_WINDOW = 60
+    LOGIN_FAILURE_LIMIT = 5  # failed attempts per account per window
+    LOGIN_FAILURE_WINDOW = 300
+
+    RESUME_EXTENSIONS = {"pdf", "doc", "docx"}
+    RESUME_MAX_BYTES = 5 * 1024 * 1024  # larger request bodies are refused while read
+    # UPLOAD_FOLDER = "/srv/placement/resumes"; defaults to instance/resumes
+    # Any other request body (roster imports included) stops here.
+    MAX_CONTENT_LENGTH = 32 * 1024 * 1024
+    RESUME_WORKERS = 2
+    # e.g. "/protected-resumes/" to hand files to nginx via X-Accel-Redirect
+    RESUME_ACCEL_REDIRECT = None
+
+    MATCH_LIMIT = 200
+    MATCH_CACHE_TIMEOUT = 300
+
+    # Run maintenance in a thread of this process. Leave off when several
+    # workers serve the app and run `flask run-scheduler` once instead.
+    SCHEDULER_ENABLED = False
+    # seconds between runs; 0 disables a task
+    SCHEDULE_INTERVALS = {
+        "close-expired-jobs": 300,
+        "refresh-counters": 6 * 3600,
+        "analyze": 24 * 3600,
+        "wal-checkpoint": 600,
+        "vacuum": 7 * 24 * 3600,
+        "refresh-analytics": 60,
+        "purge-idempotency-keys": 3600,
+        "send-notifications": 30,
+        "purge-outbox": 24 * 3600,
+        "archive-seasons": 24 * 3600,
+    }
+    EXPIRE_BATCH_SIZE = 500
+
+    # Finished jobs whose deadline is this many days past move to the
+    # archive tables, ARCHIVE_BATCH_SIZE jobs per transaction.
+    ARCHIVE_AFTER_DAYS = 365
+    ARCHIVE_BATCH_SIZE = 100
+
+    # Minimum minutes between two interviews of the same student, across
+    # all companies.
+    INTERVIEW_GAP = 15
+
+    ANALYTICS_CACHE_TIMEOUT = 300
+
+    # Group-commit applies from all request threads through one writer.
+    APPLY_BATCHING = False
+    APPLY_BATCH_SIZE = 100
+    APPLY_BATCH_WAIT = 0.005  # seconds the writer waits to fill a batch
+    APPLY_TIMEOUT = 10
+    IDEMPOTENCY_KEY_TTL = 24 * 3600
+
+    # Status change emails, queued in the outbox and sent by the
+    # send-notifications task. For a local debugging server run
+    # `python -m aiosmtpd -n -l localhost:1025` and set MAIL_PORT=1025.
+    NOTIFICATIONS_ENABLED = True
+    MAIL_SERVER = os.environ.get("MAIL_SERVER", "localhost")
+    MAIL_PORT = int(os.environ.get("MAIL_PORT", 25))
+    MAIL_USE_TLS = os.environ.get("MAIL_USE_TLS") == "1"
+    MAIL_USERNAME = os.environ.get("MAIL_USERNAME")
+    MAIL_PASSWORD = os.environ.get("MAIL_PASSWORD")
+    MAIL_SENDER = os.environ.get("MAIL_SENDER", "placements@localhost")
+    MAIL_TIMEOUT = 10
+    OUTBOX_BATCH_SIZE = 100  # recipients per SMTP connection
+    OUTBOX_MAX_BATCHES = 10  # per task run
+    OUTBOX_LEASE = 300  # seconds before an unfinished send is retried
+    OUTBOX_MAX_ATTEMPTS = 8
+    OUTBOX_RETRY_DELAY = 60  # doubled after each failure
+    OUTBOX_RETRY_MAX_DELAY = 3600
+    OUTBOX_RETENTION_DAYS = 30  # sent and failed messages are kept this long
+
+    # Per-request timing and SQL counts, shown at /admin/metrics.
+    PROFILING_ENABLED = False
+    PROFILING_N_PLUS_ONE = 10  # same statement more often than this is flagged
+    PROFILING_SAMPLE_SIZE = 1000  # recent requests kept per endpoint for percentiles
+    # lets a scraper read /admin/metrics/prometheus with "Authorization: Bearer <token>"
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+
+
+class ProductionConfig(Config):
+    SECRET_KEY = os.environ.get("SECRET_KEY", Config.SECRET_KEY)
+
+    CACHE_TYPE = "filesystem"
+
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "connect_args": {"timeout": 30},
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 30,
+        "pool_pre_ping": True,
+    }
+
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 30000,
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    }
+
+    DB_LOCK_RETRIES = 8
+
+
+class TestingConfig(Config):
+    TESTING = True
+    CACHE_TYPE = "null"
+    FRAGMENT_CACHE_SIZE = 0
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+
+
+configs = {
+    "development": DevelopmentConfig,
+    "production": ProductionConfig,
+    "testing": TestingConfig,
+}
+
+
+def get_config(name=None):
+    # Unset means production; debug mode is only ever asked for by name.
+    return configs[name or os.environ.get("PLACEMENT_ENV", "production")]
@@ -1,3 +1,22 @@
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+# Called as hook(app, engine) for engines made after start-up, such as the
+# per-tenant ones, so they are set up like the app's own.
+ENGINE_HOOKS = []
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    # db.engine and db.session follow the current tenant (see tenants.py).
+
+    @property
+    def engines(self):
+        router = current_app.extensions.get("tenants")
+        if router is not None:
+            engines = router.current_engines()
+            if engines is not None:
+                return engines
+        return super().engines
+
+
+db = RoutingSQLAlchemy()
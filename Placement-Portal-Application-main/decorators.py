@@ -1,14 +1,28 @@
 from functools import wraps
-from flask import session, redirect, url_for
+from flask import redirect, url_for, jsonify
+from identity import current_identity
 
 def login_required(role):
     def wrapper(fn):
         @wraps(fn)
         def decorated_view(*args, **kwargs):
-            if "role" not in session or session["role"] != role:
+            identity = current_identity()
+            if identity is None or identity.role != role or not identity.active:
                 return redirect(url_for("index"))
             return fn(*args, **kwargs)
         return decorated_view
     return wrapper
 
 
+def api_login_required(*roles):
+    # Same session check for JSON endpoints, answering 401 instead of
+    # redirecting to the login page.
+    def wrapper(fn):
+        @wraps(fn)
+        def decorated_view(*args, **kwargs):
+            identity = current_identity()
+            if identity is None or identity.role not in roles or not identity.active:
+                return jsonify(error="Login required"), 401
+            return fn(*args, **kwargs)
+        return decorated_view
+    return wrapper
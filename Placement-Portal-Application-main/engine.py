@@ -0,0 +1,130 @@
+import random
+import threading
+import time
+import click
+from functools import wraps
+from flask import current_app
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from db import db, ENGINE_HOOKS
+
+# Engine tuning for SQLite. WAL lets readers carry on while a writer
+# commits, the busy timeout makes a blocked connection wait for the lock
+# instead of failing at once, and retry_on_lock covers the cases SQLite
+# still reports as busy (e.g. a read transaction upgrading to a write).
+
+LOCK_MESSAGES = ("database is locked", "database table is locked", "database is busy")
+
+
+def _set_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+    return on_connect
+
+
+def configure_engine(engine, pragmas):
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    event.listen(engine, "connect", _set_pragmas(pragmas))
+
+
+def is_lock_error(error):
+    message = str(getattr(error, "orig", error)).lower()
+    return any(lock_message in message for lock_message in LOCK_MESSAGES)
+
+
+def retry_on_lock(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        retries = current_app.config.get("DB_LOCK_RETRIES", 5)
+        delay = current_app.config.get("DB_LOCK_RETRY_DELAY", 0.05)
+
+        for attempt in range(retries + 1):
+            try:
+                return fn(*args, **kwargs)
+            except OperationalError as error:
+                db.session.rollback()
+                if attempt == retries or not is_lock_error(error):
+                    raise
+                # Jittered exponential backoff so retrying writers spread out.
+                time.sleep(delay * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    return wrapper
+
+
+def _setup_engine(app, engine):
+    configure_engine(engine, app.config.get("SQLITE_PRAGMAS", {}))
+
+
+def init_app(app):
+    with app.app_context():
+        for engine in db.engines.values():
+            _setup_engine(app, engine)
+
+    if _setup_engine not in ENGINE_HOOKS:
+        ENGINE_HOOKS.append(_setup_engine)
+
+    @app.cli.command("db-stress")
+    @click.option("--readers", default=8, help="Concurrent reader threads.")
+    @click.option("--writers", default=4, help="Concurrent writer threads.")
+    @click.option("--seconds", default=5.0, help="How long to run.")
+    def db_stress_command(readers, writers, seconds):
+        # Hammers a scratch table with concurrent reads and writes and
+        # reports how many of each succeeded or failed.
+        engine = db.engine
+        results = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        stop = time.monotonic() + seconds
+
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE IF NOT EXISTS _stress (id INTEGER PRIMARY KEY, value INTEGER)"
+            ))
+
+        def count(key):
+            with lock:
+                results[key] += 1
+
+        def reader():
+            while time.monotonic() < stop:
+                try:
+                    with engine.connect() as connection:
+                        connection.execute(text("SELECT COUNT(*) FROM _stress")).scalar()
+                    count("reads")
+                except OperationalError:
+                    count("errors")
+
+        def writer():
+            while time.monotonic() < stop:
+                try:
+                    with engine.begin() as connection:
+                        connection.execute(
+                            text("INSERT INTO _stress (value) VALUES (:value)"),
+                            {"value": random.randint(0, 1000)}
+                        )
+                    count("writes")
+                except OperationalError:
+                    count("errors")
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with engine.begin() as connection:
+            mode = connection.execute(text("PRAGMA journal_mode")).scalar()
+            connection.execute(text("DROP TABLE _stress"))
+
+        click.echo(
+            f"journal_mode={mode} reads={results['reads']} "
+            f"writes={results['writes']} errors={results['errors']}"
+        )
+
+        if results["errors"]:
+            raise SystemExit(1)
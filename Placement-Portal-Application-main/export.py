@@ -0,0 +1,191 @@
+import csv
+import io
+import json
+from datetime import datetime, date, timedelta
+from flask import Blueprint, Response, request, stream_with_context, abort, current_app
+from sqlalchemy import select
+from db import db
+from decorators import login_required
+from models import Company, Student, JobPosition, Application, Placement
+
+export_bp = Blueprint("export", __name__, url_prefix="/admin/export")
+
+# Exports stream straight from a database cursor: rows are fetched in
+# yield_per batches and written out as they arrive, so memory use does
+# not depend on how many applications there are.
+
+APPLICATION_FIELDS = [
+    "application_id", "status", "applied_on",
+    "student_id", "student_name", "student_email", "department", "cgpa",
+    "job_id", "job_title", "salary",
+    "company_id", "company_name",
+    "placement_id", "placed_on",
+]
+
+PLACEMENT_FIELDS = [
+    "placement_id", "placed_on", "application_id",
+    "student_id", "student_name", "department",
+    "job_id", "job_title", "salary",
+    "company_id", "company_name",
+]
+
+
+def _parse_date(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        abort(400, f"Invalid {name}, expected YYYY-MM-DD")
+
+
+def _apply_filters(statement, date_column):
+    status = request.args.get("status")
+    company_id = request.args.get("company_id", type=int)
+    department = request.args.get("department")
+    start = _parse_date("from")
+    end = _parse_date("to")
+
+    if status:
+        statement = statement.where(Application.status == status)
+    if company_id:
+        statement = statement.where(JobPosition.company_id == company_id)
+    if department:
+        statement = statement.where(Student.department == department)
+    if start:
+        statement = statement.where(date_column >= start)
+    if end:
+        statement = statement.where(date_column < end + timedelta(days=1))
+
+    return statement
+
+
+def applications_statement():
+    statement = select(
+        Application.id.label("application_id"),
+        Application.status,
+        Application.applied_on,
+        Student.id.label("student_id"),
+        Student.name.label("student_name"),
+        Student.email.label("student_email"),
+        Student.department,
+        Student.cgpa,
+        JobPosition.id.label("job_id"),
+        JobPosition.title.label("job_title"),
+        JobPosition.salary,
+        Company.id.label("company_id"),
+        Company.name.label("company_name"),
+        Placement.id.label("placement_id"),
+        Placement.placed_on,
+    ).join(
+        Student, Student.id == Application.student_id
+    ).join(
+        JobPosition, JobPosition.id == Application.job_position_id
+    ).join(
+        Company, Company.id == JobPosition.company_id
+    ).outerjoin(
+        Placement, Placement.application_id == Application.id
+    ).order_by(Application.id)
+
+    return _apply_filters(statement, Application.applied_on)
+
+
+def placements_statement():
+    statement = select(
+        Placement.id.label("placement_id"),
+        Placement.placed_on,
+        Application.id.label("application_id"),
+        Student.id.label("student_id"),
+        Student.name.label("student_name"),
+        Student.department,
+        JobPosition.id.label("job_id"),
+        JobPosition.title.label("job_title"),
+        JobPosition.salary,
+        Company.id.label("company_id"),
+        Company.name.label("company_name"),
+    ).join(
+        Application, Application.id == Placement.application_id
+    ).join(
+        Student, Student.id == Application.student_id
+    ).join(
+        JobPosition, JobPosition.id == Application.job_position_id
+    ).join(
+        Company, Company.id == JobPosition.company_id
+    ).order_by(Placement.id)
+
+    return _apply_filters(statement, Placement.placed_on)
+
+
+def _rows(statement):
+    batch_size = current_app.config.get("EXPORT_BATCH_SIZE", 1000)
+
+    # A dedicated connection with stream_results keeps a server-side
+    # cursor open for the life of the response on backends that have one.
+    with db.engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, yield_per=batch_size
+        ).execute(statement)
+
+        for partition in result.mappings().partitions():
+            yield partition
+
+
+def _value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_stream(statement, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(fields)
+    yield buffer.getvalue()
+
+    for rows in _rows(statement):
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            writer.writerow([_value(row[field]) for field in fields])
+        yield buffer.getvalue()
+
+
+def _ndjson_stream(statement, fields):
+    for rows in _rows(statement):
+        yield "".join(
+            json.dumps({field: _value(row[field]) for field in fields}) + "\n"
+            for row in rows
+        )
+
+
+def _export(name, statement, fields):
+    fmt = request.args.get("format", "csv")
+
+    if fmt == "csv":
+        body, mimetype, extension = _csv_stream(statement, fields), "text/csv", "csv"
+    elif fmt == "ndjson":
+        body, mimetype, extension = _ndjson_stream(statement, fields), "application/x-ndjson", "ndjson"
+    else:
+        abort(400, "format must be csv or ndjson")
+
+    filename = f"{name}-{date.today().isoformat()}.{extension}"
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@export_bp.route("/applications")
+@login_required("admin")
+def export_applications():
+    return _export("applications", applications_statement(), APPLICATION_FIELDS)
+
+
+@export_bp.route("/placements")
+@login_required("admin")
+def export_placements():
+    return _export("placements", placements_statement(), PLACEMENT_FIELDS)
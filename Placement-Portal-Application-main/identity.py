@@ -0,0 +1,79 @@
+from flask import g, session
+from sqlalchemy import select
+from db import db
+from cache import MemoryBackend
+from models import Admin, Company, Student
+from tenants import current_tenant
+
+# The logged-in account, loaded at most once per request into g.identity.
+# Accounts are also kept for a few seconds in a per-process cache, so most
+# requests never touch the account tables; admin actions that change an
+# account drop its entry here, and other processes catch up when their
+# copy expires (IDENTITY_CACHE_TIMEOUT).
+
+ACCOUNT_FIELDS = {
+    "student": (Student, ("id", "name", "email", "department", "cgpa", "resume", "is_active")),
+    "company": (Company, ("id", "name", "email", "website", "hr_contact", "is_approved", "is_blacklisted")),
+    "admin": (Admin, ("id", "username")),
+}
+
+_accounts = MemoryBackend(threshold=5000, default_timeout=30)
+
+
+class Identity:
+
+    def __init__(self, role, fields):
+        self.role = role
+        self.__dict__.update(fields)
+
+    @property
+    def active(self):
+        # The same checks login applies.
+        if self.role == "student":
+            return bool(self.is_active)
+        if self.role == "company":
+            return bool(self.is_approved)
+        return True
+
+
+def _load(role, user_id):
+    model, fields = ACCOUNT_FIELDS[role]
+    row = db.session.execute(
+        select(*(getattr(model, field) for field in fields)).where(model.id == user_id)
+    ).first()
+    return Identity(role, row._asdict()) if row else None
+
+
+def current_identity():
+    if "identity" in g:
+        return g.identity
+
+    role = session.get("role")
+    user_id = session.get("user_id")
+    identity = None
+
+    # A session only counts at the tenant that logged it in.
+    if session.get("tenant") != current_tenant():
+        role = None
+
+    if role in ACCOUNT_FIELDS and user_id is not None:
+        key = (current_tenant(), role, user_id)
+        identity = _accounts.get(key)
+        if identity is None:
+            identity = _load(role, user_id)
+            if identity is not None:
+                _accounts.set(key, identity)
+
+    g.identity = identity
+    return identity
+
+
+def invalidate_identity(role, user_id):
+    _accounts.delete((current_tenant(), role, user_id))
+    if g.get("identity") is not None and g.identity.role == role and g.identity.id == user_id:
+        g.pop("identity")
+
+
+def init_app(app):
+    _accounts.threshold = app.config.get("IDENTITY_CACHE_SIZE", 5000)
+    _accounts.default_timeout = app.config.get("IDENTITY_CACHE_TIMEOUT", 30)
@@ -0,0 +1,203 @@
+import csv
+import io
+import os
+import click
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from datetime import datetime
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, send_from_directory, abort
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+from werkzeug.utils import secure_filename
+from db import db
+from cache import cache
+from decorators import login_required
+from models import Student
+from security import hash_method
+from stats import apply_deltas
+from validators import validate_student
+
+import_bp = Blueprint("importer", __name__, url_prefix="/admin/import")
+
+# Bulk student onboarding from a roster CSV with the columns
+# name,email,password,department,cgpa. Rows are validated with the same
+# rules as the registration form, passwords are hashed across a process
+# pool, and each batch is written with a single executemany INSERT.
+
+REJECT_FIELDS = ["line", "name", "email", "department", "cgpa", "error"]
+
+
+class ImportResult:
+
+    def __init__(self):
+        self.total = 0
+        self.imported = 0
+        self.rejected = 0
+
+
+def _existing_emails(emails):
+    if not emails:
+        return set()
+
+    rows = db.session.execute(
+        select(Student.email).where(Student.email.in_(emails))
+    )
+    return set(rows.scalars())
+
+
+def _insert_batch(batch, executor):
+    passwords = [row["password"] for row in batch]
+    hashes = executor.map(
+        partial(generate_password_hash, method=hash_method()),
+        passwords, chunksize=max(1, len(batch) // 32)
+    )
+
+    rows = [
+        {
+            "name": row["name"],
+            "email": row["email"],
+            "password": password_hash,
+            "department": row["department"],
+            "cgpa": row["cgpa"],
+            "is_active": True,
+        }
+        for row, password_hash in zip(batch, hashes)
+    ]
+
+    db.session.execute(insert(Student), rows)
+    # Core inserts skip the ORM flush hooks, so count them here.
+    apply_deltas(db.session.connection(), {"students": len(rows)})
+    db.session.commit()
+    cache.invalidate("students")
+
+
+def import_students(stream, reject_stream, batch_size=500, workers=None, progress=None):
+    result = ImportResult()
+    reader = csv.DictReader(stream)
+
+    rejects = csv.DictWriter(reject_stream, fieldnames=REJECT_FIELDS, extrasaction="ignore")
+    rejects.writeheader()
+
+    def reject(line, row, error):
+        result.rejected += 1
+        rejects.writerow(dict(row, line=line, error=error))
+
+    seen = set()
+    pending = []
+
+    def flush_pending(executor):
+        if not pending:
+            return
+
+        taken = _existing_emails([line_row["email"] for _, line_row in pending])
+        batch = []
+        for line, row in pending:
+            if row["email"] in taken:
+                reject(line, row, "Email already registered")
+            else:
+                batch.append(row)
+
+        if batch:
+            _insert_batch(batch, executor)
+            result.imported += len(batch)
+
+        pending.clear()
+        if progress:
+            progress(result)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for line, raw in enumerate(reader, start=2):
+            result.total += 1
+            row = {key: (value or "").strip() for key, value in raw.items() if key}
+
+            cleaned, error = validate_student(
+                row.get("name"), row.get("email"), row.get("password"),
+                row.get("department"), row.get("cgpa")
+            )
+            if error:
+                reject(line, row, error)
+                continue
+
+            if cleaned["email"] in seen:
+                reject(line, row, "Duplicate email in file")
+                continue
+
+            seen.add(cleaned["email"])
+            pending.append((line, cleaned))
+
+            if len(pending) >= batch_size:
+                flush_pending(executor)
+
+        flush_pending(executor)
+
+    return result
+
+
+def _reject_folder():
+    folder = os.path.join(current_app.instance_path, "imports")
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+@import_bp.route("/students", methods=["GET", "POST"])
+@login_required("admin")
+def import_students_upload():
+
+    if request.method == "POST":
+        file = request.files.get("roster")
+
+        if not file or file.filename == "":
+            flash("Please choose a CSV file.")
+            return redirect(url_for("importer.import_students_upload"))
+
+        reject_name = f"rejects-{datetime.utcnow():%Y%m%d%H%M%S}.csv"
+        stream = io.TextIOWrapper(file.stream, encoding="utf-8-sig", newline="")
+
+        with open(os.path.join(_reject_folder(), reject_name), "w", newline="") as reject_file:
+            result = import_students(
+                stream, reject_file,
+                batch_size=current_app.config.get("IMPORT_BATCH_SIZE", 500),
+                workers=current_app.config.get("IMPORT_HASH_WORKERS")
+            )
+
+        flash(f"Imported {result.imported} of {result.total} students, {result.rejected} rejected.")
+
+        return render_template(
+            "admin/import_students.html",
+            result=result,
+            reject_file=reject_name if result.rejected else None
+        )
+
+    return render_template("admin/import_students.html", result=None, reject_file=None)
+
+
+@import_bp.route("/rejects/<name>")
+@login_required("admin")
+def download_rejects(name):
+    if secure_filename(name) != name:
+        abort(404)
+    return send_from_directory(_reject_folder(), name, as_attachment=True)
+
+
+def init_app(app):
+
+    @app.cli.command("import-students")
+    @click.argument("roster", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--reject-file", default="rejects.csv", help="Where to write rejected rows.")
+    @click.option("--batch-size", default=500, help="Rows per INSERT batch.")
+    @click.option("--workers", default=None, type=int, help="Password hashing processes.")
+    def import_students_command(roster, reject_file, batch_size, workers):
+
+        def progress(result):
+            click.echo(
+                f"{result.total} read, {result.imported} imported, {result.rejected} rejected"
+            )
+
+        with open(roster, newline="", encoding="utf-8-sig") as stream, \
+                open(reject_file, "w", newline="") as rejects:
+            result = import_students(stream, rejects, batch_size, workers, progress)
+
+        click.echo(
+            f"Done: {result.imported} imported, {result.rejected} rejected "
+            f"(see {reject_file})."
+        )
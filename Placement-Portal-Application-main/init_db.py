@@ -1,18 +1,19 @@
 from app import create_app
 from db import db
 from models import Admin
+from migrations import upgrade
+from security import hash_password
 
 app = create_app()
 
 with app.app_context():
-    db.create_all()
+    upgrade()
 
     admin = Admin.query.filter_by(username="admin").first()
-    from werkzeug.security import generate_password_hash
     if not admin:
         admin = Admin(
             username="admin",
-            password=generate_password_hash("admin123")
+            password=hash_password("admin123")
         )
         db.session.add(admin)
         db.session.commit()
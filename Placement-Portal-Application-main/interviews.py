@@ -0,0 +1,492 @@
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+import click
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app
+from sqlalchemy import select, insert, update, delete, func
+from sqlalchemy.exc import IntegrityError
+from db import db
+from decorators import login_required
+from models import (Student, JobPosition, Application, InterviewPanel, InterviewSlot,
+                    InterviewBooking)
+from transitions import transition_applications
+
+interviews_bp = Blueprint("interviews", __name__)
+
+# Interview scheduling. The shortlisted applications of a job are matched
+# to the free slots of its panels so that no slot is used twice and no
+# student has two interviews, with any company, closer than INTERVIEW_GAP
+# minutes. Slots with the same times are interchangeable, so candidates
+# are matched to time windows with a capacity (the number of free panels
+# at that time): the most constrained candidates go first, each to the
+# earliest window with room, and anyone left over is placed along
+# augmenting paths that shift already placed candidates to other windows,
+# found in Hopcroft-Karp phases, which makes the result a maximum matching. Cancelling a slot re-places
+# only the candidate who held it; existing bookings never move.
+
+SCHEDULABLE_STATUSES = ("Shortlisted", "Interview")
+
+
+class SchedulingError(ValueError):
+    pass
+
+
+class ScheduleResult:
+
+    def __init__(self, booked, unplaced, elapsed):
+        self.booked = booked
+        self.unplaced = unplaced
+        self.elapsed = elapsed
+
+
+# ---------------- MATCHING ----------------
+
+def _feasible_windows(windows, starts, longest, busy, gap):
+    blocked = set()
+    for busy_start, busy_end in busy:
+        low = bisect_left(starts, busy_start - gap - longest)
+        high = bisect_left(starts, busy_end + gap)
+        for index in range(low, high):
+            if windows[index][1] + gap > busy_start:
+                blocked.add(index)
+    return [index for index in range(len(windows)) if index not in blocked]
+
+
+def _layers(free, feasible, holders, capacity):
+    # Breadth-first from the unplaced candidates: each window gets the
+    # number of moves needed to reach it, up to the first layer that has a
+    # window with room (so only shortest augmenting paths are used).
+    depth = {}
+    frontier = []
+    for candidate in free:
+        for window in feasible[candidate]:
+            if window not in depth:
+                depth[window] = 0
+                frontier.append(window)
+
+    level = 0
+    while frontier:
+        if any(capacity[window] > 0 for window in frontier):
+            return depth
+        level += 1
+        next_frontier = []
+        for window in frontier:
+            for holder in holders[window]:
+                for onward in feasible[holder]:
+                    if onward not in depth:
+                        depth[onward] = level
+                        next_frontier.append(onward)
+        frontier = next_frontier
+
+    return None
+
+
+def _path(start, feasible, assignment, holders, capacity, depth, dead):
+    # Depth-first down the layers from a full window to one with room.
+    # -> [(candidate, window it moves to), ...] or None
+    def options(window):
+        for holder in list(holders[window]):
+            for onward in feasible[holder]:
+                if (depth.get(onward) == depth[window] + 1 and onward not in dead
+                        and assignment.get(holder) == window):
+                    yield holder, onward
+
+    if capacity[start] > 0:
+        return []
+
+    stack = [(start, options(start))]
+    moves = []
+    while stack:
+        window, steps = stack[-1]
+        step = next(steps, None)
+        if step is None:
+            # Nothing below this window leads anywhere in this phase.
+            dead.add(window)
+            stack.pop()
+            if moves:
+                moves.pop()
+            continue
+
+        moves.append(step)
+        if capacity[step[1]] > 0:
+            return moves
+        stack.append((step[1], options(step[1])))
+
+    return None
+
+
+def _move(candidate, window, assignment, holders):
+    previous = assignment.get(candidate)
+    if previous is not None:
+        holders[previous].discard(candidate)
+    assignment[candidate] = window
+    holders[window].add(candidate)
+
+
+def _augment(free, feasible, assignment, holders, capacity):
+    # Hopcroft-Karp style phases: layer once, then place as many of the
+    # unplaced as possible along disjoint shortest paths, until no path is
+    # left or every slot is taken.
+    while free and sum(capacity) > 0:
+        depth = _layers(free, feasible, holders, capacity)
+        if depth is None:
+            break
+
+        dead = set()
+        placed = 0
+        for candidate in free:
+            for window in feasible[candidate]:
+                if depth.get(window) != 0 or window in dead:
+                    continue
+                moves = _path(window, feasible, assignment, holders, capacity, depth, dead)
+                if moves is None:
+                    continue
+
+                capacity[moves[-1][1] if moves else window] -= 1
+                for mover, onward in reversed(moves):
+                    _move(mover, onward, assignment, holders)
+                _move(candidate, window, assignment, holders)
+                placed += 1
+                break
+
+        if not placed:
+            break
+        free = [candidate for candidate in free if candidate not in assignment]
+
+    return free
+
+
+def plan(candidates, windows, busy, gap=timedelta(0)):
+    # candidates: [(application_id, student_id)]
+    # windows: [(starts_on, ends_on, [slot_id, ...])] sorted by start
+    # busy: {student_id: [(starts_on, ends_on), ...]} already booked
+    # -> ({application_id: slot_id}, [application_id, ...] unplaced)
+    if not windows:
+        return {}, [application_id for application_id, _ in candidates]
+
+    starts = [window[0] for window in windows]
+    longest = max(window[1] - window[0] for window in windows)
+
+    feasible = {
+        application_id: _feasible_windows(windows, starts, longest, busy.get(student_id, ()), gap)
+        for application_id, student_id in candidates
+    }
+
+    capacity = [len(window[2]) for window in windows]
+    assignment = {}
+    holders = [set() for _ in windows]
+    left_over = []
+
+    # Fewest usable windows first; ties keep application order.
+    for application_id in sorted(feasible, key=lambda key: len(feasible[key])):
+        for window in feasible[application_id]:
+            if capacity[window] > 0:
+                capacity[window] -= 1
+                assignment[application_id] = window
+                holders[window].add(application_id)
+                break
+        else:
+            left_over.append(application_id)
+
+    unplaced = _augment(left_over, feasible, assignment, holders, capacity)
+
+    free_slots = [list(window[2]) for window in windows]
+    slots = {
+        application_id: free_slots[window].pop(0)
+        for application_id, window in sorted(assignment.items(), key=lambda item: item[1])
+    }
+    return slots, unplaced
+
+
+# ---------------- PERSISTENCE ----------------
+
+def _job_for_company(company_id, job_id):
+    job = db.session.get(JobPosition, job_id)
+    if job is None or job.company_id != company_id:
+        raise SchedulingError("Unauthorized action")
+    return job
+
+
+def _candidates(job_id, application_ids=None):
+    statement = select(Application.id, Application.student_id).outerjoin(
+        InterviewBooking, InterviewBooking.application_id == Application.id
+    ).where(
+        Application.job_position_id == job_id,
+        Application.status.in_(SCHEDULABLE_STATUSES),
+        InterviewBooking.id.is_(None)
+    ).order_by(Application.id)
+
+    if application_ids is not None:
+        statement = statement.where(Application.id.in_(application_ids))
+    return db.session.execute(statement).all()
+
+
+def _windows(job_id):
+    rows = db.session.execute(
+        select(InterviewSlot.id, InterviewSlot.starts_on, InterviewSlot.ends_on).join(
+            InterviewPanel, InterviewPanel.id == InterviewSlot.panel_id
+        ).outerjoin(
+            InterviewBooking, InterviewBooking.slot_id == InterviewSlot.id
+        ).where(
+            InterviewPanel.job_position_id == job_id,
+            InterviewSlot.status == "Open",
+            InterviewSlot.starts_on > datetime.utcnow(),
+            InterviewBooking.id.is_(None)
+        ).order_by(InterviewSlot.starts_on, InterviewSlot.ends_on, InterviewSlot.id)
+    ).all()
+
+    windows = []
+    for slot_id, starts_on, ends_on in rows:
+        if windows and windows[-1][0] == starts_on and windows[-1][1] == ends_on:
+            windows[-1][2].append(slot_id)
+        else:
+            windows.append((starts_on, ends_on, [slot_id]))
+    return windows
+
+
+def _bookings(student_ids, after_id=0):
+    busy = {}
+    ids = list(student_ids)
+    for start in range(0, len(ids), 900):
+        rows = db.session.execute(
+            select(InterviewBooking.student_id, InterviewBooking.starts_on, InterviewBooking.ends_on).where(
+                InterviewBooking.student_id.in_(ids[start:start + 900]),
+                InterviewBooking.id > after_id
+            )
+        )
+        for student_id, starts_on, ends_on in rows:
+            busy.setdefault(student_id, []).append((starts_on, ends_on))
+    return busy
+
+
+def _overlaps(intervals, starts_on, ends_on, gap):
+    return any(starts_on < end + gap and start < ends_on + gap for start, end in intervals)
+
+
+def schedule_job(company_id, job_id, application_ids=None):
+    started = time.perf_counter()
+    _job_for_company(company_id, job_id)
+    gap = timedelta(minutes=current_app.config.get("INTERVIEW_GAP", 15))
+
+    candidates = _candidates(job_id, application_ids)
+    students = {application_id: student_id for application_id, student_id in candidates}
+    watermark = db.session.execute(select(func.max(InterviewBooking.id))).scalar() or 0
+
+    windows = _windows(job_id)
+    slot_times = {slot_id: (starts_on, ends_on) for starts_on, ends_on, slot_ids in windows for slot_id in slot_ids}
+    slots, unplaced = plan(candidates, windows, _bookings(students.values()), gap)
+
+    # Another company may have booked one of these students meanwhile.
+    late = _bookings({students[application_id] for application_id in slots}, watermark)
+    for application_id, slot_id in list(slots.items()):
+        if _overlaps(late.get(students[application_id], ()), *slot_times[slot_id], gap):
+            del slots[application_id]
+            unplaced.append(application_id)
+
+    if slots:
+        try:
+            db.session.execute(insert(InterviewBooking), [
+                {
+                    "application_id": application_id,
+                    "slot_id": slot_id,
+                    "student_id": students[application_id],
+                    "starts_on": slot_times[slot_id][0],
+                    "ends_on": slot_times[slot_id][1],
+                    "created_on": datetime.utcnow(),
+                }
+                for application_id, slot_id in slots.items()
+            ])
+            # Commits the bookings together with the status change.
+            transition_applications(company_id, "Interview", application_ids=list(slots))
+        except IntegrityError:
+            db.session.rollback()
+            raise SchedulingError("The schedule changed while it was being computed; try again.")
+
+    return ScheduleResult(len(slots), sorted(unplaced), time.perf_counter() - started)
+
+
+def add_panel(company_id, job_id, name, room, starts_on, ends_on, minutes):
+    _job_for_company(company_id, job_id)
+    if minutes <= 0 or ends_on <= starts_on:
+        raise SchedulingError("Choose a time range and a slot length.")
+
+    panel = InterviewPanel(job_position_id=job_id, name=name, room=room)
+    db.session.add(panel)
+    db.session.flush()
+
+    length = timedelta(minutes=minutes)
+    slots = []
+    current = starts_on
+    while current + length <= ends_on:
+        slots.append({"panel_id": panel.id, "starts_on": current, "ends_on": current + length, "status": "Open"})
+        current += length
+
+    if slots:
+        db.session.execute(insert(InterviewSlot), slots)
+    db.session.commit()
+    return len(slots)
+
+
+def cancel_slot(company_id, slot_id):
+    row = db.session.execute(
+        select(InterviewPanel.job_position_id, InterviewBooking.application_id).select_from(InterviewSlot).join(
+            InterviewPanel, InterviewPanel.id == InterviewSlot.panel_id
+        ).join(
+            JobPosition, JobPosition.id == InterviewPanel.job_position_id
+        ).outerjoin(
+            InterviewBooking, InterviewBooking.slot_id == InterviewSlot.id
+        ).where(
+            InterviewSlot.id == slot_id, JobPosition.company_id == company_id
+        )
+    ).first()
+    if row is None:
+        raise SchedulingError("Unauthorized action")
+
+    job_id, application_id = row
+    db.session.execute(
+        update(InterviewSlot).where(InterviewSlot.id == slot_id).values(status="Cancelled")
+    )
+    db.session.execute(delete(InterviewBooking).where(InterviewBooking.slot_id == slot_id))
+    db.session.commit()
+
+    if application_id is None:
+        return None
+    return schedule_job(company_id, job_id, application_ids=[application_id])
+
+
+def student_interviews(student_id):
+    rows = db.session.execute(
+        select(
+            InterviewBooking.application_id, InterviewBooking.starts_on,
+            InterviewPanel.name, InterviewPanel.room
+        ).join(
+            InterviewSlot, InterviewSlot.id == InterviewBooking.slot_id
+        ).join(
+            InterviewPanel, InterviewPanel.id == InterviewSlot.panel_id
+        ).where(InterviewBooking.student_id == student_id)
+    ).all()
+    return {row.application_id: row for row in rows}
+
+
+# ---------------- VIEWS ----------------
+
+def _schedule_message(result):
+    message = f"{result.booked} interviews booked."
+    if result.unplaced:
+        message += f" {len(result.unplaced)} candidates could not be placed; add slots and schedule again."
+    return message
+
+
+@interviews_bp.route("/company/job/<int:job_id>/interviews")
+@login_required("company")
+def job_interviews(job_id):
+
+    try:
+        job = _job_for_company(session.get("user_id"), job_id)
+    except SchedulingError as error:
+        flash(str(error))
+        return redirect(url_for("company_dashboard"))
+
+    slots = db.session.execute(
+        select(
+            InterviewSlot.id, InterviewSlot.starts_on, InterviewSlot.ends_on, InterviewSlot.status,
+            InterviewPanel.name.label("panel"), InterviewPanel.room,
+            Student.name.label("student_name"), Application.status.label("application_status")
+        ).join(
+            InterviewPanel, InterviewPanel.id == InterviewSlot.panel_id
+        ).outerjoin(
+            InterviewBooking, InterviewBooking.slot_id == InterviewSlot.id
+        ).outerjoin(
+            Application, Application.id == InterviewBooking.application_id
+        ).outerjoin(
+            Student, Student.id == InterviewBooking.student_id
+        ).where(
+            InterviewPanel.job_position_id == job_id
+        ).order_by(InterviewSlot.starts_on, InterviewPanel.name)
+    ).all()
+
+    waiting = len(_candidates(job_id))
+
+    return render_template(
+        "company/interviews.html",
+        job=job,
+        slots=slots,
+        waiting=waiting
+    )
+
+
+@interviews_bp.route("/company/job/<int:job_id>/interviews/panels", methods=["POST"])
+@login_required("company")
+def add_interview_panel(job_id):
+
+    try:
+        day = datetime.strptime(request.form["day"], "%Y-%m-%d")
+        starts_on = day + timedelta(hours=int(request.form["start"].split(":")[0]),
+                                    minutes=int(request.form["start"].split(":")[1]))
+        ends_on = day + timedelta(hours=int(request.form["end"].split(":")[0]),
+                                  minutes=int(request.form["end"].split(":")[1]))
+        minutes = int(request.form["minutes"])
+    except (KeyError, ValueError, IndexError):
+        flash("Please fill in the day, times and slot length.")
+        return redirect(url_for("interviews.job_interviews", job_id=job_id))
+
+    try:
+        count = add_panel(
+            session.get("user_id"), job_id,
+            request.form.get("name") or "Panel", request.form.get("room"),
+            starts_on, ends_on, minutes
+        )
+    except SchedulingError as error:
+        flash(str(error))
+        return redirect(url_for("interviews.job_interviews", job_id=job_id))
+
+    flash(f"Panel added with {count} slots.")
+    return redirect(url_for("interviews.job_interviews", job_id=job_id))
+
+
+@interviews_bp.route("/company/job/<int:job_id>/interviews/schedule", methods=["POST"])
+@login_required("company")
+def schedule_interviews(job_id):
+
+    try:
+        result = schedule_job(session.get("user_id"), job_id)
+    except SchedulingError as error:
+        flash(str(error))
+    else:
+        flash(_schedule_message(result))
+
+    return redirect(url_for("interviews.job_interviews", job_id=job_id))
+
+
+@interviews_bp.route("/company/interviews/slots/<int:slot_id>/cancel", methods=["POST"])
+@login_required("company")
+def cancel_interview_slot(slot_id):
+
+    job_id = request.form.get("job_id", type=int)
+
+    try:
+        result = cancel_slot(session.get("user_id"), slot_id)
+    except SchedulingError as error:
+        flash(str(error))
+    else:
+        flash("Slot cancelled." + (" " + _schedule_message(result) if result else ""))
+
+    if job_id is None:
+        return redirect(url_for("company_dashboard"))
+    return redirect(url_for("interviews.job_interviews", job_id=job_id))
+
+
+def init_app(app):
+
+    @app.cli.command("schedule-interviews")
+    @click.argument("job_id", type=int)
+    def schedule_interviews_command(job_id):
+        job = db.session.get(JobPosition, job_id)
+        if job is None:
+            raise click.ClickException(f"No job {job_id}")
+
+        result = schedule_job(job.company_id, job_id)
+        click.echo(
+            f"{result.booked} booked, {len(result.unplaced)} unplaced "
+            f"in {result.elapsed:.2f}s"
+        )
@@ -0,0 +1,272 @@
+import re
+from datetime import date
+import numpy as np
+from flask import current_app
+from db import db
+from cache import cache
+from models import Student, JobPosition, ResumeFile
+
+# Eligibility matching. Free-text eligibility is parsed once into a
+# minimum CGPA and a set of departments, skills into tokens, and the
+# students and jobs are laid out as column arrays so a whole side of the
+# student x job grid is scored in one vectorised pass.
+
+CGPA_RES = [
+    re.compile(r"(?:cgpa|gpa|cpi|sgpa)[^0-9]{0,20}(\d+(?:\.\d+)?)", re.I),
+    re.compile(r"(\d+(?:\.\d+)?)\s*(?:\+|cgpa|gpa|cpi|and above|or above)", re.I),
+]
+ALL_DEPARTMENTS_RE = re.compile(r"\ball\s+(?:branches|departments|streams)\b", re.I)
+SKILL_SPLIT_RE = re.compile(r"\s*(?:[,;/|\n]|\band\b)\s*", re.I)
+WORD_RE = re.compile(r"[a-z0-9+#.]+")
+
+
+class Criteria:
+
+    def __init__(self, min_cgpa=None, departments=()):
+        self.min_cgpa = min_cgpa
+        self.departments = frozenset(departments)
+
+
+def normalize_department(department):
+    return (department or "").strip().upper()
+
+
+def parse_eligibility(text, known_departments):
+    text = text or ""
+
+    min_cgpa = None
+    for pattern in CGPA_RES:
+        match = pattern.search(text)
+        if match and 0 <= float(match.group(1)) <= 10:
+            min_cgpa = float(match.group(1))
+            break
+
+    departments = set()
+    if not ALL_DEPARTMENTS_RE.search(text):
+        words = set(re.findall(r"[A-Za-z&]+", text.upper()))
+        departments = {d for d in known_departments if d in words or (" " in d and d in text.upper())}
+
+    return Criteria(min_cgpa, departments)
+
+
+def tokenize_skills(text):
+    return {
+        token.strip().lower()
+        for token in SKILL_SPLIT_RE.split(text or "")
+        if token.strip()
+    }
+
+
+def _text_tokens(text):
+    return set(WORD_RE.findall((text or "").lower()))
+
+
+def _has_skill(skill, tokens):
+    # Multi-word skills ("machine learning") need every word present.
+    return all(word in tokens for word in skill.split())
+
+
+# ---------------- COLUMN ARRAYS ----------------
+
+class StudentColumns:
+
+    def __init__(self, ids, names, cgpa, departments, department_names, skill_index):
+        self.ids = ids
+        self.names = names
+        self.cgpa = cgpa
+        self.departments = departments
+        self.department_names = department_names
+        self.skill_index = skill_index
+
+    def department_codes(self, departments):
+        lookup = {name: code for code, name in enumerate(self.department_names)}
+        return [lookup[d] for d in departments if d in lookup]
+
+    def skill_hits(self, skills):
+        hits = np.zeros(len(self.ids), dtype=np.float64)
+        empty = np.array([], dtype=np.int64)
+
+        for skill in skills:
+            # Multi-word skills need every word in the same resume.
+            rows = None
+            for word in skill.split():
+                found = self.skill_index.get(word, empty)
+                rows = found if rows is None else np.intersect1d(rows, found, assume_unique=True)
+            if rows is not None and len(rows):
+                hits[rows] += 1
+
+        return hits
+
+
+def _skill_vocabulary():
+    rows = db.session.query(JobPosition.skills).filter(
+        JobPosition.status == "Approved"
+    ).all()
+
+    vocabulary = set()
+    for (skills,) in rows:
+        for skill in tokenize_skills(skills):
+            vocabulary.update(skill.split())
+    return vocabulary
+
+
+def _build_student_columns():
+    rows = db.session.query(
+        Student.id, Student.name, Student.cgpa, Student.department, ResumeFile.text
+    ).outerjoin(
+        ResumeFile, ResumeFile.filename == Student.resume
+    ).filter(
+        Student.is_active.is_(True)
+    ).order_by(Student.id).all()
+
+    department_names = sorted({normalize_department(row.department) for row in rows})
+    codes = {name: code for code, name in enumerate(department_names)}
+
+    # Inverted index from skill word to the rows whose resume mentions
+    # it, restricted to words some approved job actually asks for.
+    vocabulary = _skill_vocabulary()
+    postings = {}
+    for position, row in enumerate(rows):
+        if row.text:
+            for word in _text_tokens(row.text) & vocabulary:
+                postings.setdefault(word, []).append(position)
+
+    return StudentColumns(
+        ids=np.array([row.id for row in rows], dtype=np.int64),
+        names=[row.name for row in rows],
+        cgpa=np.array([row.cgpa if row.cgpa is not None else np.nan for row in rows], dtype=np.float64),
+        departments=np.array([codes[normalize_department(row.department)] for row in rows], dtype=np.int32),
+        department_names=department_names,
+        skill_index={word: np.array(found, dtype=np.int64) for word, found in postings.items()},
+    )
+
+
+def student_columns():
+    return cache.get_or_set(
+        "matching:students", _build_student_columns,
+        tags=("students", "jobs"), timeout=current_app.config.get("MATCH_CACHE_TIMEOUT", 300)
+    )
+
+
+class JobColumns:
+
+    def __init__(self, ids, min_cgpa, department_mask, restricted, skill_job, skill_names):
+        self.ids = ids
+        self.min_cgpa = min_cgpa
+        self.department_mask = department_mask
+        self.restricted = restricted
+        self.skill_job = skill_job
+        self.skill_names = skill_names
+
+
+def _build_job_columns(department_names):
+    jobs = JobPosition.query.filter(
+        JobPosition.status == "Approved",
+        JobPosition.deadline >= date.today()
+    ).order_by(JobPosition.id).all()
+
+    known = set(department_names)
+    codes = {name: code for code, name in enumerate(department_names)}
+
+    min_cgpa = np.full(len(jobs), -np.inf)
+    department_mask = np.zeros((len(jobs), max(len(department_names), 1)), dtype=bool)
+    restricted = np.zeros(len(jobs), dtype=bool)
+    skill_job, skill_names = [], []
+
+    for row, job in enumerate(jobs):
+        criteria = parse_eligibility(job.eligibility, known)
+        if criteria.min_cgpa is not None:
+            min_cgpa[row] = criteria.min_cgpa
+        if criteria.departments:
+            restricted[row] = True
+            for department in criteria.departments:
+                department_mask[row, codes[department]] = True
+        for skill in tokenize_skills(job.skills):
+            skill_job.append(row)
+            skill_names.append(skill)
+
+    return JobColumns(
+        ids=np.array([job.id for job in jobs], dtype=np.int64),
+        min_cgpa=min_cgpa,
+        department_mask=department_mask,
+        restricted=restricted,
+        skill_job=np.array(skill_job, dtype=np.int64),
+        skill_names=skill_names,
+    )
+
+
+def job_columns(department_names):
+    return cache.get_or_set(
+        f"matching:jobs:{date.today()}:{'|'.join(department_names)}",
+        lambda: _build_job_columns(department_names),
+        tags=("jobs",), timeout=current_app.config.get("MATCH_CACHE_TIMEOUT", 300)
+    )
+
+
+# ---------------- SCORING ----------------
+
+def candidates_for_job(job, limit=None):
+    students = student_columns()
+    if not len(students.ids):
+        return []
+
+    criteria = parse_eligibility(job.eligibility, set(students.department_names))
+    eligible = np.ones(len(students.ids), dtype=bool)
+
+    if criteria.min_cgpa is not None:
+        # NaN (no CGPA on file) compares False and drops out.
+        eligible &= students.cgpa >= criteria.min_cgpa
+
+    if criteria.departments:
+        eligible &= np.isin(students.departments, students.department_codes(criteria.departments))
+
+    skills = tokenize_skills(job.skills)
+    skill_score = students.skill_hits(skills) / len(skills) if skills else np.zeros(len(students.ids))
+
+    rows = np.flatnonzero(eligible)
+    cgpa = np.nan_to_num(students.cgpa[rows], nan=0.0)
+    # Best skill match first, CGPA breaks ties.
+    order = rows[np.lexsort((-cgpa, -skill_score[rows]))]
+
+    limit = limit or current_app.config.get("MATCH_LIMIT", 200)
+    return [
+        {
+            "student_id": int(students.ids[i]),
+            "name": students.names[i],
+            "cgpa": None if np.isnan(students.cgpa[i]) else float(students.cgpa[i]),
+            "department": students.department_names[students.departments[i]],
+            "skill_match": float(skill_score[i]),
+        }
+        for i in order[:limit]
+    ]
+
+
+def eligible_job_ids(student, resume_text=None):
+    students = student_columns()
+    jobs = job_columns(students.department_names)
+    if not len(jobs.ids):
+        return []
+
+    eligible = np.ones(len(jobs.ids), dtype=bool)
+
+    if student.cgpa is None:
+        eligible &= np.isneginf(jobs.min_cgpa)
+    else:
+        eligible &= jobs.min_cgpa <= student.cgpa
+
+    department = normalize_department(student.department)
+    if department in students.department_names:
+        code = students.department_names.index(department)
+        eligible &= ~jobs.restricted | jobs.department_mask[:, code]
+    else:
+        eligible &= ~jobs.restricted
+
+    tokens = _text_tokens(resume_text)
+    hits = np.array([_has_skill(skill, tokens) for skill in jobs.skill_names], dtype=np.float64)
+    matched = np.bincount(jobs.skill_job, weights=hits, minlength=len(jobs.ids))
+    totals = np.bincount(jobs.skill_job, minlength=len(jobs.ids))
+    skill_score = np.divide(matched, totals, out=np.zeros(len(jobs.ids)), where=totals > 0)
+
+    rows = np.flatnonzero(eligible)
+    order = rows[np.argsort(-skill_score[rows], kind="stable")]
+    return [(int(jobs.ids[i]), float(skill_score[i])) for i in order]
@@ -0,0 +1,210 @@
+import click
+from datetime import datetime, date
+from sqlalchemy import text, inspect
+from db import db
+from models import (Company, JobPosition, Application, Placement, ResumeFile,
+                    AnalyticsJob, AnalyticsDepartment, AnalyticsDirty, IdempotencyKey,
+                    OutboxMessage, ArchivedJobPosition, ArchivedApplication, ArchivedPlacement,
+                    InterviewPanel, InterviewSlot, InterviewBooking)
+from search import create_search_index
+from stats import rebuild_counters
+import analytics
+from tenants import all_tenants, tenant_context
+
+# Versioned schema migrations. Each step runs in its own transaction and
+# is written to be safe on a database that already has some of its
+# objects, so a fresh database (built by step 1 from the current models)
+# and an old one converge on the same schema.
+
+
+def _base_schema(connection):
+    db.metadata.create_all(connection)
+
+
+def _hot_column_indexes(connection):
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("ANALYZE"))
+
+
+def _placement_analytics(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("job_position")}
+    if "salary_value" not in columns:
+        connection.execute(text("ALTER TABLE job_position ADD COLUMN salary_value FLOAT"))
+
+    for model in (AnalyticsJob, AnalyticsDepartment, AnalyticsDirty):
+        model.__table__.create(connection, checkfirst=True)
+        for index in model.__table__.indexes:
+            index.create(connection, checkfirst=True)
+
+    analytics.rebuild(connection)
+
+
+ROW_VERSION_SOURCES = {
+    "company": "created_at",
+    "student": None,
+    "job_position": "posted_date",
+    "application": "applied_on",
+}
+
+
+def _row_versions(connection):
+    now = datetime.utcnow()
+
+    for table, source in ROW_VERSION_SOURCES.items():
+        columns = {column["name"] for column in inspect(connection).get_columns(table)}
+        if "updated_on" not in columns:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN updated_on DATETIME"))
+
+        fallback = f"COALESCE({source}, :now)" if source else ":now"
+        connection.execute(
+            text(f"UPDATE {table} SET updated_on = {fallback} WHERE updated_on IS NULL"),
+            {"now": now}
+        )
+
+
+def _season_archive(connection):
+    for model in (ArchivedJobPosition, ArchivedApplication, ArchivedPlacement):
+        model.__table__.create(connection, checkfirst=True)
+
+
+def _interview_scheduling(connection):
+    for model in (InterviewPanel, InterviewSlot, InterviewBooking):
+        model.__table__.create(connection, checkfirst=True)
+
+
+MIGRATIONS = [
+    (1, "base schema", _base_schema),
+    (2, "hot column indexes", _hot_column_indexes),
+    (3, "full-text search", create_search_index),
+    (4, "dashboard counters", rebuild_counters),
+    (5, "resume files", lambda connection: ResumeFile.__table__.create(connection, checkfirst=True)),
+    (6, "placement analytics", _placement_analytics),
+    (7, "row versions", _row_versions),
+    (8, "idempotency keys", lambda connection: IdempotencyKey.__table__.create(connection, checkfirst=True)),
+    (9, "notification outbox", lambda connection: OutboxMessage.__table__.create(connection, checkfirst=True)),
+    (10, "season archive", _season_archive),
+    (11, "interview scheduling", _interview_scheduling),
+]
+
+
+def current_version(connection):
+    if not inspect(connection).has_table("schema_version"):
+        return 0
+
+    return connection.execute(
+        text("SELECT MAX(version) FROM schema_version")
+    ).scalar() or 0
+
+
+def upgrade(engine=None):
+    engine = engine or db.engine
+
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER PRIMARY KEY, name VARCHAR(100), applied_on DATETIME)"
+        ))
+        version = current_version(connection)
+
+    applied = []
+
+    for number, name, step in MIGRATIONS:
+        if number <= version:
+            continue
+
+        with engine.begin() as connection:
+            step(connection)
+            connection.execute(
+                text("INSERT INTO schema_version (version, name, applied_on) "
+                     "VALUES (:version, :name, :applied_on)"),
+                {"version": number, "name": name, "applied_on": datetime.utcnow()}
+            )
+
+        applied.append(name)
+
+    return applied
+
+
+# ---------------- QUERY PLANS ----------------
+
+# The filters and orderings the routes run on every request. Each one
+# must be answered from an index; a plain "SCAN <table>" means a full
+# table scan crept back in.
+
+def hot_queries():
+    today = date.today()
+
+    return {
+        "pending companies": Company.query.filter_by(is_approved=False),
+        "active drives": JobPosition.query.filter(
+            JobPosition.status == "Approved",
+            JobPosition.deadline >= today
+        ).order_by(JobPosition.posted_date.desc()).limit(5),
+        "approved jobs": JobPosition.query.filter_by(
+            status="Approved"
+        ).order_by(JobPosition.posted_date.desc(), JobPosition.id.desc()).limit(26),
+        "latest jobs": JobPosition.query.order_by(
+            JobPosition.posted_date.desc(), JobPosition.id.desc()
+        ).limit(26),
+        "company jobs": JobPosition.query.filter_by(company_id=1),
+        "student applications": Application.query.filter_by(student_id=1),
+        "job applications": Application.query.filter_by(job_position_id=1),
+        "job applications by status": Application.query.filter_by(
+            job_position_id=1, status="Applied"
+        ),
+        "application placement": Placement.query.filter_by(application_id=1),
+    }
+
+
+def full_scans():
+    problems = {}
+
+    for name, query in hot_queries().items():
+        statement = query.statement.compile(
+            db.engine, compile_kwargs={"literal_binds": True}
+        )
+        plan = db.session.execute(
+            text("EXPLAIN QUERY PLAN " + str(statement))
+        ).all()
+
+        scans = [
+            row[3] for row in plan
+            if row[3].startswith("SCAN") and "USING" not in row[3]
+        ]
+        if scans:
+            problems[name] = scans
+
+    return problems
+
+
+def init_app(app):
+
+    @app.cli.command("db-upgrade")
+    def db_upgrade_command():
+        # The default database, then each tenant's.
+        for tenant in all_tenants(app):
+            with tenant_context(app, tenant):
+                applied = upgrade()
+            label = f"[{tenant}] " if tenant else ""
+            for name in applied:
+                click.echo(f"{label}Applied: {name}")
+        click.echo("Database is up to date.")
+
+    @app.cli.command("check-query-plans")
+    def check_query_plans_command():
+        if db.engine.dialect.name != "sqlite":
+            click.echo("Query plan check only supports SQLite.")
+            return
+
+        problems = full_scans()
+        for name, scans in problems.items():
+            click.echo(f"{name}: {'; '.join(scans)}")
+
+        if problems:
+            raise SystemExit(1)
+
+        click.echo("All hot queries use an index.")
@@ -22,9 +22,20 @@ class Company(db.Model):
     is_blacklisted = db.Column(db.Boolean, default=False)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # row version for API ETags; bumped on every UPDATE, Core ones included
+    updated_on = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     job_positions = db.relationship("JobPosition", backref="company", lazy=True)
 
+    __table_args__ = (
+        # Only the (few) companies awaiting approval are indexed.
+        db.Index(
+            "ix_company_pending", "id",
+            sqlite_where=db.text("is_approved = 0"),
+            postgresql_where=db.text("is_approved = false")
+        ),
+    )
+
 
 
 class Student(db.Model):
@@ -39,6 +50,8 @@ class Student(db.Model):
 
     is_active = db.Column(db.Boolean, default=True)
 
+    updated_on = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
     applications = db.relationship("Application", backref="student", lazy=True)
 
 
@@ -57,12 +70,23 @@ class JobPosition(db.Model):
     skills = db.Column(db.String(200))
     experience = db.Column(db.String(50))
     salary = db.Column(db.String(50))
+    # salary parsed to rupees per year, filled in by analytics.py
+    salary_value = db.Column(db.Float)
 
     status = db.Column(db.String(20), default="Pending")
     # Pending / Approved / Closed
 
+    updated_on = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
     applications = db.relationship("Application", backref="job_position", lazy=True)
 
+    __table_args__ = (
+        db.Index("ix_job_position_company", "company_id", "posted_date"),
+        db.Index("ix_job_position_status_posted", "status", "posted_date", "id"),
+        db.Index("ix_job_position_posted", "posted_date", "id"),
+        db.Index("ix_job_position_status_deadline", "status", "deadline"),
+    )
+
 
 
 
@@ -76,9 +100,12 @@ class Application(db.Model):
     # Applied / Shortlisted / Selected / Rejected
 
     applied_on = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_on = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
         db.UniqueConstraint("student_id", "job_position_id", name="unique_application"),
+        # student_id lookups are served by the unique constraint above.
+        db.Index("ix_application_job_status", "job_position_id", "status"),
     )
     
     placement = db.relationship("Placement", backref="application", uselist=False, lazy=True)
@@ -88,8 +115,192 @@ class Application(db.Model):
 class Placement(db.Model):
     id = db.Column(db.Integer, primary_key=True)
 
-    application_id = db.Column(db.Integer, db.ForeignKey("application.id"), nullable=False)
+    application_id = db.Column(db.Integer, db.ForeignKey("application.id"), nullable=False, index=True)
     
     # This table might be redundant if we strictly use Application, but kept for clarity/analytics.
     
     placed_on = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+
+class StatCounter(db.Model):
+    # Denormalised dashboard counters, kept current by stats.py.
+    key = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+
+
+class ResumeFile(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Content addressed: "<sha256>.<ext>", shared by identical uploads.
+    filename = db.Column(db.String(200), unique=True, nullable=False)
+    size = db.Column(db.Integer)
+
+    page_count = db.Column(db.Integer)
+    text = db.Column(db.Text)
+
+    status = db.Column(db.String(20), default="Pending")
+    # Pending / Processed / Failed
+
+    uploaded_on = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+
+class IdempotencyKey(db.Model):
+    # "<student_id>:<client key>" -> what the first apply with it did.
+    key = db.Column(db.String(150), primary_key=True)
+    student_id = db.Column(db.Integer, nullable=False)
+    job_position_id = db.Column(db.Integer, nullable=False)
+    outcome = db.Column(db.String(20))
+    created_on = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+
+class OutboxMessage(db.Model):
+    # Notifications waiting to be emailed, written in the same transaction
+    # as the change they describe and sent by outbox.py.
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False, index=True)
+    message = db.Column(db.Text, nullable=False)
+
+    status = db.Column(db.String(20), nullable=False, default="Pending")
+    # Pending / Sent / Failed
+
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_on = db.Column(db.DateTime, default=datetime.utcnow)
+    last_error = db.Column(db.Text)
+
+    created_on = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_on = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("ix_outbox_message_due", "status", "next_attempt_on"),
+    )
+
+
+
+# Interview scheduling (interviews.py). A job has panels, each panel a run
+# of time slots, and a slot holds at most one booked application.
+
+class InterviewPanel(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    job_position_id = db.Column(db.Integer, db.ForeignKey("job_position.id"), nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    room = db.Column(db.String(100))
+
+
+
+class InterviewSlot(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    panel_id = db.Column(db.Integer, db.ForeignKey("interview_panel.id"), nullable=False)
+    starts_on = db.Column(db.DateTime, nullable=False)
+    ends_on = db.Column(db.DateTime, nullable=False)
+
+    status = db.Column(db.String(20), nullable=False, default="Open")
+    # Open / Cancelled
+
+    __table_args__ = (
+        db.Index("ix_interview_slot_panel_start", "panel_id", "starts_on"),
+    )
+
+
+
+class InterviewBooking(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    application_id = db.Column(db.Integer, db.ForeignKey("application.id"), nullable=False, unique=True)
+    slot_id = db.Column(db.Integer, db.ForeignKey("interview_slot.id"), nullable=False, unique=True)
+
+    # copied from the application and slot, so a student's other
+    # interviews are found without joins
+    student_id = db.Column(db.Integer, nullable=False)
+    starts_on = db.Column(db.DateTime, nullable=False)
+    ends_on = db.Column(db.DateTime, nullable=False)
+
+    created_on = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_interview_booking_student_start", "student_id", "starts_on"),
+    )
+
+
+
+# Past seasons, moved out of the hot tables by archive.py. Same columns and
+# ids as the live rows; no foreign keys, as the company or student may
+# since have been removed.
+
+class ArchivedJobPosition(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, nullable=False, index=True)
+
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    eligibility = db.Column(db.String(200))
+    deadline = db.Column(db.Date)
+    posted_date = db.Column(db.DateTime)
+
+    skills = db.Column(db.String(200))
+    experience = db.Column(db.String(50))
+    salary = db.Column(db.String(50))
+    salary_value = db.Column(db.Float)
+
+    status = db.Column(db.String(20))
+    updated_on = db.Column(db.DateTime)
+
+    archived_on = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+
+class ArchivedApplication(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, nullable=False, index=True)
+    job_position_id = db.Column(db.Integer, nullable=False, index=True)
+
+    status = db.Column(db.String(20))
+    applied_on = db.Column(db.DateTime)
+    updated_on = db.Column(db.DateTime)
+
+    archived_on = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+
+class ArchivedPlacement(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    application_id = db.Column(db.Integer, nullable=False, index=True)
+    placed_on = db.Column(db.DateTime)
+
+    archived_on = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+
+# Materialised analytics, maintained by analytics.py.
+
+class AnalyticsJob(db.Model):
+    job_position_id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, nullable=False, index=True)
+
+    applied = db.Column(db.Integer, nullable=False, default=0)
+    shortlisted = db.Column(db.Integer, nullable=False, default=0)
+    interview = db.Column(db.Integer, nullable=False, default=0)
+    selected = db.Column(db.Integer, nullable=False, default=0)
+    placed = db.Column(db.Integer, nullable=False, default=0)
+    rejected = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+    # sum over placements of days from application to placement
+    placement_days = db.Column(db.Float, nullable=False, default=0)
+    placements = db.Column(db.Integer, nullable=False, default=0)
+
+
+
+class AnalyticsDepartment(db.Model):
+    department = db.Column(db.String(50), primary_key=True)
+    students = db.Column(db.Integer, nullable=False, default=0)
+    placed_students = db.Column(db.Integer, nullable=False, default=0)
+
+
+
+class AnalyticsDirty(db.Model):
+    # Rows waiting to be recomputed: ("job", <id>) or ("departments", 0).
+    kind = db.Column(db.String(20), primary_key=True)
+    ref = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,255 @@
+import smtplib
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from flask import current_app
+from sqlalchemy import DateTime, select, update, delete, insert, literal, func
+from db import db
+from models import Company, Student, JobPosition, Application, OutboxMessage
+from scheduler import task
+
+# Email notifications through a transactional outbox. A state change adds
+# its messages to outbox_message in the same transaction, with a single
+# INSERT (... SELECT for the recipients), so the request never waits on
+# SMTP and a rolled back change never sends mail. The send-notifications
+# task drains the outbox in batches: every pending message for a recipient
+# goes out as one digest, all digests of a batch share one SMTP
+# connection, and failures are retried with exponential backoff until
+# OUTBOX_MAX_ATTEMPTS.
+
+COMPANY_MESSAGES = {
+    "approve": "Your company account has been approved. You can now post jobs.",
+    "reject": "Your company registration has been rejected.",
+    "blacklist": "Your company account has been suspended.",
+    "whitelist": "Your company account has been reinstated.",
+}
+
+JOB_MESSAGES = {
+    "approve": "was approved and is now visible to students.",
+    "reject": "was rejected.",
+}
+
+
+def _enabled():
+    return current_app.config.get("NOTIFICATIONS_ENABLED", True)
+
+
+def _from_select(rows):
+    now = literal(datetime.utcnow(), DateTime)
+    db.session.execute(
+        insert(OutboxMessage).from_select(
+            ["recipient", "message", "status", "attempts", "next_attempt_on", "created_on"],
+            rows.add_columns(literal("Pending"), literal(0), now, now)
+        )
+    )
+
+
+def queue_application_changes(application_ids, status):
+    # Call before the UPDATE: only applications not yet in `status` notify.
+    if not _enabled():
+        return
+
+    _from_select(
+        select(
+            Student.email,
+            "Your application for " + JobPosition.title + " at " + Company.name
+            + " is now " + literal(status) + "."
+        ).select_from(Application).join(
+            Student, Student.id == Application.student_id
+        ).join(
+            JobPosition, JobPosition.id == Application.job_position_id
+        ).join(
+            Company, Company.id == JobPosition.company_id
+        ).where(
+            Application.id.in_(application_ids), Application.status != status
+        )
+    )
+
+
+def queue_job_change(job_id, action):
+    if not _enabled() or action not in JOB_MESSAGES:
+        return
+
+    _from_select(
+        select(
+            Company.email,
+            "Your job posting " + JobPosition.title + " " + literal(JOB_MESSAGES[action])
+        ).select_from(JobPosition).join(
+            Company, Company.id == JobPosition.company_id
+        ).where(JobPosition.id == job_id)
+    )
+
+
+def queue_company_change(company, action):
+    if not _enabled() or action not in COMPANY_MESSAGES:
+        return
+
+    db.session.add(OutboxMessage(recipient=company.email, message=COMPANY_MESSAGES[action]))
+
+
+# ---------------- DISPATCH ----------------
+
+def _claim(now, batch_size):
+    # Take every due message of up to batch_size recipients. Pushing
+    # next_attempt_on past the lease keeps other dispatchers off them, and
+    # brings them back if this one dies mid-send.
+    recipients = select(OutboxMessage.recipient).where(
+        OutboxMessage.status == "Pending", OutboxMessage.next_attempt_on <= now
+    ).group_by(OutboxMessage.recipient).order_by(
+        func.min(OutboxMessage.id)
+    ).limit(batch_size).scalar_subquery()
+
+    lease = timedelta(seconds=current_app.config.get("OUTBOX_LEASE", 300))
+    rows = db.session.execute(
+        update(OutboxMessage).where(
+            OutboxMessage.recipient.in_(recipients),
+            OutboxMessage.status == "Pending",
+            OutboxMessage.next_attempt_on <= now
+        ).values(
+            attempts=OutboxMessage.attempts + 1, next_attempt_on=now + lease
+        ).returning(
+            OutboxMessage.id, OutboxMessage.recipient, OutboxMessage.message,
+            OutboxMessage.attempts
+        )
+    ).all()
+    db.session.commit()
+
+    digests = defaultdict(list)
+    for row in sorted(rows, key=lambda row: row.id):
+        digests[row.recipient].append(row)
+    return digests
+
+
+def _digest(recipient, messages):
+    email = EmailMessage()
+    email["From"] = current_app.config.get("MAIL_SENDER", "placements@localhost")
+    email["To"] = recipient
+    if len(messages) == 1:
+        email["Subject"] = "Placement Portal update"
+    else:
+        email["Subject"] = f"Placement Portal: {len(messages)} updates"
+
+    lines = "\n".join(f"- {row.message}" for row in messages)
+    email.set_content(f"Hello,\n\n{lines}\n\nPlacement Portal\n")
+    return email
+
+
+def _connect():
+    config = current_app.config
+    smtp = smtplib.SMTP(
+        config.get("MAIL_SERVER", "localhost"), config.get("MAIL_PORT", 25),
+        timeout=config.get("MAIL_TIMEOUT", 10)
+    )
+    if config.get("MAIL_USE_TLS"):
+        smtp.starttls()
+    if config.get("MAIL_USERNAME"):
+        smtp.login(config["MAIL_USERNAME"], config.get("MAIL_PASSWORD") or "")
+    return smtp
+
+
+def _send_all(digests):
+    # -> ({recipient: None or error}); one connection for the batch.
+    results = {}
+    smtp = None
+    try:
+        for recipient, messages in digests.items():
+            try:
+                if smtp is None:
+                    smtp = _connect()
+                smtp.send_message(_digest(recipient, messages))
+                results[recipient] = None
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+                    smtplib.SMTPDataError) as error:
+                # The server said no to this message only.
+                results[recipient] = repr(error)
+            except (smtplib.SMTPException, OSError) as error:
+                # Connection trouble: everything not yet sent waits for a retry.
+                for pending in digests:
+                    results.setdefault(pending, repr(error))
+                break
+    finally:
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+    return results
+
+
+def _record(digests, results, now):
+    config = current_app.config
+    max_attempts = config.get("OUTBOX_MAX_ATTEMPTS", 8)
+    base = config.get("OUTBOX_RETRY_DELAY", 60)
+    ceiling = config.get("OUTBOX_RETRY_MAX_DELAY", 3600)
+
+    sent_ids = []
+    for recipient, messages in digests.items():
+        error = results.get(recipient)
+        if error is None:
+            sent_ids.extend(row.id for row in messages)
+            continue
+
+        for row in messages:
+            if row.attempts >= max_attempts:
+                values = {"status": "Failed"}
+            else:
+                delay = min(ceiling, base * 2 ** (row.attempts - 1))
+                values = {"next_attempt_on": now + timedelta(seconds=delay)}
+            db.session.execute(
+                update(OutboxMessage).where(OutboxMessage.id == row.id).values(
+                    last_error=error, **values
+                )
+            )
+
+    if sent_ids:
+        db.session.execute(
+            update(OutboxMessage).where(OutboxMessage.id.in_(sent_ids)).values(
+                status="Sent", sent_on=now
+            )
+        )
+    db.session.commit()
+    return len(sent_ids)
+
+
+def dispatch(now=None, batch_size=None, max_batches=None):
+    # now: naive UTC, like the outbox columns.
+    config = current_app.config
+    now = now or datetime.utcnow()
+    batch_size = batch_size or config.get("OUTBOX_BATCH_SIZE", 100)
+    max_batches = max_batches or config.get("OUTBOX_MAX_BATCHES", 10)
+
+    sent = 0
+    for _ in range(max_batches):
+        digests = _claim(now, batch_size)
+        if not digests:
+            break
+        results = _send_all(digests)
+        sent += _record(digests, results, now)
+        if any(results.values()):
+            # The server is struggling; leave the rest for the next run.
+            break
+    return sent
+
+
+# Outbox times are UTC; the scheduler's clock is local.
+
+def _utc(now):
+    return now.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@task("send-notifications")
+def send_notifications(now):
+    return dispatch(_utc(now))
+
+
+@task("purge-outbox")
+def purge_outbox(now):
+    keep = timedelta(days=current_app.config.get("OUTBOX_RETENTION_DAYS", 30))
+    result = db.session.execute(
+        delete(OutboxMessage).where(
+            OutboxMessage.status != "Pending",
+            OutboxMessage.created_on < _utc(now) - keep
+        )
+    )
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,153 @@
+import base64
+import json
+from datetime import date, datetime
+from flask import request, url_for, current_app
+from sqlalchemy import tuple_
+
+# Keyset (seek) pagination. Pages are addressed by the sort key of the
+# last/first row shown instead of an OFFSET, so every page is an index
+# range scan of at most per_page + 1 rows no matter how deep it is.
+
+
+def encode_cursor(values):
+    raw = json.dumps([
+        v.isoformat() if isinstance(v, (date, datetime)) else v
+        for v in values
+    ])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, columns):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        return None
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        return None
+
+    decoded = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        try:
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            else:
+                value = python_type(value)
+        except (TypeError, ValueError):
+            return None
+        decoded.append(value)
+
+    return decoded
+
+
+def page_size():
+    default = current_app.config.get("PAGE_SIZE", 25)
+    maximum = current_app.config.get("MAX_PAGE_SIZE", 100)
+
+    try:
+        size = int(request.args.get("per_page", default))
+    except ValueError:
+        size = default
+
+    return max(1, min(size, maximum))
+
+
+class KeysetPage:
+
+    def __init__(self, items, columns, per_page, has_next, has_prev, keys=None):
+        self.items = items
+        self.columns = columns
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.keys = keys
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def _key(self, index):
+        if self.keys is not None:
+            return list(self.keys[index])
+        return [getattr(self.items[index], column.key) for column in self.columns]
+
+    def _url(self, **cursor):
+        args = request.args.to_dict()
+        args.pop("after", None)
+        args.pop("before", None)
+        args.update(cursor)
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    @property
+    def next_url(self):
+        if not self.has_next or not self.items:
+            return None
+        return self._url(after=encode_cursor(self._key(-1)))
+
+    @property
+    def prev_url(self):
+        if not self.has_prev or not self.items:
+            return None
+        return self._url(before=encode_cursor(self._key(0)))
+
+
+def _seek(columns, values, descending, forward):
+    if len(columns) == 1:
+        left, right = columns[0], values[0]
+    else:
+        left, right = tuple_(*columns), tuple_(*values)
+
+    if descending == forward:
+        return left < right
+    return left > right
+
+
+def paginate(query, *columns, descending=False, split=None):
+    # split(row) -> (item, sort values), for sorting on columns that are
+    # not attributes of the item, such as a search score.
+    per_page = page_size()
+    after = request.args.get("after")
+    before = request.args.get("before")
+
+    forward = True
+    cursor = None
+
+    if before:
+        cursor = decode_cursor(before, columns)
+        forward = cursor is None
+
+    if cursor is None and after:
+        cursor = decode_cursor(after, columns)
+
+    if cursor is not None:
+        query = query.filter(_seek(columns, cursor, descending, forward))
+
+    if descending == forward:
+        order = [column.desc() for column in columns]
+    else:
+        order = [column.asc() for column in columns]
+
+    rows = query.order_by(*order).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    keys = None
+    if split is not None:
+        pairs = [split(row) for row in rows]
+        rows = [item for item, _ in pairs]
+        keys = [key for _, key in pairs]
+
+    if forward:
+        return KeysetPage(rows, columns, per_page,
+                          has_next=has_more, has_prev=cursor is not None, keys=keys)
+
+    return KeysetPage(rows, columns, per_page,
+                      has_next=True, has_prev=has_more, keys=keys)
@@ -0,0 +1,248 @@
+import hmac
+import math
+import threading
+import time
+from collections import Counter, deque
+from flask import (Blueprint, Response, current_app, g, has_app_context, render_template,
+                   request, redirect, url_for, before_render_template, template_rendered)
+from sqlalchemy import event
+from db import db, ENGINE_HOOKS
+from identity import current_identity
+
+metrics_bp = Blueprint("metrics", __name__, url_prefix="/admin/metrics")
+
+# Request profiling. When PROFILING_ENABLED is set, every request records
+# its wall time, how many SQL statements it ran and how long they took
+# (cursor events), and time spent rendering templates. Statements repeated
+# more than PROFILING_N_PLUS_ONE times in one request are logged as likely
+# N+1 queries. Nothing is hooked up when profiling is off.
+#
+# Figures are per process; each worker reports its own.
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class RequestProfile:
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_starts = []
+        self.statements = Counter()
+
+
+class EndpointMetrics:
+
+    def __init__(self, sample_size):
+        self.count = 0
+        self.total_time = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.n_plus_one = 0
+        self.durations = deque(maxlen=sample_size)
+        self.repeated = Counter()
+
+    def quantile(self, q):
+        if not self.durations:
+            return 0.0
+        ordered = sorted(self.durations)
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class Metrics:
+
+    def __init__(self, sample_size=1000):
+        self.sample_size = sample_size
+        self.endpoints = {}
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, profile, duration, repeated):
+        with self.lock:
+            metrics = self.endpoints.get(endpoint)
+            if metrics is None:
+                metrics = self.endpoints[endpoint] = EndpointMetrics(self.sample_size)
+
+            metrics.count += 1
+            metrics.total_time += duration
+            metrics.sql_count += profile.sql_count
+            metrics.sql_time += profile.sql_time
+            metrics.template_time += profile.template_time
+            metrics.durations.append(duration)
+            if repeated:
+                metrics.n_plus_one += 1
+                metrics.repeated.update(repeated)
+
+    def snapshot(self):
+        with self.lock:
+            return sorted(self.endpoints.items())
+
+    def reset(self):
+        with self.lock:
+            self.endpoints.clear()
+
+
+metrics = Metrics()
+
+
+def _current_profile():
+    return getattr(g, "_profile", None) if has_app_context() else None
+
+
+# ---------------- HOOKS ----------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile() is not None:
+        context._profile_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile()
+    start = getattr(context, "_profile_start", None)
+    if profile is None or start is None:
+        return
+
+    profile.sql_time += time.perf_counter() - start
+    profile.sql_count += 1
+    profile.statements[statement] += 1
+
+
+def _before_render(sender, template, context, **extra):
+    profile = _current_profile()
+    if profile is not None:
+        profile.template_starts.append(time.perf_counter())
+
+
+def _rendered(sender, template, context, **extra):
+    profile = _current_profile()
+    if profile is not None and profile.template_starts:
+        profile.template_time += time.perf_counter() - profile.template_starts.pop()
+
+
+def _start_profile():
+    g._profile = RequestProfile()
+
+
+def _finish_profile(response):
+    profile = g.pop("_profile", None)
+    if profile is None:
+        return response
+
+    duration = time.perf_counter() - profile.start
+    threshold = current_app.config.get("PROFILING_N_PLUS_ONE", 10)
+    repeated = {
+        statement: count for statement, count in profile.statements.items()
+        if count > threshold
+    }
+    endpoint = request.endpoint or "<unmatched>"
+
+    for statement, count in repeated.items():
+        current_app.logger.warning(
+            "Possible N+1 in %s: statement ran %d times: %s",
+            endpoint, count, " ".join(statement.split())[:200]
+        )
+
+    metrics.record(endpoint, profile, duration, repeated)
+
+    response.headers["Server-Timing"] = (
+        f"sql;dur={profile.sql_time * 1000:.1f};desc=\"{profile.sql_count} queries\", "
+        f"tpl;dur={profile.template_time * 1000:.1f}, "
+        f"total;dur={duration * 1000:.1f}"
+    )
+    return response
+
+
+# ---------------- REPORTING ----------------
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"")
+
+
+def prometheus_text():
+    lines = [
+        "# TYPE placement_request_duration_seconds summary",
+    ]
+    rows = metrics.snapshot()
+
+    for endpoint, m in rows:
+        label = f'endpoint="{_label(endpoint)}"'
+        for q in QUANTILES:
+            lines.append(f'placement_request_duration_seconds{{{label},quantile="{q}"}} {m.quantile(q):.6f}')
+        lines.append(f"placement_request_duration_seconds_sum{{{label}}} {m.total_time:.6f}")
+        lines.append(f"placement_request_duration_seconds_count{{{label}}} {m.count}")
+
+    for name, attribute, kind in (
+        ("placement_sql_queries_total", "sql_count", "counter"),
+        ("placement_sql_seconds_total", "sql_time", "counter"),
+        ("placement_template_seconds_total", "template_time", "counter"),
+        ("placement_n_plus_one_requests_total", "n_plus_one", "counter"),
+    ):
+        lines.append(f"# TYPE {name} {kind}")
+        for endpoint, m in rows:
+            lines.append(f'{name}{{endpoint="{_label(endpoint)}"}} {getattr(m, attribute)}')
+
+    return "\n".join(lines) + "\n"
+
+
+def _allowed():
+    identity = current_identity()
+    if identity is not None and identity.role == "admin" and identity.active:
+        return True
+
+    # Lets a Prometheus scraper in without an admin session.
+    token = current_app.config.get("METRICS_TOKEN")
+    return bool(token) and hmac.compare_digest(
+        request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()
+    )
+
+
+@metrics_bp.route("/")
+def metrics_page():
+    if not _allowed():
+        return redirect(url_for("index"))
+
+    return render_template(
+        "admin/metrics.html",
+        enabled=current_app.config.get("PROFILING_ENABLED", False),
+        endpoints=metrics.snapshot(),
+        quantiles=QUANTILES
+    )
+
+
+@metrics_bp.route("/prometheus")
+def metrics_prometheus():
+    if not _allowed():
+        return Response("Forbidden\n", status=403, mimetype="text/plain")
+    return Response(prometheus_text(), mimetype="text/plain; version=0.0.4")
+
+
+def _instrument(app, engine):
+    if not app.config.get("PROFILING_ENABLED"):
+        return
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def init_app(app):
+    app.register_blueprint(metrics_bp)
+
+    metrics.sample_size = app.config.get("PROFILING_SAMPLE_SIZE", 1000)
+
+    if not app.config.get("PROFILING_ENABLED"):
+        return
+
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            _instrument(app, engine)
+
+    if _instrument not in ENGINE_HOOKS:
+        ENGINE_HOOKS.append(_instrument)
@@ -0,0 +1,53 @@
+from sqlalchemy.orm import joinedload, selectinload
+from models import JobPosition, Application
+
+# Loaders for the listing views. Each one pulls the related rows the
+# template walks in a fixed number of statements, so page cost does not
+# grow with the number of jobs or applicants.
+
+
+def jobs_with_company():
+    return JobPosition.query.options(
+        joinedload(JobPosition.company)
+    )
+
+
+def company_jobs_with_applicants(company_id):
+    return JobPosition.query.filter_by(
+        company_id=company_id
+    ).options(
+        selectinload(JobPosition.applications).joinedload(Application.student)
+    )
+
+
+def applications_with_details():
+    return Application.query.options(
+        joinedload(Application.student),
+        joinedload(Application.job_position).joinedload(JobPosition.company)
+    )
+
+
+def job_with_company(job_id):
+    return JobPosition.query.options(
+        joinedload(JobPosition.company)
+    ).filter_by(id=job_id).first_or_404()
+
+
+def job_applicants(job_id):
+    return Application.query.filter_by(
+        job_position_id=job_id
+    ).options(
+        joinedload(Application.student)
+    )
+
+
+def student_applications(student_id):
+    return Application.query.filter_by(
+        student_id=student_id
+    ).options(
+        joinedload(Application.job_position).joinedload(JobPosition.company)
+    )
+
+
+def approved_jobs_with_company():
+    return jobs_with_company().filter(JobPosition.status == "Approved")
@@ -0,0 +1,102 @@
+import os
+import re
+from urllib.parse import quote
+from flask import url_for, request, has_request_context
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from cache import MemoryBackend
+from tenants import current_tenant
+
+# Template rendering. Compiled templates are kept in a bytecode cache under
+# the instance folder so freshly started workers skip the Jinja compile.
+# Listing pages build their per-row links from a RowUrl made once per page
+# instead of calling url_for for every link of every row, and wrap each
+# row in {% fragment %}:
+#
+#   {% fragment "company-application", app.id, app.status, app.updated_on %}
+#       ...
+#   {% endfragment %}
+#
+# The arguments form the cache key, so they must include whatever the row
+# shows that can change (usually the updated_on of each row it draws from);
+# a changed row simply gets a new key and old entries age out.
+
+# Placeholders for row arguments; large enough never to be a real id.
+_SENTINEL = 7_392_000_000_000
+
+
+class RowUrl:
+    # The URL is built once with placeholder arguments and split around
+    # them; each call only joins strings.
+
+    def __init__(self, endpoint, *names, **values):
+        placeholders = {str(_SENTINEL + i): i for i in range(len(names))}
+        url = url_for(endpoint, **values, **{
+            name: _SENTINEL + i for i, name in enumerate(names)
+        })
+
+        if names:
+            pieces = re.split("(" + "|".join(placeholders) + ")", url)
+        else:
+            pieces = [url]
+        self.literals = pieces[0::2]
+        self.slots = [placeholders[piece] for piece in pieces[1::2]]
+
+    def __call__(self, *args):
+        values = [quote(str(arg), safe="") for arg in args]
+        pieces = [self.literals[0]]
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            pieces.append(values[slot])
+            pieces.append(literal)
+        return "".join(pieces)
+
+
+def row_url(endpoint, *names, **values):
+    return RowUrl(endpoint, *names, **values)
+
+
+class FragmentCache(Extension):
+    tags = {"fragment"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            parts.append(parser.parse_expression())
+
+        body = parser.parse_statements(("name:endfragment",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_render", [nodes.List(parts)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, parts, caller):
+        store = getattr(self.environment, "fragment_cache", None)
+        if store is None:
+            return caller()
+
+        # Links are relative to the mount point of the app.
+        root = request.script_root if has_request_context() else ""
+        key = ("fragment", current_tenant(), root, *parts)
+
+        html = store.get(key)
+        if html is None:
+            html = caller()
+            store.set(key, html)
+        return html
+
+
+def init_app(app):
+    app.jinja_env.add_extension(FragmentCache)
+    app.jinja_env.globals["row_url"] = row_url
+
+    size = app.config.get("FRAGMENT_CACHE_SIZE", 20000)
+    app.jinja_env.fragment_cache = MemoryBackend(
+        size, app.config.get("FRAGMENT_CACHE_TIMEOUT", 600)
+    ) if size else None
+
+    if app.config.get("TEMPLATE_BYTECODE_CACHE", True):
+        directory = app.config.get("TEMPLATE_CACHE_DIR") or os.path.join(
+            app.instance_path, "jinja"
+        )
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
@@ -0,0 +1,257 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from flask import (Blueprint, current_app, request, redirect, url_for, abort, flash,
+                   send_from_directory, make_response)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+from db import db
+from models import Student, ResumeFile
+from tenants import current_tenant, tenant_context
+from identity import current_identity
+
+resumes_bp = Blueprint("resumes", __name__)
+
+# Resume storage. Uploads are streamed to disk in chunks while being
+# hashed and stored under their content hash, so identical files are kept
+# once and two students uploading "resume.pdf" never collide. Text and
+# page-count extraction run on a background pool after the request.
+# Files live outside static/ (instance/resumes by default) and are only
+# reachable through serve_resume, which checks who is asking. Forms that
+# take a resume are wrapped in @resume_upload, so a request body larger
+# than RESUME_MAX_BYTES is refused while it is read, not after.
+
+# Room for the other form fields next to the file.
+FORM_ALLOWANCE = 64 * 1024
+
+CHUNK_SIZE = 64 * 1024
+PAGE_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+TAG_RE = re.compile(r"<[^>]+>")
+HASHED_NAME_RE = re.compile(r"^[0-9a-f]{64}\.\w+$")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ResumeError(ValueError):
+    pass
+
+
+def _extension(filename):
+    name = secure_filename(filename or "")
+    return name.rsplit(".", 1)[-1].lower() if "." in name else ""
+
+
+def max_upload_bytes():
+    return current_app.config.get("RESUME_MAX_BYTES", 5 * 1024 * 1024)
+
+
+def resume_upload(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        request.max_content_length = max_upload_bytes() + FORM_ALLOWANCE
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@resumes_bp.app_errorhandler(RequestEntityTooLarge)
+def upload_too_large(error):
+    if request.method != "POST":
+        return error
+    flash(f"Upload is larger than {max_upload_bytes() // (1024 * 1024)} MB")
+    return redirect(request.url)
+
+
+def move_legacy_resumes(app):
+    # Resumes used to be kept under static/, where anyone could fetch them.
+    legacy = os.path.join(app.root_path, "static", "uploads", "resumes")
+    if not os.path.isdir(legacy):
+        return 0
+
+    moved = 0
+    for name in os.listdir(legacy):
+        source = os.path.join(legacy, name)
+        target = os.path.join(app.config["UPLOAD_FOLDER"], name)
+        try:
+            if os.path.exists(target):
+                os.remove(source)
+            else:
+                shutil.move(source, target)
+                moved += 1
+        except FileNotFoundError:
+            # Another worker got to it first.
+            continue
+    return moved
+
+
+def store_resume(file):
+    extension = _extension(file.filename)
+    allowed = current_app.config.get("RESUME_EXTENSIONS", {"pdf"})
+    if extension not in allowed:
+        raise ResumeError(f"Resume must be one of: {', '.join(sorted(allowed))}")
+
+    folder = current_app.config["UPLOAD_FOLDER"]
+    limit = max_upload_bytes()
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = file.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise ResumeError(f"Resume is larger than {limit // (1024 * 1024)} MB")
+                digest.update(chunk)
+                out.write(chunk)
+
+        if size == 0:
+            raise ResumeError("Resume file is empty")
+
+        filename = f"{digest.hexdigest()}.{extension}"
+        path = os.path.join(folder, filename)
+
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Two uploads of the same file can race here; the loser reuses the
+    # winner's row (and its processing) instead of failing on the unique key.
+    created = db.session.execute(
+        sqlite_insert(ResumeFile).values(
+            filename=filename, size=size
+        ).on_conflict_do_nothing(index_elements=["filename"]).returning(ResumeFile.id)
+    ).first()
+    db.session.commit()
+    if created is not None:
+        submit(filename)
+
+    return filename
+
+
+# ---------------- BACKGROUND PROCESSING ----------------
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get("RESUME_WORKERS", 2),
+                thread_name_prefix="resume"
+            )
+        return _executor
+
+
+def submit(filename):
+    app = current_app._get_current_object()
+    return _pool().submit(process_resume, app, filename, current_tenant())
+
+
+def _pdf_details(path):
+    with open(path, "rb") as f:
+        data = f.read()
+
+    page_count = len(PAGE_RE.findall(data)) or None
+    text = None
+
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        PdfReader = None
+
+    if PdfReader is not None:
+        reader = PdfReader(path)
+        page_count = len(reader.pages)
+        text = "\n".join(page.extract_text() or "" for page in reader.pages)
+
+    return page_count, text
+
+
+def _docx_details(path):
+    with zipfile.ZipFile(path) as archive:
+        xml = archive.read("word/document.xml").decode("utf-8", "ignore")
+    text = TAG_RE.sub(" ", xml.replace("</w:p>", "\n"))
+    return None, re.sub(r"[ \t]+", " ", text).strip()
+
+
+EXTRACTORS = {
+    "pdf": _pdf_details,
+    "docx": _docx_details,
+}
+
+
+def process_resume(app, filename, tenant=None):
+    # The worker thread has no request; use the uploader's database.
+    with tenant_context(app, tenant):
+        resume = ResumeFile.query.filter_by(filename=filename).first()
+        if resume is None:
+            return
+
+        extractor = EXTRACTORS.get(filename.rsplit(".", 1)[-1])
+        path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+
+        try:
+            if extractor is not None:
+                resume.page_count, resume.text = extractor(path)
+            resume.status = "Processed"
+        except Exception:
+            app.logger.exception("Could not process resume %s", filename)
+            resume.status = "Failed"
+
+        db.session.commit()
+        db.session.remove()
+
+
+# ---------------- SERVING ----------------
+
+@resumes_bp.route("/resumes/<name>")
+def serve_resume(name):
+
+    identity = current_identity()
+    if identity is None or not identity.active:
+        return redirect(url_for("index"))
+    role = identity.role
+
+    if secure_filename(name) != name:
+        abort(404)
+
+    if role == "student":
+        student = db.session.get(Student, identity.id)
+        if student is None or student.resume != name:
+            abort(403)
+
+    accel_prefix = current_app.config.get("RESUME_ACCEL_REDIRECT")
+
+    if accel_prefix:
+        # Let the front-end server (nginx) send the bytes.
+        if not os.path.exists(os.path.join(current_app.config["UPLOAD_FOLDER"], name)):
+            abort(404)
+        response = make_response("")
+        response.headers["X-Accel-Redirect"] = accel_prefix.rstrip("/") + "/" + name
+    else:
+        # Honours USE_X_SENDFILE; conditional requests get 304s and ranges.
+        response = send_from_directory(
+            current_app.config["UPLOAD_FOLDER"], name, conditional=True
+        )
+
+    if HASHED_NAME_RE.match(name):
+        # Content-addressed names never change content.
+        response.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    else:
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,180 @@
+import threading
+import time
+import click
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, update
+from db import db
+from cache import cache
+from models import JobPosition
+from tenants import all_tenants, tenant_context
+
+# Periodic maintenance off the request path. Tasks are plain functions of
+# the current time registered with @task; a Scheduler runs the ones that
+# are due. It can run as a daemon thread inside the app
+# (SCHEDULER_ENABLED) or, with several web workers, as a single
+# `flask run-scheduler` process. The clock is injectable so tests can
+# freeze or step time.
+
+TASKS = {}
+
+OPEN_JOB_STATUSES = ("Approved", "Active")
+
+
+def task(name):
+    def register(fn):
+        TASKS[name] = fn
+        return fn
+    return register
+
+
+# ---------------- TASKS ----------------
+
+@task("close-expired-jobs")
+def close_expired_jobs(now):
+    batch_size = current_app.config.get("EXPIRE_BATCH_SIZE", 500)
+    closed = 0
+
+    # Bounded batches keep each write transaction (and the lock) short.
+    while True:
+        ids = select(JobPosition.id).where(
+            JobPosition.status.in_(OPEN_JOB_STATUSES),
+            JobPosition.deadline < now.date()
+        ).limit(batch_size).scalar_subquery()
+
+        result = db.session.execute(
+            update(JobPosition).where(JobPosition.id.in_(ids)).values(
+                status="Closed"
+            ).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        closed += result.rowcount
+        if result.rowcount < batch_size:
+            break
+
+    if closed:
+        cache.invalidate("jobs")
+    return closed
+
+
+@task("refresh-counters")
+def refresh_counters(now):
+    from stats import rebuild_counters
+
+    with db.engine.begin() as connection:
+        rebuild_counters(connection)
+
+
+def _sqlite(statement):
+    if db.engine.dialect.name != "sqlite":
+        return None
+
+    # VACUUM cannot run inside a transaction.
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        result = connection.exec_driver_sql(statement)
+        return result.fetchall() if result.returns_rows else None
+
+
+@task("analyze")
+def analyze(now):
+    _sqlite("ANALYZE")
+
+
+@task("wal-checkpoint")
+def wal_checkpoint(now):
+    return _sqlite("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+@task("vacuum")
+def vacuum(now):
+    _sqlite("VACUUM")
+
+
+# ---------------- SCHEDULER ----------------
+
+class Scheduler:
+
+    def __init__(self, app, intervals=None, clock=datetime.now):
+        self.app = app
+        self.clock = clock
+        intervals = intervals if intervals is not None else app.config.get("SCHEDULE_INTERVALS", {})
+
+        # A task runs one interval after start-up, then every interval.
+        now = clock()
+        self.intervals = {
+            name: timedelta(seconds=seconds)
+            for name, seconds in intervals.items() if seconds and name in TASKS
+        }
+        self.next_run = {name: now + interval for name, interval in self.intervals.items()}
+
+    def due(self):
+        now = self.clock()
+        return [name for name, when in self.next_run.items() if when <= now]
+
+    def run_task(self, name):
+        # Once for each tenant database -> {tenant: result}.
+        results = {}
+        for tenant in all_tenants(self.app):
+            now = self.clock()
+            with tenant_context(self.app, tenant):
+                try:
+                    results[tenant] = TASKS[name](now)
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception("Scheduled task %s failed (tenant %s)", name, tenant)
+                finally:
+                    db.session.remove()
+        return results
+
+    def run_pending(self):
+        ran = []
+        for name in self.due():
+            self.run_task(name)
+            self.next_run[name] = self.clock() + self.intervals[name]
+            ran.append(name)
+        return ran
+
+    def seconds_until_next(self):
+        if not self.next_run:
+            return None
+        return max(0.0, (min(self.next_run.values()) - self.clock()).total_seconds())
+
+    def run_forever(self, stop=None, sleep=time.sleep):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.run_pending()
+            wait = self.seconds_until_next()
+            if wait is None:
+                return
+            # Wake at least once a minute so a changed clock is noticed.
+            sleep(min(wait, 60) or 1)
+
+
+def start_in_process(app):
+    scheduler = Scheduler(app)
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=scheduler.run_forever, args=(stop,), name="scheduler", daemon=True
+    )
+    thread.start()
+    return scheduler, stop
+
+
+def init_app(app):
+    if app.config.get("SCHEDULER_ENABLED") and not app.testing:
+        app.extensions["scheduler"] = start_in_process(app)
+
+    @app.cli.command("run-scheduler")
+    def run_scheduler_command():
+        scheduler = Scheduler(current_app._get_current_object())
+        click.echo(f"Scheduling: {', '.join(sorted(scheduler.intervals))}")
+        scheduler.run_forever()
+
+    @app.cli.command("run-task")
+    @click.argument("name", type=click.Choice(sorted(TASKS)))
+    def run_task_command(name):
+        results = Scheduler(current_app._get_current_object(), intervals={}).run_task(name)
+        for tenant, result in results.items():
+            label = f"{name} [{tenant}]" if tenant else name
+            click.echo(f"{label}: {result if result is not None else 'done'}")
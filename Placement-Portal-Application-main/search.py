@@ -0,0 +1,206 @@
+import re
+from sqlalchemy import text, inspect, Integer, Float
+from db import db
+from models import Company, Student, JobPosition
+from pagination import KeysetPage, paginate, page_size
+
+# Full-text search over jobs, companies and students. On SQLite the text
+# lives in FTS5 tables that triggers keep in step with the base tables;
+# other backends (or a database that has not been indexed yet) fall back
+# to the old ILIKE scan.
+
+SEARCH_TABLES = {
+    "job_search": """
+        CREATE VIRTUAL TABLE IF NOT EXISTS job_search USING fts5(
+            title, skills, company,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """,
+    "company_search": """
+        CREATE VIRTUAL TABLE IF NOT EXISTS company_search USING fts5(
+            name,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """,
+    "student_search": """
+        CREATE VIRTUAL TABLE IF NOT EXISTS student_search USING fts5(
+            name, email,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """,
+}
+
+SEARCH_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS job_search_ai AFTER INSERT ON job_position BEGIN
+        INSERT INTO job_search(rowid, title, skills, company)
+        VALUES (new.id, new.title, new.skills,
+                (SELECT name FROM company WHERE id = new.company_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS job_search_ad AFTER DELETE ON job_position BEGIN
+        DELETE FROM job_search WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS job_search_au
+    AFTER UPDATE OF title, skills, company_id ON job_position BEGIN
+        DELETE FROM job_search WHERE rowid = old.id;
+        INSERT INTO job_search(rowid, title, skills, company)
+        VALUES (new.id, new.title, new.skills,
+                (SELECT name FROM company WHERE id = new.company_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS company_search_ai AFTER INSERT ON company BEGIN
+        INSERT INTO company_search(rowid, name) VALUES (new.id, new.name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS company_search_ad AFTER DELETE ON company BEGIN
+        DELETE FROM company_search WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS company_search_au AFTER UPDATE OF name ON company BEGIN
+        DELETE FROM company_search WHERE rowid = old.id;
+        INSERT INTO company_search(rowid, name) VALUES (new.id, new.name);
+        UPDATE job_search SET company = new.name
+        WHERE rowid IN (SELECT id FROM job_position WHERE company_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS student_search_ai AFTER INSERT ON student BEGIN
+        INSERT INTO student_search(rowid, name, email)
+        VALUES (new.id, new.name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS student_search_ad AFTER DELETE ON student BEGIN
+        DELETE FROM student_search WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS student_search_au
+    AFTER UPDATE OF name, email ON student BEGIN
+        DELETE FROM student_search WHERE rowid = old.id;
+        INSERT INTO student_search(rowid, name, email)
+        VALUES (new.id, new.name, new.email);
+    END
+    """,
+]
+
+SEARCH_REBUILD = [
+    "DELETE FROM job_search",
+    """
+    INSERT INTO job_search(rowid, title, skills, company)
+    SELECT job_position.id, job_position.title, job_position.skills, company.name
+    FROM job_position LEFT JOIN company ON company.id = job_position.company_id
+    """,
+    "DELETE FROM company_search",
+    "INSERT INTO company_search(rowid, name) SELECT id, name FROM company",
+    "DELETE FROM student_search",
+    "INSERT INTO student_search(rowid, name, email) SELECT id, name, email FROM student",
+]
+
+# bm25 column weights: a hit in the title counts for more than one in
+# the company name, which counts for more than one in the skills list.
+RANKING = {
+    "job_search": "bm25(job_search, 10.0, 2.0, 5.0)",
+    "company_search": "bm25(company_search)",
+    "student_search": "bm25(student_search, 5.0, 2.0)",
+}
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_available = {}
+
+
+def create_search_index(connection):
+    if connection.dialect.name != "sqlite":
+        return
+
+    for ddl in SEARCH_TABLES.values():
+        connection.execute(text(ddl))
+    for ddl in SEARCH_TRIGGERS:
+        connection.execute(text(ddl))
+    for statement in SEARCH_REBUILD:
+        connection.execute(text(statement))
+
+    _available.pop(str(connection.engine.url), None)
+
+
+def fts_available():
+    engine = db.engine
+    key = str(engine.url)
+
+    if key not in _available:
+        _available[key] = (
+            engine.dialect.name == "sqlite" and
+            set(SEARCH_TABLES) <= set(inspect(engine).get_table_names())
+        )
+
+    return _available[key]
+
+
+def match_expression(term):
+    # Every word must match, each as a prefix; quoting keeps FTS5
+    # operators typed by the user from being interpreted.
+    tokens = TOKEN_RE.findall(term)
+    return " ".join('"%s"*' % token.replace('"', '""') for token in tokens)
+
+
+def _ranked(query, model, table, term):
+    expression = match_expression(term)
+
+    if not expression:
+        return KeysetPage([], (), page_size(), False, False)
+
+    matches = text(
+        f"SELECT rowid, {RANKING[table]} AS score FROM {table} "
+        f"WHERE {table} MATCH :expression"
+    ).bindparams(expression=expression).columns(
+        rowid=Integer, score=Float
+    ).subquery()
+
+    # Best match first, paged on (score, id) like any other listing.
+    return paginate(
+        query.add_columns(matches.c.score).join(matches, model.id == matches.c.rowid),
+        matches.c.score, model.id,
+        split=lambda row: (row[0], (row[1], row[0].id))
+    )
+
+
+def search_jobs(query, term):
+    if fts_available():
+        return _ranked(query, JobPosition, "job_search", term)
+
+    query = query.join(Company).filter(
+        (JobPosition.title.ilike(f"%{term}%")) |
+        (Company.name.ilike(f"%{term}%")) |
+        (JobPosition.skills.ilike(f"%{term}%"))
+    )
+    return paginate(query, JobPosition.posted_date, JobPosition.id, descending=True)
+
+
+def search_companies(query, term):
+    if fts_available():
+        return _ranked(query, Company, "company_search", term)
+
+    query = query.filter(Company.name.ilike(f"%{term}%"))
+    return paginate(query, Company.id)
+
+
+def search_students(query, term):
+    if fts_available():
+        return _ranked(query, Student, "student_search", term)
+
+    query = query.filter(
+        (Student.name.ilike(f"%{term}%")) |
+        (Student.email.ilike(f"%{term}%"))
+    )
+    return paginate(query, Student.id)
@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Password hashing with a configurable cost (PASSWORD_HASH_METHOD). Hashes
+# made with other parameters still verify, and are replaced with one at
+# the current cost the next time that user logs in.
+#
+# Login throttling sheds abusive load before any hashing or database
+# work: failed attempts per account, and (with a much higher limit, as
+# many students may share one NAT address) per client address, are
+# counted in sliding windows, in process memory. Successful logins are
+# never counted.
+
+
+def hash_method():
+    return current_app.config.get("PASSWORD_HASH_METHOD", "scrypt")
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=hash_method())
+
+
+@lru_cache(maxsize=8)
+def _hash_prefix(method):
+    # "scrypt" -> "scrypt:32768:8:1", the form stored in front of the salt.
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+
+def needs_rehash(stored):
+    return stored.split("$", 1)[0] != _hash_prefix(hash_method())
+
+
+def verify_password(stored, password):
+    return check_password_hash(stored, password)
+
+
+class Throttle:
+
+    def __init__(self, limit, window, max_keys=10000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._hits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _recent(self, key, now):
+        hits = self._hits.get(key)
+        if hits is None:
+            return None
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+        return hits
+
+    def retry_after(self, key, now=None):
+        # Seconds until key may try again, 0 if it may now.
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            hits = self._recent(key, now)
+            if not hits or len(hits) < self.limit:
+                return 0
+            return hits[0] + self.window - now
+
+    def hit(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            hits = self._recent(key, now)
+            if hits is None:
+                hits = self._hits[key] = deque()
+            hits.append(now)
+            self._hits.move_to_end(key)
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+
+    def reset(self, key):
+        with self._lock:
+            self._hits.pop(key, None)
+
+
+def init_app(app):
+    app.extensions["login_throttle"] = {
+        "address": Throttle(
+            app.config.get("LOGIN_ADDRESS_LIMIT", 200), app.config.get("LOGIN_ADDRESS_WINDOW", 60)
+        ),
+        "account": Throttle(
+            app.config.get("LOGIN_FAILURE_LIMIT", 5), app.config.get("LOGIN_FAILURE_WINDOW", 300)
+        ),
+    }
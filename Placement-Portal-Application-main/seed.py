@@ -0,0 +1,150 @@
+import random
+import click
+from datetime import datetime, date, timedelta
+from sqlalchemy import insert, func, select
+from db import db
+from cache import cache
+from models import Company, Student, JobPosition, Application, Placement
+from security import hash_password
+from stats import rebuild_counters
+import analytics
+
+# Synthetic data for load testing. Rows get explicit ids (continuing from
+# whatever is already there) so applications and placements can refer to
+# them without reading anything back, and each table is filled with
+# batched executemany INSERTs. Every account shares SEED_PASSWORD so the
+# benchmark can log in as anyone.
+
+SEED_PASSWORD = "password1"
+
+DEPARTMENTS = ["CSE", "ECE", "EEE", "MECH", "CIVIL", "IT"]
+SKILLS = [
+    "python", "java", "sql", "c++", "javascript", "react", "django", "flask",
+    "machine learning", "data analysis", "aws", "docker", "linux", "excel",
+]
+TITLES = ["Software Engineer", "Data Analyst", "Backend Developer", "Frontend Developer",
+          "Graduate Engineer Trainee", "DevOps Engineer", "Business Analyst"]
+STATUSES = ["Applied", "Applied", "Applied", "Shortlisted", "Interview", "Rejected"]
+
+
+def _next_id(model):
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _insert(model, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(insert(model), rows[start:start + batch_size])
+
+
+def generate(companies=20, students=1000, jobs=100, applications=5000, placements=200,
+             seed=1, batch_size=1000):
+    rng = random.Random(seed)
+    password = hash_password(SEED_PASSWORD)
+    now = datetime.utcnow()
+    today = date.today()
+
+    first = _next_id(Company)
+    company_ids = list(range(first, first + companies))
+    _insert(Company, [
+        {
+            "id": company_id,
+            "name": f"Company {company_id}",
+            "email": f"company{company_id}@example.com",
+            "password": password,
+            "website": f"https://company{company_id}.example.com",
+            "is_approved": True,
+            "is_blacklisted": False,
+            "created_at": now,
+        }
+        for company_id in company_ids
+    ], batch_size)
+
+    first = _next_id(Student)
+    student_ids = list(range(first, first + students))
+    _insert(Student, [
+        {
+            "id": student_id,
+            "name": f"Student {student_id}",
+            "email": f"student{student_id}@example.edu",
+            "password": password,
+            "department": rng.choice(DEPARTMENTS),
+            "cgpa": round(rng.uniform(5.0, 10.0), 2),
+            "is_active": True,
+        }
+        for student_id in student_ids
+    ], batch_size)
+
+    first = _next_id(JobPosition)
+    job_ids = list(range(first, first + jobs))
+    _insert(JobPosition, [
+        {
+            "id": job_id,
+            "company_id": rng.choice(company_ids),
+            "title": rng.choice(TITLES),
+            "description": "Synthetic job posting.",
+            "eligibility": f"CGPA >= {rng.choice([6, 6.5, 7, 7.5, 8])}, "
+                           f"{'/'.join(rng.sample(DEPARTMENTS, 2))}",
+            "skills": ", ".join(rng.sample(SKILLS, 3)),
+            "salary": f"{rng.randint(3, 30)} LPA",
+            "deadline": today + timedelta(days=rng.randint(-30, 90)),
+            "posted_date": now - timedelta(days=rng.randint(0, 120)),
+            "status": rng.choice(["Approved", "Approved", "Approved", "Pending"]),
+        }
+        for job_id in job_ids
+    ], batch_size)
+
+    applications = min(applications, students * jobs)
+    pairs = set()
+    while len(pairs) < applications:
+        pairs.add((rng.choice(student_ids), rng.choice(job_ids)))
+
+    first = _next_id(Application)
+    application_rows = [
+        {
+            "id": application_id,
+            "student_id": student_id,
+            "job_position_id": job_id,
+            "status": rng.choice(STATUSES),
+            "applied_on": now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+        }
+        for application_id, (student_id, job_id) in enumerate(sorted(pairs), start=first)
+    ]
+
+    placed = rng.sample(application_rows, min(placements, len(application_rows)))
+    for row in placed:
+        row["status"] = "Placed"
+
+    _insert(Application, application_rows, batch_size)
+    _insert(Placement, [
+        {"application_id": row["id"], "placed_on": row["applied_on"] + timedelta(days=14)}
+        for row in placed
+    ], batch_size)
+
+    # Core inserts skip the counter and analytics hooks; recount everything once.
+    rebuild_counters(db.session.connection())
+    analytics.rebuild(db.session.connection())
+    db.session.commit()
+    cache.invalidate("jobs", "students", "analytics")
+
+    return {
+        "companies": len(company_ids),
+        "students": len(student_ids),
+        "jobs": len(job_ids),
+        "applications": len(application_rows),
+        "placements": len(placed),
+    }
+
+
+def init_app(app):
+
+    @app.cli.command("seed-data")
+    @click.option("--companies", default=20)
+    @click.option("--students", default=1000)
+    @click.option("--jobs", default=100)
+    @click.option("--applications", default=5000)
+    @click.option("--placements", default=200)
+    @click.option("--seed", default=1, help="Random seed, for repeatable data sets.")
+    def seed_data_command(companies, students, jobs, applications, placements, seed):
+        counts = generate(companies, students, jobs, applications, placements, seed)
+        click.echo(", ".join(f"{count} {name}" for name, count in counts.items()))
+        click.echo(f"All seeded accounts use the password '{SEED_PASSWORD}'.")
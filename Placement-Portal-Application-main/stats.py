@@ -0,0 +1,189 @@
+import click
+from collections import Counter
+from sqlalchemy import event, inspect
+from db import db
+from models import Company, Student, JobPosition, Application, StatCounter
+
+# Dashboard counters. Rather than COUNT(*) over whole tables on every page
+# load, each flush works out how it changed the counts and applies the
+# difference to stat_counter in the same transaction, so dashboards read
+# a handful of rows by primary key.
+#
+# Keys:
+#   companies, students, jobs, applications
+#   applications:<status>
+#   company:<id>:jobs, company:<id>:applications
+#   job:<id>:applications, job:<id>:<status>
+
+MODEL_KEYS = {
+    Company: "companies",
+    Student: "students",
+    JobPosition: "jobs",
+    Application: "applications",
+}
+
+
+def _application_keys(application, company_id, status):
+    job_id = application.job_position_id
+    keys = [
+        f"applications:{status}",
+        f"job:{job_id}:applications",
+        f"job:{job_id}:{status}",
+    ]
+    # The job may be going away in the same flush.
+    if company_id is not None:
+        keys.append(f"company:{company_id}:applications")
+    return keys
+
+
+def _company_ids(connection, job_ids):
+    if not job_ids:
+        return {}
+
+    rows = connection.execute(
+        JobPosition.__table__.select().with_only_columns(
+            JobPosition.id, JobPosition.company_id
+        ).where(JobPosition.id.in_(job_ids))
+    )
+    return dict(rows.all())
+
+
+def _flush_deltas(session):
+    deltas = Counter()
+    applications = []
+
+    for sign, objects in ((1, session.new), (-1, session.deleted)):
+        for obj in objects:
+            key = MODEL_KEYS.get(type(obj))
+            if key is None:
+                continue
+
+            deltas[key] += sign
+
+            if isinstance(obj, JobPosition):
+                deltas[f"company:{obj.company_id}:jobs"] += sign
+            elif isinstance(obj, Application):
+                applications.append((sign, obj, obj.status))
+
+    for obj in session.dirty:
+        if not isinstance(obj, Application):
+            continue
+
+        history = inspect(obj).attrs.status.history
+        if not history.has_changes() or not history.deleted:
+            continue
+
+        old, new = history.deleted[0], obj.status
+        if old != new:
+            job_id = obj.job_position_id
+            deltas[f"applications:{old}"] -= 1
+            deltas[f"applications:{new}"] += 1
+            deltas[f"job:{job_id}:{old}"] -= 1
+            deltas[f"job:{job_id}:{new}"] += 1
+
+    if applications:
+        company_ids = _company_ids(
+            session.connection(),
+            {obj.job_position_id for _, obj, _ in applications}
+        )
+        for sign, obj, status in applications:
+            company_id = company_ids.get(obj.job_position_id)
+            for key in _application_keys(obj, company_id, status):
+                deltas[key] += sign
+
+    return deltas
+
+
+# Called as listener(connection, deltas) after the counters move, in the
+# same transaction, so derived tables can follow along (see analytics.py).
+DELTA_LISTENERS = []
+
+
+def apply_deltas(connection, deltas):
+    table = StatCounter.__table__
+
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+
+        updated = connection.execute(
+            table.update().where(table.c.key == key).values(
+                value=table.c.value + delta
+            )
+        )
+        if updated.rowcount == 0:
+            connection.execute(table.insert().values(key=key, value=delta))
+
+    for listener in DELTA_LISTENERS:
+        listener(connection, deltas)
+
+
+def _after_flush(session, flush_context):
+    deltas = _flush_deltas(session)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+REBUILD = [
+    "INSERT INTO stat_counter (key, value) SELECT 'companies', COUNT(*) FROM company",
+    "INSERT INTO stat_counter (key, value) SELECT 'students', COUNT(*) FROM student",
+    "INSERT INTO stat_counter (key, value) SELECT 'jobs', COUNT(*) FROM job_position",
+    "INSERT INTO stat_counter (key, value) SELECT 'applications', COUNT(*) FROM application",
+    """
+    INSERT INTO stat_counter (key, value)
+    SELECT 'applications:' || status, COUNT(*) FROM application GROUP BY status
+    """,
+    """
+    INSERT INTO stat_counter (key, value)
+    SELECT 'company:' || company_id || ':jobs', COUNT(*)
+    FROM job_position GROUP BY company_id
+    """,
+    """
+    INSERT INTO stat_counter (key, value)
+    SELECT 'company:' || job_position.company_id || ':applications', COUNT(*)
+    FROM application JOIN job_position ON job_position.id = application.job_position_id
+    GROUP BY job_position.company_id
+    """,
+    """
+    INSERT INTO stat_counter (key, value)
+    SELECT 'job:' || job_position_id || ':applications', COUNT(*)
+    FROM application GROUP BY job_position_id
+    """,
+    """
+    INSERT INTO stat_counter (key, value)
+    SELECT 'job:' || job_position_id || ':' || status, COUNT(*)
+    FROM application GROUP BY job_position_id, status
+    """,
+]
+
+
+def rebuild_counters(connection):
+    StatCounter.__table__.create(connection, checkfirst=True)
+    connection.exec_driver_sql("DELETE FROM stat_counter")
+    for statement in REBUILD:
+        connection.exec_driver_sql(statement)
+
+
+def get_counters(*keys):
+    rows = db.session.query(StatCounter.key, StatCounter.value).filter(
+        StatCounter.key.in_(keys)
+    ).all()
+    values = dict(rows)
+    return {key: values.get(key, 0) for key in keys}
+
+
+def job_application_counts(job_ids):
+    keys = [f"job:{job_id}:applications" for job_id in job_ids]
+    counts = get_counters(*keys) if keys else {}
+    return {job_id: counts[key] for job_id, key in zip(job_ids, keys)}
+
+
+def init_app(app):
+    if not event.contains(db.session, "after_flush", _after_flush):
+        event.listen(db.session, "after_flush", _after_flush)
+
+    @app.cli.command("rebuild-stats")
+    def rebuild_stats_command():
+        with db.engine.begin() as connection:
+            rebuild_counters(connection)
+        click.echo("Dashboard counters rebuilt.")
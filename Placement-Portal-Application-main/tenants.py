@@ -0,0 +1,150 @@
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+import click
+from flask import request, has_request_context
+from flask.sessions import SecureCookieSessionInterface
+from itsdangerous import URLSafeTimedSerializer
+from sqlalchemy import create_engine
+from db import ENGINE_HOOKS
+from cache import cache
+
+# Several institutions served by one set of workers. Each tenant has its
+# own SQLite database, listed in TENANTS; a request is routed by its host
+# (TENANT_HOSTS) or, with TENANT_PATHS on, by a leading /<tenant>/ path
+# segment, which is moved into the script root so url_for keeps it.
+# db.session and db.engine then resolve to that tenant's engine, created
+# on first use and kept for the life of the process, so a large college's
+# write lock never stalls a small one. Cache entries, cached accounts,
+# rendered fragments and session cookies are kept apart per tenant;
+# counters already live in each tenant's own database.
+#
+# Outside a request (CLI commands, scheduled tasks, worker threads) the
+# tenant is set with tenant_context(), or for a whole process with the
+# PLACEMENT_TENANT environment variable. Anything not routed to a tenant
+# uses SQLALCHEMY_DATABASE_URI, exactly as a single-college deployment.
+
+ENVIRON_KEY = "placement.tenant"
+
+_current = ContextVar("tenant", default=os.environ.get("PLACEMENT_TENANT") or None)
+
+
+def current_tenant():
+    name = _current.get()
+    if name is None and has_request_context():
+        name = request.environ.get(ENVIRON_KEY)
+    return name
+
+
+@contextmanager
+def tenant_context(app, name):
+    # A fresh app context, so the tenant gets its own db.session.
+    token = _current.set(name)
+    try:
+        with app.app_context():
+            yield
+    finally:
+        _current.reset(token)
+
+
+def all_tenants(app):
+    router = app.extensions.get("tenants")
+    return [None] + (router.names if router else [])
+
+
+class TenantRouter:
+
+    def __init__(self, app):
+        self.app = app
+        self.databases = dict(app.config.get("TENANTS") or {})
+        self.hosts = {
+            host.lower(): name for host, name in (app.config.get("TENANT_HOSTS") or {}).items()
+        }
+        self.paths = app.config.get("TENANT_PATHS", False)
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    @property
+    def names(self):
+        return sorted(self.databases)
+
+    def resolve(self, environ):
+        host = environ.get("HTTP_HOST", "").split(":")[0].lower()
+        name = self.hosts.get(host)
+
+        if name is None and self.paths:
+            path = environ.get("PATH_INFO", "")
+            segment = path.lstrip("/").split("/", 1)[0]
+            if segment in self.databases:
+                environ["SCRIPT_NAME"] = environ.get("SCRIPT_NAME", "") + "/" + segment
+                environ["PATH_INFO"] = path[len(segment) + 1:] or "/"
+                name = segment
+
+        return name
+
+    def engines(self, name):
+        engines = self._engines.get(name)
+        if engines is None:
+            with self._lock:
+                engines = self._engines.get(name)
+                if engines is None:
+                    engines = self._engines[name] = {None: self._create_engine(name)}
+        return engines
+
+    def current_engines(self):
+        name = current_tenant()
+        return self.engines(name) if name is not None else None
+
+    def _create_engine(self, name):
+        if name not in self.databases:
+            raise RuntimeError(f"Unknown tenant {name!r}; add it to TENANTS.")
+
+        options = dict(self.app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+        engine = create_engine(self.databases[name], **options)
+        for hook in ENGINE_HOOKS:
+            hook(self.app, engine)
+        return engine
+
+
+class TenantSessionInterface(SecureCookieSessionInterface):
+    # A login at one college must not be valid at another on the same host:
+    # each tenant has its own cookie, signed with its own salt, so a cookie
+    # copied to another tenant fails verification.
+
+    def get_cookie_name(self, app):
+        name = super().get_cookie_name(app)
+        tenant = current_tenant()
+        return f"{name}-{tenant}" if tenant else name
+
+    def get_signing_serializer(self, app):
+        serializer = super().get_signing_serializer(app)
+        tenant = current_tenant()
+        if serializer is None or tenant is None:
+            return serializer
+        return URLSafeTimedSerializer(
+            serializer.secret_keys, salt=f"{self.salt}:{tenant}",
+            serializer=self.serializer, signer_kwargs=serializer.signer_kwargs
+        )
+
+
+def _middleware(router, wsgi_app):
+    def route(environ, start_response):
+        environ[ENVIRON_KEY] = router.resolve(environ)
+        return wsgi_app(environ, start_response)
+    return route
+
+
+def init_app(app):
+    if not app.config.get("TENANTS"):
+        return
+
+    router = app.extensions["tenants"] = TenantRouter(app)
+    app.wsgi_app = _middleware(router, app.wsgi_app)
+    app.session_interface = TenantSessionInterface()
+    cache.namespace = current_tenant
+
+    @app.cli.command("list-tenants")
+    def list_tenants_command():
+        for name in router.names:
+            click.echo(f"{name}: {router.databases[name]}")
@@ -0,0 +1,40 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import TestingConfig
+from app import create_app
+from db import db
+from models import Admin
+from migrations import upgrade
+from security import hash_password
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # A fresh database per test, built by the real migrations.
+    monkeypatch.setattr(TestingConfig, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(TestingConfig, "UPLOAD_FOLDER", str(tmp_path / "resumes"), raising=False)
+    monkeypatch.setattr(TestingConfig, "TEMPLATE_BYTECODE_CACHE", False)
+
+    app = create_app("testing")
+    with app.app_context():
+        upgrade()
+        db.session.add(Admin(username="admin", password=hash_password("admin123")))
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def login(client, role, user_id):
+    with client.session_transaction() as session:
+        session.clear()
+        session["role"] = role
+        session["user_id"] = user_id
@@ -0,0 +1,42 @@
+from db import db
+from models import Student, AnalyticsDirty
+from security import hash_password
+import analytics
+
+# Department figures follow students who move department, and viewing the
+# dashboard with nothing dirty runs no writes.
+
+
+def departments():
+    return {row["department"]: row["students"] for row in analytics.summary()["departments"]}
+
+
+def test_department_change_is_picked_up(app):
+    with app.app_context():
+        db.session.add_all(
+            Student(name=name, email=f"{name}@example.com", password=hash_password("x"),
+                    department="CSE", cgpa=8.0)
+            for name in ("asha", "ravi")
+        )
+        db.session.commit()
+        assert departments() == {"CSE": 2}
+
+        student = Student.query.filter_by(name="ravi").one()
+        student.department = "ECE"
+        db.session.commit()
+        assert AnalyticsDirty.query.filter_by(kind="departments").count() == 1
+
+        assert departments() == {"CSE": 1, "ECE": 1}
+        assert AnalyticsDirty.query.count() == 0
+
+
+def test_clean_summary_does_not_write(app, monkeypatch):
+    with app.app_context():
+        analytics.refresh_now()
+
+        def refresh(connection):
+            raise AssertionError("refresh ran with nothing dirty")
+
+        monkeypatch.setattr(analytics, "refresh", refresh)
+        analytics.summary()
+        analytics.summary()
@@ -0,0 +1,36 @@
+from datetime import date
+from db import db
+from models import Company, JobPosition
+from conftest import login
+
+# Conditional GETs: the ETag covers the rows in scope, so removing one
+# must turn the next revalidation into a full response.
+
+
+def test_removed_row_is_not_a_304(app):
+    with app.app_context():
+        company = Company(name="Acme", email="hr@acme.example", password="x", is_approved=True)
+        db.session.add(company)
+        db.session.flush()
+        db.session.add_all(
+            JobPosition(company_id=company.id, title=title, deadline=date(2026, 4, 1), status="Approved")
+            for title in ("Engineer", "Analyst")
+        )
+        db.session.commit()
+
+    client = app.test_client()
+    login(client, "admin", 1)
+
+    response = client.get("/api/v1/jobs")
+    etag = response.headers["ETag"]
+    assert len(response.get_json()["items"]) == 2
+    assert "Last-Modified" not in response.headers
+    assert client.get("/api/v1/jobs", headers={"If-None-Match": etag}).status_code == 304
+
+    with app.app_context():
+        db.session.delete(JobPosition.query.filter_by(title="Analyst").one())
+        db.session.commit()
+
+    response = client.get("/api/v1/jobs", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [item["title"] for item in response.get_json()["items"]] == ["Engineer"]
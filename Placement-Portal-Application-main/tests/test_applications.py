@@ -0,0 +1,46 @@
+import re
+from datetime import date
+from db import db
+from models import Company, Student, JobPosition, Application
+from security import hash_password
+from conftest import login
+
+# Apply links carry a fresh idempotency key on every render, so repeating
+# one replays the first outcome.
+
+
+def add_job(deadline):
+    company = Company(name="Acme", email="hr@acme.example", password="x", is_approved=True)
+    student = Student(name="Asha", email="asha@example.com", password=hash_password("x"),
+                      department="CSE", cgpa=8.0, is_active=True)
+    db.session.add_all([company, student])
+    db.session.flush()
+    job = JobPosition(company_id=company.id, title="Engineer", deadline=deadline, status="Approved")
+    db.session.add(job)
+    db.session.commit()
+    return student.id, job.id
+
+
+def apply_links(client):
+    return re.findall(r'href="(/student/apply/\d+\?key=[^"]+)"', client.get("/student/jobs").text)
+
+
+def test_apply_links_carry_a_key(app):
+    with app.app_context():
+        student_id, job_id = add_job(date.today())
+
+    client = app.test_client()
+    login(client, "student", student_id)
+
+    first, = apply_links(client)
+    second, = apply_links(client)
+    assert first != second
+
+    assert client.get(first).headers["Location"].endswith("/student/my_applications")
+    # The same link again is a replay, not a second apply.
+    assert client.get(first).headers["Location"].endswith("/student/my_applications")
+    assert client.get(second).headers["Location"].endswith("/student/jobs")
+
+    with app.app_context():
+        assert Application.query.count() == 1
+
@@ -0,0 +1,58 @@
+import threading
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from db import db
+from engine import retry_on_lock
+
+# Readers and writers sharing the WAL database must never see "database is
+# locked": the busy timeout and retry_on_lock absorb the contention.
+
+READERS = 4
+WRITERS = 4
+ROUNDS = 50
+
+
+def test_concurrent_readers_and_writers(app):
+    with app.app_context():
+        assert db.session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        db.session.execute(text("CREATE TABLE counter (id INTEGER PRIMARY KEY, value INTEGER)"))
+        db.session.execute(text("INSERT INTO counter (id, value) VALUES (1, 0)"))
+        db.session.commit()
+
+    @retry_on_lock
+    def read():
+        return db.session.execute(text("SELECT value FROM counter WHERE id = 1")).scalar()
+
+    @retry_on_lock
+    def write():
+        # Read first, so the transaction has to upgrade to a write lock.
+        value = db.session.execute(text("SELECT value FROM counter WHERE id = 1")).scalar()
+        db.session.execute(text("UPDATE counter SET value = value + 1 WHERE id = 1"))
+        db.session.commit()
+        return value
+
+    errors = []
+    start = threading.Barrier(READERS + WRITERS)
+
+    def run(fn):
+        with app.app_context():
+            start.wait()
+            try:
+                for _ in range(ROUNDS):
+                    fn()
+                    db.session.rollback()
+            except OperationalError as error:
+                errors.append(error)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=run, args=(read,)) for _ in range(READERS)]
+    threads += [threading.Thread(target=run, args=(write,)) for _ in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with app.app_context():
+        assert db.session.execute(text("SELECT value FROM counter")).scalar() == WRITERS * ROUNDS
@@ -0,0 +1,85 @@
+import random
+import time
+from datetime import datetime, timedelta
+from interviews import plan
+
+# plan() books each slot once, keeps every student's interviews apart and
+# stays fast when there are far more candidates than slots.
+
+DAY = datetime(2026, 3, 2, 9, 0)
+
+
+def make_windows(count, panels, minutes=30):
+    windows = []
+    slot_id = 0
+    for index in range(count):
+        starts_on = DAY + timedelta(minutes=minutes * index)
+        slot_ids = list(range(slot_id, slot_id + panels))
+        slot_id += panels
+        windows.append((starts_on, starts_on + timedelta(minutes=minutes), slot_ids))
+    return windows
+
+
+def check(slots, candidates, windows, busy, gap):
+    assert len(set(slots.values())) == len(slots)
+
+    times = {slot_id: (window[0], window[1]) for window in windows for slot_id in window[2]}
+    students = dict(candidates)
+    for application_id, slot_id in slots.items():
+        starts_on, ends_on = times[slot_id]
+        for busy_start, busy_end in busy.get(students[application_id], ()):
+            assert ends_on + gap <= busy_start or busy_end + gap <= starts_on
+
+
+def test_plan_is_conflict_free():
+    rng = random.Random(7)
+    windows = make_windows(24, 3)
+    gap = timedelta(minutes=15)
+
+    candidates = [(application_id, application_id) for application_id in range(90)]
+    busy = {}
+    for _, student_id in candidates:
+        busy[student_id] = [
+            (window[0], window[1]) for window in rng.sample(windows, rng.randint(0, 12))
+        ]
+
+    slots, unplaced = plan(candidates, windows, busy, gap)
+
+    check(slots, candidates, windows, busy, gap)
+    assert sorted(list(slots) + unplaced) == [application_id for application_id, _ in candidates]
+
+
+def test_plan_moves_placed_candidates_to_make_room():
+    # The greedy pass gives candidate 1 the 09:00 window and 2 the 11:00
+    # one; 3 only fits once 1 moves on to 10:00.
+    windows = [
+        (DAY + timedelta(hours=hour), DAY + timedelta(hours=hour, minutes=30), [hour])
+        for hour in range(3)
+    ]
+    gap = timedelta(minutes=15)
+    busy = {1: [windows[2][:2]], 2: [windows[1][:2]], 3: [windows[1][:2]]}
+    candidates = [(1, 1), (2, 2), (3, 3)]
+
+    slots, unplaced = plan(candidates, windows, busy, gap)
+
+    assert unplaced == []
+    assert len(slots) == 3
+    check(slots, candidates, windows, busy, gap)
+
+
+def test_plan_oversubscribed_is_fast():
+    windows = make_windows(400, 10)
+    candidates = [(application_id, application_id) for application_id in range(5000)]
+    busy = {
+        student_id: [(windows[student_id % 400][0], windows[student_id % 400][1])]
+        for _, student_id in candidates
+    }
+
+    started = time.perf_counter()
+    slots, unplaced = plan(candidates, windows, busy, timedelta(minutes=15))
+    elapsed = time.perf_counter() - started
+
+    assert len(slots) == 4000
+    assert len(unplaced) == 1000
+    check(slots, candidates, windows, busy, timedelta(minutes=15))
+    assert elapsed < 5
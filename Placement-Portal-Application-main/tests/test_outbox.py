@@ -0,0 +1,118 @@
+import smtplib
+from datetime import datetime, timedelta, timezone
+import pytest
+from db import db
+from models import OutboxMessage
+import outbox
+
+# The outbox against a fake SMTP server: one digest per recipient, backoff
+# after a transient failure and Failed once the attempts run out. Times
+# are passed in, never read from the wall clock.
+
+NOW = datetime(2026, 3, 1, 12, 0)
+
+
+class FakeSMTP:
+    sent = []
+    down = False
+
+    def __init__(self, host, port, timeout=None):
+        if FakeSMTP.down:
+            raise ConnectionRefusedError("connection refused")
+
+    def send_message(self, email):
+        FakeSMTP.sent.append(email)
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    FakeSMTP.sent = []
+    FakeSMTP.down = False
+    monkeypatch.setattr(smtplib, "SMTP", FakeSMTP)
+    return FakeSMTP
+
+
+def queue(*messages):
+    db.session.add_all(
+        OutboxMessage(recipient=recipient, message=message, next_attempt_on=NOW, created_on=NOW)
+        for recipient, message in messages
+    )
+    db.session.commit()
+
+
+def states():
+    return [
+        (row.recipient, row.status, row.attempts, row.next_attempt_on)
+        for row in OutboxMessage.query.order_by(OutboxMessage.id)
+    ]
+
+
+def test_one_digest_per_recipient(app, smtp):
+    with app.app_context():
+        queue(("a@example.com", "First."), ("b@example.com", "Other."), ("a@example.com", "Second."))
+
+        assert outbox.dispatch(NOW) == 3
+
+        assert sorted(email["To"] for email in smtp.sent) == ["a@example.com", "b@example.com"]
+        digest = next(email for email in smtp.sent if email["To"] == "a@example.com")
+        assert digest["Subject"] == "Placement Portal: 2 updates"
+        assert "- First.\n- Second." in digest.get_content()
+        assert {status for _, status, _, _ in states()} == {"Sent"}
+
+
+def test_transient_failure_backs_off(app, smtp):
+    app.config.update(OUTBOX_RETRY_DELAY=60, OUTBOX_MAX_ATTEMPTS=8)
+    with app.app_context():
+        queue(("a@example.com", "Hello."))
+
+        smtp.down = True
+        assert outbox.dispatch(NOW) == 0
+        assert states() == [("a@example.com", "Pending", 1, NOW + timedelta(seconds=60))]
+
+        # Not due yet, so nothing is tried.
+        smtp.down = False
+        assert outbox.dispatch(NOW + timedelta(seconds=59)) == 0
+        assert smtp.sent == []
+
+        smtp.down = True
+        assert outbox.dispatch(NOW + timedelta(seconds=60)) == 0
+        assert states() == [("a@example.com", "Pending", 2, NOW + timedelta(seconds=180))]
+
+        smtp.down = False
+        assert outbox.dispatch(NOW + timedelta(seconds=180)) == 1
+        assert states()[0][1] == "Sent"
+        assert len(smtp.sent) == 1
+
+
+def test_failed_after_max_attempts(app, smtp):
+    app.config.update(OUTBOX_RETRY_DELAY=60, OUTBOX_MAX_ATTEMPTS=3)
+    smtp.down = True
+    with app.app_context():
+        queue(("a@example.com", "Hello."))
+
+        now = NOW
+        for _ in range(3):
+            assert outbox.dispatch(now) == 0
+            now += timedelta(hours=1)
+
+        row = OutboxMessage.query.one()
+        assert (row.status, row.attempts) == ("Failed", 3)
+        assert "connection refused" in row.last_error
+
+        smtp.down = False
+        assert outbox.dispatch(now) == 0
+        assert smtp.sent == []
+
+
+def test_scheduled_send_uses_the_given_time(app, smtp):
+    # The scheduler passes local time; the outbox compares it in UTC.
+    local = NOW.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    with app.app_context():
+        queue(("a@example.com", "Hello."))
+
+        assert outbox.send_notifications(local - timedelta(minutes=1)) == 0
+        assert outbox.send_notifications(local) == 1
+        assert OutboxMessage.query.one().sent_on == NOW
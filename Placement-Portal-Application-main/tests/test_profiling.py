@@ -0,0 +1,21 @@
+from conftest import login
+
+# /admin/metrics is for a logged-in admin account or a scraper holding
+# METRICS_TOKEN; a session that merely says "admin" is not enough.
+
+
+def test_metrics_need_a_real_admin_or_the_token(app):
+    app.config["METRICS_TOKEN"] = "s3cret"
+    client = app.test_client()
+
+    assert client.get("/admin/metrics/prometheus").status_code == 403
+    assert client.get("/admin/metrics/prometheus", headers={"Authorization": "Bearer wrong"}).status_code == 403
+    assert client.get("/admin/metrics/prometheus", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+    # No such admin account.
+    login(client, "admin", 999)
+    assert client.get("/admin/metrics/prometheus").status_code == 403
+
+    login(client, "admin", 1)
+    assert client.get("/admin/metrics/prometheus").status_code == 200
+    assert client.get("/admin/metrics/").status_code == 200
@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+from sqlalchemy import event, select
+from db import db
+from models import JobPosition
+import seed
+from conftest import login
+
+# Every listing page must run a fixed number of SQL statements however
+# many jobs and applicants it shows; a count that grows with the data is
+# an N+1 query (see queries.py). Each page is measured on a small data set
+# and again on one ten times larger.
+
+MAX_STATEMENTS = 8
+
+LISTINGS = [
+    ("admin", "/admin/view/applications"),
+    ("admin", "/admin/job/{job_id}"),
+    ("admin", "/admin/manage/jobs"),
+    ("admin", "/admin/manage/students"),
+    ("admin", "/admin/manage/companies"),
+    ("company", "/company/dashboard"),
+    ("company", "/company/applications"),
+    ("company", "/company/job/{job_id}/candidates"),
+    ("student", "/student/jobs"),
+    ("student", "/student/my_applications"),
+]
+
+
+@contextmanager
+def counting(engine):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+
+def statement_counts(app):
+    with app.app_context():
+        job_id = db.session.execute(
+            select(JobPosition.id).where(JobPosition.company_id == 1).order_by(JobPosition.id)
+        ).scalar()
+        engine = db.engine
+
+    users = {"admin": 1, "company": 1, "student": 1}
+    client = app.test_client()
+    counts = {}
+
+    for role, listing in LISTINGS:
+        url = listing.format(job_id=job_id)
+        login(client, role, users[role])
+        # The first request warms per-process caches (accounts, counters).
+        assert client.get(url).status_code == 200, url
+
+        with counting(engine) as statements:
+            response = client.get(url)
+        assert response.status_code == 200, url
+        counts[listing] = len(statements)
+
+    return counts
+
+
+def test_listing_statement_counts_do_not_grow(app):
+    with app.app_context():
+        seed.generate(companies=2, students=20, jobs=6, applications=60, placements=5)
+    small = statement_counts(app)
+
+    with app.app_context():
+        seed.generate(companies=2, students=200, jobs=60, applications=600, placements=50, seed=2)
+    large = statement_counts(app)
+
+    for url, count in large.items():
+        assert count <= MAX_STATEMENTS, f"{url} ran {count} statements"
+        assert count == small[url], f"{url}: {small[url]} statements grew to {count}"
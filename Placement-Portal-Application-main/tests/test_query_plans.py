@@ -0,0 +1,19 @@
+from sqlalchemy import text
+from db import db
+from migrations import full_scans
+import seed
+
+# The hot queries in migrations.hot_queries() must each be answered from
+# an index, both before and after ANALYZE has given SQLite statistics.
+
+
+def test_hot_queries_use_indexes(app):
+    with app.app_context():
+        assert full_scans() == {}
+
+        seed.generate(companies=5, students=300, jobs=40, applications=1500, placements=60)
+        assert full_scans() == {}
+
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+        assert full_scans() == {}
@@ -0,0 +1,92 @@
+from datetime import date, datetime, timedelta
+from db import db
+from models import Company, JobPosition
+from scheduler import Scheduler, close_expired_jobs
+
+# Scheduled tasks run against a frozen clock, never the wall clock.
+
+NOW = datetime(2026, 3, 1, 12, 0)
+
+
+class FrozenClock:
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, **delta):
+        self.now += timedelta(**delta)
+
+
+def add_jobs(deadlines):
+    company = Company(name="Acme", email="hr@acme.example", password="x", is_approved=True)
+    db.session.add(company)
+    db.session.flush()
+
+    jobs = {}
+    for title, (deadline, status) in deadlines.items():
+        jobs[title] = JobPosition(company_id=company.id, title=title, deadline=deadline, status=status)
+    db.session.add_all(jobs.values())
+    db.session.commit()
+    return {title: job.id for title, job in jobs.items()}
+
+
+def statuses(ids):
+    return {title: db.session.get(JobPosition, job_id).status for title, job_id in ids.items()}
+
+
+def test_close_expired_jobs_uses_the_given_time(app):
+    with app.app_context():
+        ids = add_jobs({
+            "expired": (date(2026, 2, 28), "Approved"),
+            "expired active": (date(2026, 2, 1), "Active"),
+            "due today": (date(2026, 3, 1), "Approved"),
+            "future": (date(2026, 4, 1), "Approved"),
+            "expired pending": (date(2026, 2, 1), "Pending"),
+        })
+
+        assert close_expired_jobs(NOW) == 2
+        db.session.expire_all()
+        assert statuses(ids) == {
+            "expired": "Closed",
+            "expired active": "Closed",
+            "due today": "Approved",
+            "future": "Approved",
+            "expired pending": "Pending",
+        }
+
+        # A day later today's deadline has passed too; nothing runs twice.
+        assert close_expired_jobs(NOW + timedelta(days=1)) == 1
+        assert close_expired_jobs(NOW + timedelta(days=1)) == 0
+
+
+def test_due_tasks_follow_the_clock(app):
+    clock = FrozenClock(NOW)
+    scheduler = Scheduler(app, intervals={"close-expired-jobs": 300, "analyze": 3600}, clock=clock)
+
+    assert scheduler.due() == []
+    assert scheduler.seconds_until_next() == 300
+
+    clock.advance(seconds=299)
+    assert scheduler.due() == []
+
+    clock.advance(seconds=1)
+    assert scheduler.run_pending() == ["close-expired-jobs"]
+    assert scheduler.next_run["close-expired-jobs"] == NOW + timedelta(seconds=600)
+
+    clock.advance(seconds=3300)
+    assert sorted(scheduler.due()) == ["analyze", "close-expired-jobs"]
+
+
+def test_run_task_passes_the_frozen_time(app):
+    with app.app_context():
+        ids = add_jobs({"expired": (date(2026, 2, 28), "Approved")})
+
+    clock = FrozenClock(NOW)
+    scheduler = Scheduler(app, intervals={}, clock=clock)
+    assert scheduler.run_task("close-expired-jobs") == {None: 1}
+
+    with app.app_context():
+        assert statuses(ids) == {"expired": "Closed"}
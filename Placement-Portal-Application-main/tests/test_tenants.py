@@ -0,0 +1,48 @@
+import pytest
+from app import create_app
+from config import TestingConfig
+from db import db
+from models import Admin
+from migrations import upgrade
+from security import hash_password
+from tenants import tenant_context
+
+# A session cookie from one college must not log anyone in at another,
+# even though every tenant shares SECRET_KEY.
+
+
+@pytest.fixture
+def tenant_app(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingConfig, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'default.db'}")
+    monkeypatch.setattr(TestingConfig, "UPLOAD_FOLDER", str(tmp_path / "resumes"), raising=False)
+    monkeypatch.setattr(TestingConfig, "TEMPLATE_BYTECODE_CACHE", False)
+    monkeypatch.setattr(TestingConfig, "TENANTS", {
+        name: f"sqlite:///{tmp_path / name}.db" for name in ("a", "b")
+    })
+    monkeypatch.setattr(TestingConfig, "TENANT_PATHS", True)
+
+    app = create_app("testing")
+    for name in ("a", "b"):
+        with tenant_context(app, name):
+            upgrade()
+            db.session.add(Admin(username="admin", password=hash_password("admin123")))
+            db.session.commit()
+    return app
+
+
+def test_session_cookie_does_not_cross_tenants(tenant_app):
+    client = tenant_app.test_client()
+    response = client.post("/a/login", data={
+        "role": "admin", "identifier": "admin", "password": "admin123"
+    })
+    assert response.status_code == 302
+    assert client.get("/a/admin/dashboard").status_code == 200
+
+    stolen = client.get_cookie("session-a").value
+    other = tenant_app.test_client()
+    other.set_cookie("session-b", stolen)
+    assert other.get("/b/admin/dashboard").status_code == 302
+
+    # Nor does a tenant's cookie count for the default database.
+    other.set_cookie("session", stolen)
+    assert other.get("/admin/dashboard").status_code == 302
@@ -0,0 +1,106 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import DateTime, select, update, insert, func, literal, exists
+from db import db
+from models import Student, JobPosition, Application, Placement
+from stats import apply_deltas
+from outbox import queue_application_changes
+
+# Bulk application status changes. The rows to change are described once
+# as a select of application ids (explicit ids or a filter such as
+# "CGPA >= 8 for job 12"), scoped to the company's own jobs. One grouped
+# query both proves ownership and gives the counter deltas, then a single
+# UPDATE and a single INSERT ... SELECT for placements do the work; the
+# students are notified through the outbox in the same transaction.
+
+TRANSITION_STATUSES = ["Shortlisted", "Interview", "Selected", "Placed", "Rejected"]
+
+
+class TransitionError(ValueError):
+    pass
+
+
+def _scope(company_id, application_ids=None, job_id=None, min_cgpa=None, current_status=None):
+    statement = select(Application.id).join(
+        JobPosition, JobPosition.id == Application.job_position_id
+    ).where(JobPosition.company_id == company_id)
+
+    if application_ids is not None:
+        statement = statement.where(Application.id.in_(application_ids))
+    if job_id is not None:
+        statement = statement.where(Application.job_position_id == job_id)
+    if min_cgpa is not None:
+        statement = statement.join(
+            Student, Student.id == Application.student_id
+        ).where(Student.cgpa >= min_cgpa)
+    if current_status:
+        statement = statement.where(Application.status == current_status)
+
+    return statement
+
+
+def transition_applications(company_id, status, application_ids=None, job_id=None,
+                            min_cgpa=None, current_status=None):
+    if status not in TRANSITION_STATUSES:
+        raise TransitionError(f"Unknown status {status}")
+
+    if application_ids is not None:
+        application_ids = {int(app_id) for app_id in application_ids}
+        if not application_ids:
+            raise TransitionError("No applications selected")
+    elif job_id is None:
+        raise TransitionError("Choose applications or a job to filter on")
+
+    scope = _scope(company_id, application_ids, job_id, min_cgpa, current_status)
+    ids = scope.scalar_subquery()
+
+    groups = db.session.execute(
+        select(
+            Application.job_position_id, Application.status, func.count()
+        ).where(
+            Application.id.in_(ids)
+        ).group_by(
+            Application.job_position_id, Application.status
+        )
+    ).all()
+
+    # Anything asked for by id that did not come back belongs to another
+    # company (or does not exist), so nothing is changed.
+    if application_ids is not None and sum(count for _, _, count in groups) != len(application_ids):
+        raise TransitionError("Unauthorized action")
+
+    deltas = Counter()
+    changed = 0
+    for job_position_id, old, count in groups:
+        if old == status:
+            continue
+        changed += count
+        deltas[f"applications:{old}"] -= count
+        deltas[f"applications:{status}"] += count
+        deltas[f"job:{job_position_id}:{old}"] -= count
+        deltas[f"job:{job_position_id}:{status}"] += count
+
+    if status == "Placed":
+        # Before the UPDATE, while a current_status filter still matches.
+        db.session.execute(
+            insert(Placement).from_select(
+                ["application_id", "placed_on"],
+                select(Application.id, literal(datetime.utcnow(), DateTime)).where(
+                    Application.id.in_(ids),
+                    ~exists().where(Placement.application_id == Application.id)
+                )
+            )
+        )
+
+    if changed:
+        queue_application_changes(ids, status)
+        db.session.execute(
+            update(Application).where(
+                Application.id.in_(ids), Application.status != status
+            ).values(status=status).execution_options(synchronize_session=False)
+        )
+        # Core statements skip the flush hooks that keep the counters.
+        apply_deltas(db.session.connection(), deltas)
+
+    db.session.commit()
+    return changed
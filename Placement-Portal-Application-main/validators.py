@@ -0,0 +1,60 @@
+import re
+
+EMAIL_RE = re.compile(r"[^@]+@[^@]+\.[^@]+")
+
+# Shared by the registration forms and the bulk importer so both accept
+# exactly the same students. Each returns (cleaned value, error message).
+
+
+def validate_email(email):
+    if not email or not EMAIL_RE.match(email):
+        return None, "Invalid email format."
+    return email, None
+
+
+def validate_password(password):
+    if not password or len(password) < 6:
+        return None, "Password must be at least 6 characters."
+    return password, None
+
+
+def validate_cgpa(cgpa_str):
+    if not cgpa_str:
+        return None, None
+
+    try:
+        cgpa = float(cgpa_str)
+        if not (0 <= cgpa <= 10):
+            raise ValueError
+    except ValueError:
+        return None, "Invalid CGPA. Must be between 0 and 10."
+
+    return cgpa, None
+
+
+def validate_student(name, email, password, department, cgpa_str):
+    if not name:
+        return None, "Name is required."
+
+    _, error = validate_email(email)
+    if error:
+        return None, error
+
+    _, error = validate_password(password)
+    if error:
+        return None, error
+
+    if not department:
+        return None, "Department is required."
+
+    cgpa, error = validate_cgpa(cgpa_str)
+    if error:
+        return None, error
+
+    return {
+        "name": name,
+        "email": email,
+        "password": password,
+        "department": department,
+        "cgpa": cgpa,
+    }, None